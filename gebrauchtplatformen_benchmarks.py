@@ -0,0 +1,1239 @@
+# -*- coding: utf-8 -*- # Stellt sicher, dass Umlaute etc. korrekt interpretiert werden
+
+# Benchmarks und Gleichheitsprüfungen für gebrauchtplatformen_monitor.py (nicht Teil des Monitor-Betriebs).
+#   python gebrauchtplatformen_benchmarks.py --check [HTML_DATEI ...]   Prüft, dass die schnellen Wege (lxml, JSON,
+#                                                                         Streaming, Filter-Engine, Batch-Filterung)
+#                                                                         dieselben Ergebnisse liefern wie die bisherigen
+#   python gebrauchtplatformen_benchmarks.py --benchmark-...             Messungen (siehe --help)
+# Abweichungen brechen mit AssertionError ab (Exit-Code 1), auch mit 'python -O'.
+
+from time import sleep, time, monotonic, perf_counter
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import random
+import threading
+import multiprocessing
+import logging
+import json
+import os
+import sys
+
+import gebrauchtplatformen_monitor as monitor
+
+# ==============================================================================
+# 1. GLEICHHEITSPRÜFUNGEN
+# ==============================================================================
+
+CHECK_LISTINGS_PATH = ["props", "pageProps", "listings"] # Pfad der Inserate-Liste im eingebetteten JSON der synthetischen Seite
+
+
+def assert_identical(expected, actual, description):
+    """
+    Bricht mit AssertionError ab, wenn 'actual' von 'expected' abweicht (statt 'assert', damit die Prüfung auch
+    mit 'python -O' läuft). Die Meldung nennt bei Listen den ersten Unterschied, bei Mengen die fehlenden Elemente.
+    """
+    if expected == actual:
+        return
+    if isinstance(expected, monitor.PageExtraction) and isinstance(actual, monitor.PageExtraction):
+        detail = f"{expected.node_count}/{len(expected.listings)} vs. {actual.node_count}/{len(actual.listings)} Elemente/Listings"
+        expected, actual = expected.listings, actual.listings
+    else:
+        detail = ""
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        index = next((i for i, (left, right) in enumerate(zip(expected, actual)) if left != right), min(len(expected), len(actual)))
+        left = expected[index] if index < len(expected) else "(fehlt)"
+        right = actual[index] if index < len(actual) else "(fehlt)"
+        detail += f"{', ' if detail else ''}erster Unterschied bei #{index + 1}:\n  erwartet: {left}\n  erhalten: {right}"
+    elif isinstance(expected, (set, frozenset)) and isinstance(actual, (set, frozenset)):
+        detail = f"{len(expected - actual)} fehlen (z.B. {sorted(expected - actual)[:3]}), {len(actual - expected)} zu viel (z.B. {sorted(actual - expected)[:3]})"
+    elif not detail:
+        detail = f"erwartet {expected!r}, erhalten {actual!r}"
+    raise AssertionError(f"UNTERSCHIED {description}: {detail}")
+
+
+def synthetic_results_page(listing_count=60, seed=1):
+    """
+    Erzeugt eine Ergebnisseite im Layout der Plattform (LISTING_SELECTOR, Inserate-Links unter /de/vi/) mit den
+    Sonderfällen der Extraktion: ohne Preis, ohne Beschreibung, ohne <h2> (Titel aus dem Link bzw. Alt-Text),
+    nur mit Link auf eine andere Plattform. Die Inserate stehen zusätzlich als eingebettetes JSON unter
+    CHECK_LISTINGS_PATH, wie es EmbeddedJsonExtractor erwartet. Gibt den HTML-Text zurück.
+    """
+    rng = random.Random(seed)
+    words = ["Nike", "Air", "Max", "Jacke", "MacBook", "Pro", "Gr.", "42 2/3", "Size M", "neu", "top", "Grösse 42"]
+    prices = ["CHF 120.–", "250.00", "1'100.-", "Gratis", "Auf Anfrage", None]
+    listing_class = monitor.LISTING_SELECTOR.split('.', 1)[1]
+    nodes, items = [], []
+    for index in range(listing_count):
+        href = f"/de/vi/zuerich/artikel-{index}/{10_000_000 + rng.randrange(10**7)}"
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 5)))
+        price = rng.choice(prices)
+        description = " ".join(rng.choice(words) for _ in range(rng.randint(0, 8)))
+        variant = index % 7
+        if variant == 5: # Nur ein Link auf eine andere Plattform: wird übersprungen
+            nodes.append(f'<div class="{listing_class}"><a href="https://www.ricardo.ch/de/a/{index}">{title}</a></div>')
+            items.append({"url": f"https://www.ricardo.ch/de/a/{index}", "title": title})
+            continue
+        parts = [f'<div class="{listing_class}">']
+        if variant == 6: # Ohne <h2>: Titel aus dem Alt-Text des Bildes im Link
+            parts.append(f'<a href="{href}"><img alt="{title}"></a>')
+        elif variant == 4: # Ohne <h2>: Titel aus dem Linktext
+            parts.append(f'<a href="{href}">{title}</a>')
+        else:
+            parts.append(f'<a href="{href}"><img alt="Bild"></a><h2>{title}</h2>')
+        if price is not None:
+            parts.append(f'<div class="mui-style-1fhgjcy"><span class="mui-style-1nqm73u">{price}</span></div>')
+        if description:
+            parts.append(f'<div class="mui-style-xe4gv6"><span class="mui-style-1nqm73u">{description}</span></div>')
+        parts.append('</div>')
+        nodes.append("".join(parts))
+        item = {"url": href, "title": title, "description": description}
+        if price is not None:
+            item["price"] = price
+        items.append(item)
+
+    state = {}
+    target = state
+    for key in CHECK_LISTINGS_PATH[:-1]:
+        target = target.setdefault(key, {})
+    target[CHECK_LISTINGS_PATH[-1]] = items
+    target["recommended"] = [{"url": "/de/vi/empfohlen/99999999", "title": "Empfohlen"}] # Gehört nicht zur Suche
+    return ("<html><head><style>.x{}</style></head><body><main><section>" + "\n".join(nodes) + "</section>"
+            f'<aside><a href="/de/vi/empfohlen/99999999">Empfohlen</a></aside></main>'
+            f'<script id="{monitor.EMBEDDED_JSON_SCRIPT_ID}" type="application/json">{json.dumps(state)}</script></body></html>')
+
+
+def check_extractors(named_pages, json_listings_path=None):
+    """
+    Prüft auf den Seiten [(Name, HTML-Text), ...], dass lxml (falls installiert) und der JSON-Schnellweg
+    (mit json_listings_path) dieselben Listings liefern wie BeautifulSoup. Gibt die Anzahl geprüfter Seiten zurück.
+    """
+    reference_extractor = monitor.get_extractor("bs4")
+    extractors = [monitor.get_extractor("lxml")] if monitor.etree is not None else []
+    if json_listings_path:
+        extractors.append(monitor.EmbeddedJsonExtractor(reference_extractor, json_listings_path))
+    for name, html_text in named_pages:
+        reference = reference_extractor.extract(html_text)
+        for extractor in extractors:
+            assert_identical(reference, extractor.extract(html_text), f"in '{name}' zwischen bs4 und {extractor.name}")
+    return len(named_pages)
+
+
+def check_streaming(named_pages, chunk_sizes=None):
+    """
+    Prüft auf den Seiten [(Name, HTML-Text), ...], dass der Streaming-Parser (in Stücken von chunk_sizes Bytes)
+    dieselben Elemente und Listings liefert wie das Parsen der ganzen Seite. Gibt False zurück, wenn lxml fehlt.
+    """
+    if monitor.etree is None:
+        return False
+    extractor = monitor.get_extractor("lxml")
+    for name, html_text in named_pages:
+        html_bytes = html_text.encode('utf-8')
+        full_page = extractor.extract(html_text)
+        for chunk_size in chunk_sizes or (monitor.STREAM_CHUNK_SIZE, 256):
+            parser = monitor.StreamingListingParser(extractor)
+            for i in range(0, len(html_bytes), chunk_size):
+                parser.feed(html_bytes[i:i + chunk_size])
+            streamed_page = parser.close()
+            assert_identical((full_page.node_count, full_page.listings), (streamed_page.node_count, streamed_page.listings),
+                             f"in '{name}' zwischen ganzer Seite und Streaming ({chunk_size} Bytes pro Stück)")
+    return True
+
+
+def synthetic_filter_texts(listing_count, seed=42):
+    """Zufällige (Titel, Beschreibung)-Paare aus Wörtern, die die Grössenfilter an ihren Grenzen treffen."""
+    rng = random.Random(seed)
+    words = ["nike", "air", "max", "gr.", "grösse", "eu", "size", "us", "42", "42.5", "43", "42 2/3", "42. 2/3",
+             "420", "4.2", "m", "s", "l", "xl", "taille", "m1", "m2", "m3", "m10", "pro", "2020", "neu", "top"]
+    return [
+        (" ".join(rng.choice(words) for _ in range(rng.randint(2, 8))),
+         " ".join(rng.choice(words) for _ in range(rng.randint(0, 20))))
+        for _ in range(listing_count)
+    ]
+
+
+LEGACY_SIZE_CHECKS = {"shoes": monitor.check_shoe_size, "clothing": monitor.check_clothing_size, "macbook": monitor.check_macbook_specs}
+
+
+def check_size_filters(texts):
+    """Prüft für jeden Typ in LEGACY_SIZE_CHECKS, dass SizeFilter.matches wie die bisherige check_*-Funktion entscheidet."""
+    for item_type, legacy_function in LEGACY_SIZE_CHECKS.items():
+        target_sizes = monitor.SIZE_FILTERS_BY_TYPE.get(item_type, [])
+        size_filter = monitor.SizeFilter(item_type, target_sizes)
+        legacy_results = [legacy_function(title, description, target_sizes) for title, description in texts]
+        engine_results = [size_filter.matches(title, description) for title, description in texts]
+        assert_identical(legacy_results, engine_results, f"zwischen {legacy_function.__name__} und SizeFilter('{item_type}')")
+
+
+def synthetic_batch(listing_count, seed=42):
+    """
+    Zufällige Inserate, mehrere Profile verschiedener Typen und ein Speicher, der rund 30% der Inserate schon
+    kennt. Gibt (listings, profiles, seen_items) zurück.
+    """
+    rng = random.Random(seed)
+    words = ["nike", "air", "max", "gr.", "grösse", "eu", "size", "us", "42", "42.5", "43", "42 2/3", "m", "l", "xl",
+             "taille", "m1", "m2", "pro", "16gb", "512gb", "2020", "neu", "top", "jacke", "macbook"]
+    price_texts = ["gratis", "auf anfrage", "vb", "", "chf 1'250.–", "1.250,00"] + [f"{price}.–" for price in (5, 20, 45, 80, 120, 150, 300, 900, 1400)]
+    listings = [
+        monitor.Listing(f"/de/vi/item/{10_000_000 + index}", " ".join(rng.choice(words) for _ in range(rng.randint(2, 8))),
+                        rng.choice(price_texts), " ".join(rng.choice(words) for _ in range(rng.randint(0, 20))))
+        for index in range(listing_count)
+    ]
+    profiles = [monitor.SearchProfile.from_config(item_config, index) for index, item_config in enumerate([
+        {"name": "Schuhe", "type": "shoes", "max_price": 150, "search_terms": ["nike"]},
+        {"name": "Jacken", "type": "clothing", "max_price": 80, "search_terms": ["jacke"]},
+        {"name": "MacBook", "type": "macbook", "max_price": 1400, "search_terms": ["macbook"]},
+        {"name": "Alles", "type": "global", "max_price": 300, "search_terms": ["top"]},
+        {"name": "Gratis", "type": "global", "max_price": 0, "search_terms": ["gratis"]},
+    ])]
+    seen_items = monitor.SeenUrlIndex(monitor.listing_id_from_url(listing.url) for listing in listings if rng.random() < 0.3)
+    return listings, profiles, seen_items
+
+
+def per_listing_matches(listings, profiles, seen_items):
+    """Bisheriger Weg: pro Profil und Inserat 'gesehen?' und evaluate_listing. Gibt [(Inserat, Profil), ...] zurück."""
+    return [(listing, profile) for profile in profiles for listing in listings
+            if listing.url not in seen_items and monitor.evaluate_listing(listing, profile)[0]]
+
+
+def batch_matches(listings, profiles, seen_items):
+    """Batch-Weg über ListingBatch. Gibt [(Inserat, Profil), ...] zurück."""
+    return list(monitor.ListingBatch(listings, seen_items).matches(profiles))
+
+
+def check_batch_filter(listings, profiles, seen_items):
+    """
+    Prüft, dass ListingBatch (mit Listen und, falls installiert, mit NumPy) dieselben (Inserat, Profil)-Treffer
+    liefert wie die Filterung pro Inserat. Gibt die Anzahl Treffer zurück.
+    """
+    def match_keys(matches):
+        return {(listing.url, profile.name) for listing, profile in matches}
+
+    reference = match_keys(per_listing_matches(listings, profiles, seen_items))
+    numpy_module = monitor.np
+    try:
+        for label, numpy_variant in (("Listen", None), ("NumPy", numpy_module)):
+            if label == "NumPy" and numpy_module is None:
+                continue
+            monitor.np = numpy_variant
+            assert_identical(reference, match_keys(batch_matches(listings, profiles, seen_items)),
+                             f"zwischen Filterung pro Inserat und ListingBatch ({label})")
+    finally:
+        monitor.np = numpy_module
+    return len(reference)
+
+
+def run_checks(html_files=(), listing_count=5000):
+    """
+    Führt alle Gleichheitsprüfungen aus: Extraktoren und Streaming auf einer synthetischen Seite und den
+    gespeicherten Ergebnisseiten html_files, Grössenfilter und Batch-Filterung auf listing_count synthetischen
+    Inseraten. Bricht beim ersten Unterschied mit AssertionError ab.
+    """
+    logging.getLogger().setLevel(logging.ERROR) # Parser- und Filter-Logs würden die Ausgabe überdecken
+    named_pages = [("synthetisch", synthetic_results_page())]
+    check_extractors(named_pages, CHECK_LISTINGS_PATH)
+    for filename in html_files:
+        with open(filename, 'r', encoding='utf-8') as f:
+            named_pages.append((filename, f.read()))
+    json_listings_path = monitor.EMBEDDED_JSON_LISTINGS_PATH if monitor.EMBEDDED_JSON_EXTRACTION else None
+    check_extractors(named_pages[1:], json_listings_path)
+    backends = "bs4, lxml" if monitor.etree is not None else "bs4 (lxml nicht installiert)"
+    print(f"Extraktoren ({backends}, JSON): identische Listings auf {len(named_pages)} Seite(n)")
+    if check_streaming(named_pages):
+        print(f"Streaming: identische Listings auf {len(named_pages)} Seite(n)")
+    else:
+        print("Streaming: übersprungen (benötigt das Paket 'lxml')")
+    check_size_filters(synthetic_filter_texts(listing_count))
+    print(f"Grössenfilter ({', '.join(LEGACY_SIZE_CHECKS)}): identisch auf {listing_count} Inseraten")
+    match_count = check_batch_filter(*synthetic_batch(listing_count))
+    print(f"Batch-Filterung ({'Listen, NumPy' if monitor.np is not None else 'Listen'}): {match_count} identische Treffer auf {listing_count} Inseraten")
+
+
+# ==============================================================================
+# 2. BENCHMARKS
+# ==============================================================================
+
+def _peak_rss_kb():
+    """Bisheriger Spitzenwert des Arbeitsspeichers (RSS) dieses Prozesses in KB, oder None wenn nicht messbar."""
+    try:
+        import resource
+    except ImportError: # z.B. Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _benchmark_extractor_worker(backend, html_pages, repeat, result_queue):
+    """Misst ein Extraktor-Backend in einem eigenen Prozess, damit sich die Speicherwerte der Backends nicht vermischen."""
+    import tracemalloc
+    logging.getLogger().setLevel(logging.ERROR) # Keine Parser-Logs während der Messung
+    extractor = monitor.get_page_extractor() if backend == "json" else monitor.get_extractor(backend)
+    rss_before = _peak_rss_kb()
+
+    start = perf_counter()
+    for _ in range(repeat):
+        for html_text in html_pages:
+            extractor.extract(html_text)
+    elapsed = perf_counter() - start
+    rss_after = _peak_rss_kb()
+
+    # Separater Durchgang für den Python-Heap-Spitzenwert (tracemalloc verlangsamt die Zeitmessung)
+    tracemalloc.start()
+    for html_text in html_pages:
+        extractor.extract(html_text)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result_queue.put({
+        "backend": extractor.name,
+        "ms_per_page": elapsed * 1000 / (repeat * len(html_pages)),
+        "python_peak_kb": python_peak / 1024,
+        "rss_growth_kb": (rss_after - rss_before) if rss_before is not None else None,
+    })
+
+
+def benchmark_extractors(html_files, repeat=20):
+    """
+    Vergleicht die Extraktor-Backends auf gespeicherten HTML-Seiten:
+    prüft, dass alle identische Listings liefern (siehe check_extractors), und misst Parse-Zeit pro Seite und
+    Speicher-Spitzenwert.
+    """
+    html_pages = []
+    for filename in html_files:
+        with open(filename, 'r', encoding='utf-8') as f:
+            html_pages.append(f.read())
+    backends = ["bs4", "lxml"] if monitor.etree is not None else ["bs4"]
+    json_listings_path = monitor.EMBEDDED_JSON_LISTINGS_PATH if monitor.EMBEDDED_JSON_EXTRACTION else None
+    if json_listings_path:
+        backends.append("json") # Eingebettetes JSON (mit DOM-Fallback über EXTRACTOR_BACKEND)
+
+    # 1. Gleichheit der Ergebnisse prüfen (bricht beim ersten Unterschied ab)
+    logging.getLogger().setLevel(logging.ERROR)
+    check_extractors(list(zip(html_files, html_pages)), json_listings_path)
+    print(f"Identische Listings auf {len(html_pages)} Seite(n): {', '.join(backends)}")
+
+    # 2. Zeit und Speicher je Backend in einem eigenen Prozess messen
+    context = multiprocessing.get_context("spawn")
+    print(f"{'Backend':<8} {'ms/Seite':>10} {'Seiten/s':>10} {'Python-Peak KB':>16} {'RSS-Zuwachs KB':>16}")
+    for backend in backends:
+        result_queue = context.Queue()
+        process = context.Process(target=_benchmark_extractor_worker, args=(backend, html_pages, repeat, result_queue))
+        process.start()
+        result = result_queue.get()
+        process.join()
+        rss = f"{result['rss_growth_kb']:.0f}" if result['rss_growth_kb'] is not None else "n/a"
+        print(f"{result['backend']:<8} {result['ms_per_page']:>10.2f} {1000 / result['ms_per_page']:>10.1f} {result['python_peak_kb']:>16.0f} {rss:>16}")
+
+
+def benchmark_streaming(html_files, repeat=20):
+    """
+    Vergleicht auf gespeicherten Ergebnisseiten das Parsen der ganzen Seite (LxmlExtractor) mit dem Streaming-Parser
+    (Stücke von STREAM_CHUNK_SIZE Bytes): Zeit bis zum ersten Inserat, Gesamtzeit, Elemente, die am Ende noch im
+    Baum liegen (Speicher pro Seite), und den Anteil der gelesenen Bytes, wenn alle Inserate schon bekannt sind.
+    Bricht mit AssertionError ab, wenn beide Wege nicht identische Listings liefern. Gibt False zurück, wenn lxml fehlt.
+    """
+    if monitor.etree is None:
+        print("Der Streaming-Parser benötigt das Paket 'lxml' (pip install lxml).")
+        return False
+    logging.getLogger().setLevel(logging.ERROR)
+    extractor = monitor.get_extractor("lxml")
+    print(f"{'Datei':<28} {'ganz ms':>8} {'1. Inserat ms':>14} {'Stream ms':>10} {'Elemente ganz':>14} {'Stream':>7} {'gelesen (bekannt)':>18}")
+    for filename in html_files:
+        with open(filename, 'rb') as f:
+            html_bytes = f.read()
+        html_text = html_bytes.decode('utf-8')
+        chunks = [html_bytes[i:i + monitor.STREAM_CHUNK_SIZE] for i in range(0, len(html_bytes), monitor.STREAM_CHUNK_SIZE)]
+
+        started = perf_counter()
+        for _ in range(repeat):
+            full_page = extractor.extract(html_text)
+        full_ms = (perf_counter() - started) * 1000 / repeat
+        full_elements = sum(1 for _ in extractor.parse(html_text).iter())
+
+        first_listing_seconds = total_seconds = 0.0
+        for _ in range(repeat):
+            started = perf_counter()
+            parser = monitor.StreamingListingParser(extractor)
+            first_listing_at = None
+            for chunk in chunks:
+                if parser.feed(chunk) and first_listing_at is None:
+                    first_listing_at = perf_counter()
+                if parser.finished:
+                    break
+            streamed_page = parser.close()
+            total_seconds += perf_counter() - started
+            first_listing_seconds += (first_listing_at or perf_counter()) - started
+        streamed_elements = sum(1 for _ in parser.root.iter())
+        assert_identical(full_page.listings, streamed_page.listings, f"in '{filename}' zwischen ganzer Seite und Streaming")
+
+        # Alle Inserate bekannt: Lesen endet nach STREAM_STOP_AFTER_KNOWN Inseraten
+        parser = monitor.StreamingListingParser(extractor)
+        bytes_read = listing_count = 0
+        for chunk in chunks:
+            bytes_read += len(chunk)
+            listing_count += len(parser.feed(chunk))
+            if parser.finished or listing_count >= monitor.STREAM_STOP_AFTER_KNOWN:
+                break
+        print(f"{os.path.basename(filename)[:28]:<28} {full_ms:>8.2f} {first_listing_seconds * 1000 / repeat:>14.2f} "
+              f"{total_seconds * 1000 / repeat:>10.2f} {full_elements:>14} {streamed_elements:>7} {bytes_read / len(html_bytes):>17.0%}")
+    print("Identische Listings: ja")
+    return True
+
+
+def benchmark_filters(listing_count=20000, repeat=3):
+    """
+    Micro-Benchmark der Grössenfilter: prüft auf synthetischen Inseraten, dass die vorkompilierte Engine wie die
+    bisherigen check_*-Funktionen entscheidet (siehe check_size_filters), und gibt den Durchsatz (Inserate/s) aus.
+    """
+    logging.getLogger().setLevel(logging.ERROR) # Filter-Logs würden die Messung dominieren
+    texts = synthetic_filter_texts(listing_count)
+    check_size_filters(texts)
+
+    print(f"{'Typ':<10} {'alt Inserate/s':>16} {'Engine Inserate/s':>18} {'Faktor':>8}")
+    for item_type, legacy_function in LEGACY_SIZE_CHECKS.items():
+        target_sizes = monitor.SIZE_FILTERS_BY_TYPE.get(item_type, [])
+        size_filter = monitor.SizeFilter(item_type, target_sizes)
+
+        start = perf_counter()
+        for _ in range(repeat):
+            for title, description in texts:
+                legacy_function(title, description, target_sizes)
+        legacy_rate = repeat * listing_count / (perf_counter() - start)
+
+        start = perf_counter()
+        for _ in range(repeat):
+            for title, description in texts:
+                size_filter.matches(title, description)
+        engine_rate = repeat * listing_count / (perf_counter() - start)
+
+        print(f"{item_type:<10} {legacy_rate:>16.0f} {engine_rate:>18.0f} {engine_rate / legacy_rate:>7.1f}x")
+    print(f"Identische Ergebnisse auf {listing_count} Inseraten: ja")
+
+
+def benchmark_batch_filter(listing_count=20000, repeat=3):
+    """
+    Vergleicht die Filterung pro Inserat (gesehen? -> evaluate_listing, für jedes Profil) mit der Batch-Filterung
+    (ListingBatch) auf listing_count synthetischen Inseraten und mehreren Profilen verschiedener Typen.
+    Prüft vorher, dass alle Varianten dieselben (Inserat, Profil)-Treffer liefern (siehe check_batch_filter).
+    """
+    logging.getLogger().setLevel(logging.ERROR) # Filter-Logs würden die Messung dominieren
+    listings, profiles, seen_items = synthetic_batch(listing_count)
+    match_count = check_batch_filter(listings, profiles, seen_items)
+
+    variants = [("pro Inserat", per_listing_matches, None), ("Batch (Listen)", batch_matches, None)]
+    numpy_module = monitor.np
+    if numpy_module is not None:
+        variants.append(("Batch (NumPy)", batch_matches, numpy_module))
+    print(f"{listing_count} Inserate, {len(profiles)} Profile, {len(seen_items)} bereits gesehen, {match_count} Treffer (identisch)")
+    print(f"{'Variante':<16} {'ms/Durchlauf':>13} {'Inserate/s':>12}")
+    try:
+        for label, function, numpy_variant in variants:
+            monitor.np = numpy_variant
+            start = perf_counter()
+            for _ in range(repeat):
+                function(listings, profiles, seen_items)
+            seconds = (perf_counter() - start) / repeat
+            print(f"{label:<16} {seconds * 1000:>13.1f} {listing_count / seconds:>12.0f}")
+    finally:
+        monitor.np = numpy_module
+
+
+def benchmark_price_history(row_count=1_000_000, profile_count=20, days=90, query_repeat=20):
+    """
+    Füllt einen temporären Preisverlauf mit row_count zufälligen Beobachtungen (profile_count Profile über 'days' Tage)
+    und vergleicht den Median der letzten PRICE_HISTORY_WINDOW_DAYS Tage aus den Tages-Histogrammen mit dem exakten
+    Median direkt aus allen Beobachtungen (SQL-Sortierung): Abfragezeit und Abweichung.
+    """
+    import tempfile
+
+    rng = random.Random(1)
+    now = time()
+    profile_names = [f"Profil {index + 1}" for index in range(profile_count)]
+    typical_prices = {name: rng.choice((40, 150, 300, 800, 1500)) for name in profile_names}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = monitor.PriceHistoryStore(os.path.join(temp_dir, "price_history.sqlite3"))
+        started = perf_counter()
+        for row in range(row_count):
+            name = profile_names[row % profile_count]
+            price = max(1, round(typical_prices[name] * rng.lognormvariate(0, 0.4)))
+            store.record("suchbegriff", name, "global", row, price, ts=now - rng.random() * days * 86400)
+            if row % 50_000 == 0:
+                store.flush()
+        store.flush()
+        insert_seconds = perf_counter() - started
+        print(f"{row_count} Beobachtungen gespeichert: {insert_seconds:.1f}s ({row_count / insert_seconds:.0f} pro Sekunde), "
+              f"Datei {os.path.getsize(store.db_filename) / 1024 / 1024:.1f} MB")
+
+        connection = store._connection
+        since = now - monitor.PRICE_HISTORY_WINDOW_DAYS * 86400
+        print(f"{'Profil':<12} {'Anzahl':>8} {'Median':>8} {'exakt':>8} {'Abw. %':>7} {'Histogramm ms':>14} {'exakt ms':>9}")
+        worst_deviation = 0.0
+        for name in profile_names[:5]:
+            started = perf_counter()
+            for _ in range(query_repeat):
+                (median,), total = store.quantiles(name, (0.5,), now=now)
+            histogram_ms = (perf_counter() - started) * 1000 / query_repeat
+            started = perf_counter()
+            count = connection.execute("SELECT COUNT(*) FROM price_observations WHERE profile = ? AND ts >= ?", (name, since)).fetchone()[0]
+            exact = connection.execute("SELECT price FROM price_observations WHERE profile = ? AND ts >= ? ORDER BY price LIMIT 1 OFFSET ?",
+                                       (name, since, (count - 1) // 2)).fetchone()[0]
+            exact_ms = (perf_counter() - started) * 1000
+            deviation = abs(median - exact) / exact * 100
+            worst_deviation = max(worst_deviation, deviation)
+            print(f"{name:<12} {total:>8} {median:>8} {exact:>8} {deviation:>7.2f} {histogram_ms:>14.2f} {exact_ms:>9.1f}")
+        store.close()
+    return worst_deviation <= monitor.PRICE_HISTORY_RESOLUTION * 100
+
+
+def _benchmark_seen_worker(variant, entry_count, lookup_count, result_queue):
+    """Baut eine Variante des Gesehen-Speichers in einem eigenen Prozess auf und misst Speicher und Lookup-Zeit."""
+    import tracemalloc
+    url_template = monitor.BASE_URL + "/de/vi/zuerich/schuhe/nike-air-max-90-gr-42/{}"
+    tracemalloc.start()
+    if variant == "set[str]":
+        seen = {url_template.format(10_000_000 + i) for i in range(entry_count)}
+    else:
+        seen = monitor.SeenUrlIndex((10_000_000 + i for i in range(entry_count)), use_bloom_filter=(variant == "ID-Index + Bloom"))
+        seen.ids._merge()
+    memory_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rng = random.Random(1)
+    # Je zur Hälfte bekannte und unbekannte Inserate, wie auf einer typischen Ergebnisseite
+    lookups = [url_template.format(10_000_000 + rng.randrange(2 * entry_count)) for _ in range(lookup_count)]
+    start = perf_counter()
+    for url in lookups:
+        url in seen
+    elapsed = perf_counter() - start
+    result_queue.put({"variant": variant, "bytes_per_entry": memory_bytes / entry_count, "mb": memory_bytes / 1024 / 1024,
+                      "lookups_per_second": lookup_count / elapsed})
+
+
+def benchmark_seen_memory(entry_counts=(1_000_000, 10_000_000), lookup_count=200_000):
+    """Vergleicht den Speicherbedarf des bisherigen URL-Sets mit dem kompakten ID-Index (mit/ohne Bloom-Filter)."""
+    context = multiprocessing.get_context("spawn")
+    print(f"{'Einträge':>10}  {'Variante':<18} {'MB':>10} {'Bytes/Eintrag':>14} {'Lookups/s':>12}")
+    for entry_count in entry_counts:
+        for variant in ("set[str]", "ID-Index", "ID-Index + Bloom"):
+            result_queue = context.Queue()
+            process = context.Process(target=_benchmark_seen_worker, args=(variant, entry_count, lookup_count, result_queue))
+            process.start()
+            result = result_queue.get()
+            process.join()
+            print(f"{entry_count:>10}  {result['variant']:<18} {result['mb']:>10.1f} {result['bytes_per_entry']:>14.1f} {result['lookups_per_second']:>12.0f}")
+
+
+def benchmark_parse_workers(html_files, worker_counts=None, repeat=20):
+    """
+    Spielt gespeicherte Ergebnisseiten durch den Parser-Pool (wie im Async-Modus) und misst den Durchsatz
+    pro Anzahl Worker-Prozesse, damit sichtbar wird, wie das Parsen mit den Kernen skaliert.
+    """
+    html_pages = []
+    for filename in html_files:
+        with open(filename, 'r', encoding='utf-8') as f:
+            html_pages.append(f.read())
+    jobs = html_pages * repeat
+    backend = monitor.get_extractor().name
+    cpu_count = os.cpu_count() or 1
+    if worker_counts is None:
+        worker_counts = sorted({1, 2, 4, cpu_count} & set(range(1, cpu_count + 1)))
+
+    print(f"{len(jobs)} Seiten, Backend '{backend}', {cpu_count} CPU-Kern(e)")
+    print(f"{'Worker':>8} {'Seiten/s':>10} {'Faktor':>8}")
+    start = perf_counter()
+    for html_text in jobs:
+        monitor.parse_page_in_worker(html_text, backend)
+    baseline = len(jobs) / (perf_counter() - start)
+    print(f"{'(inline)':>8} {baseline:>10.1f} {1.0:>8.2f}")
+
+    context = multiprocessing.get_context("spawn")
+    for worker_count in worker_counts:
+        with ProcessPoolExecutor(max_workers=worker_count, mp_context=context) as pool:
+            list(pool.map(monitor.parse_page_in_worker, html_pages[:1] * worker_count, [backend] * worker_count)) # Worker aufwärmen
+            start = perf_counter()
+            list(pool.map(monitor.parse_page_in_worker, jobs, [backend] * len(jobs), chunksize=4))
+            throughput = len(jobs) / (perf_counter() - start)
+        print(f"{worker_count:>8} {throughput:>10.1f} {throughput / baseline:>8.2f}")
+
+
+def _run_replay_server(record_dir, port_queue, latency_ms, jitter_ms, error_rate, seed, outage=None, request_times=None, host="127.0.0.1"):
+    """
+    Lokaler Ersatz der Plattform für das Replay: liefert aufgezeichnete Suchseiten anhand ihres URL-Pfads aus.
+    Verzögert jede Antwort um latency_ms ± jitter_ms und beantwortet einen Anteil error_rate mit 503.
+    'outage' = (Sekunden, Status, Retry-After oder None): ab der ersten Anfrage wird so lange jede Anfrage mit
+    diesem Status beantwortet (simulierter Ausfall bzw. Drosselung). Ohne ETag/Last-Modified, damit jeder
+    Durchlauf die gleiche Arbeit macht. In die Queue 'request_times' kommt der Zeitpunkt (time()) jeder Anfrage.
+    'host' ist die lokale Adresse des Servers (für mehrere Plattformen z.B. 127.0.0.2, siehe benchmark_platforms).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    index = monitor.load_json_file(os.path.join(record_dir, monitor.RECORD_INDEX_FILE), {})
+    pages = {}
+    for request_path, filename in index.items():
+        with open(os.path.join(record_dir, filename), 'rb') as f:
+            pages[request_path] = f.read()
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    outage_started = []
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # Keep-Alive wie bei der echten Seite
+
+        def do_GET(self):
+            if request_times is not None:
+                request_times.put(time())
+            with rng_lock:
+                delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+                fail = rng.random() < error_rate
+                if outage is not None and not outage_started:
+                    outage_started.append(monotonic())
+            sleep(delay)
+            if outage is not None and monotonic() - outage_started[0] < outage[0]:
+                self.send_response(outage[1])
+                if outage[2] is not None:
+                    self.send_header('Retry-After', str(outage[2]))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = pages.get(self.path)
+            if fail or body is None:
+                self.send_response(503 if fail else 404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, 0), ReplayHandler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))] if sorted_values else None
+
+
+def benchmark_replay(record_dir, cycles=5, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=1, json_output=None):
+    """
+    Führt die Suchdurchläufe von main() (run_cycle mit CONFIG_FILE und FETCH_MODE) gegen die aufgezeichneten Seiten
+    eines lokalen Replay-Servers aus. Misst Durchläufe pro Sekunde, p50/p95-Latenz pro Suchbegriff, Parse- und
+    Filterzeit sowie den RSS-Spitzenwert, und schreibt das Ergebnis optional als JSON (für Vergleiche zwischen Versionen).
+    Pausen und Ratenlimits sind abgeschaltet, jeder Durchlauf startet mit leerem Speicher gesehener Inserate.
+    """
+    import contextlib
+    import io
+    import tempfile
+
+    profiles = monitor.load_profiles(monitor.CONFIG_FILE)
+    if not profiles:
+        print(f"Konfiguration '{monitor.CONFIG_FILE}' fehlt, ist leer oder enthält kein gültiges Profil.")
+        return None
+    logging.getLogger().setLevel(logging.ERROR) # Nur Fehler während der Messung
+
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    server = context.Process(target=_run_replay_server, args=(record_dir, port_queue, latency_ms, jitter_ms, error_rate, seed), daemon=True)
+    server.start()
+    monitor.BASE_URL = f"http://127.0.0.1:{port_queue.get()}"
+    monitor.TELEGRAM_ENABLED = False
+    monitor.INTER_REQUEST_DELAY = monitor.INTER_ITEM_DELAY = monitor.ERROR_DELAY = 0
+    monitor.HOST_RATE_LIMIT, monitor.HOST_BURST = 1e6, 1e6
+    monitor.HTTP_CONDITIONAL_REQUESTS = False
+    monitor.PARSE_WORKERS = 0 # Parsezeit im Hauptprozess messen
+    monitor.STREAMING_PARSE = False # Ganze Seiten, damit jeder Durchlauf die gleiche Arbeit macht (siehe --benchmark-streaming)
+    monitor.CIRCUIT_BREAKER = False # Zufällige Fehler (--replay-error-rate) sollen keine Anfragen zurückstellen (siehe --replay-outage)
+
+    # Messpunkte: die Stufen werden für die Dauer des Benchmarks durch zeitmessende Hüllen ersetzt
+    term_latencies = {}
+    stage_seconds = {"parse": 0.0, "filter": 0.0}
+    counters = {"pages": 0, "fetch_errors": 0}
+    original_fetch, original_fetch_async = monitor.fetch_search_page, monitor.fetch_search_page_async
+    original_extract, original_process = monitor.extract_search_page, monitor.process_listings
+
+    def record_fetch(search_term, started, html_text):
+        term_latencies.setdefault(search_term, []).append((perf_counter() - started) * 1000)
+        if html_text is None:
+            counters["fetch_errors"] += 1
+
+    def timed_fetch(search_term, *args, **kwargs):
+        started = perf_counter()
+        html_text = original_fetch(search_term, *args, **kwargs)
+        record_fetch(search_term, started, html_text)
+        return html_text
+
+    async def timed_fetch_async(search_term, *args, **kwargs):
+        started = perf_counter()
+        html_text = await original_fetch_async(search_term, *args, **kwargs)
+        record_fetch(search_term, started, html_text)
+        return html_text
+
+    def timed_extract(html_text, *args, **kwargs):
+        started = perf_counter()
+        page = original_extract(html_text, *args, **kwargs)
+        stage_seconds["parse"] += perf_counter() - started
+        counters["pages"] += 1
+        return page
+
+    def timed_process(*args, **kwargs):
+        started = perf_counter()
+        result = original_process(*args, **kwargs)
+        stage_seconds["filter"] += perf_counter() - started
+        return result
+
+    monitor.fetch_search_page, monitor.fetch_search_page_async = timed_fetch, timed_fetch_async
+    monitor.extract_search_page, monitor.process_listings = timed_extract, timed_process
+    cycle_seconds = []
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            monitor.SEEN_ITEMS_FILE = os.path.join(temp_dir, "seen_items.json")
+            monitor.SEEN_ITEMS_SNAPSHOT_FILE = os.path.join(temp_dir, "seen_items.bin")
+            for _ in range(cycles):
+                seen_items = monitor.SeenUrlIndex()
+                started = perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()): # Treffer-Ausgaben unterdrücken
+                    monitor.run_cycle(profiles, seen_items)
+                cycle_seconds.append(perf_counter() - started)
+    finally:
+        monitor.fetch_search_page, monitor.fetch_search_page_async = original_fetch, original_fetch_async
+        monitor.extract_search_page, monitor.process_listings = original_extract, original_process
+        monitor.close_event_loop()
+        monitor.HTTP_CLIENT.close()
+        server.terminate()
+
+    peak_rss_kb = _peak_rss_kb()
+    sorted_cycles = sorted(cycle_seconds)
+    report = {
+        "settings": {"cycles": cycles, "fetch_mode": monitor.FETCH_MODE, "extractor": monitor.get_extractor().name,
+                     "latency_ms": latency_ms, "jitter_ms": jitter_ms, "error_rate": error_rate, "seed": seed},
+        "cycles_per_second": round(cycles / sum(cycle_seconds), 3),
+        "cycle_seconds": {"p50": round(_percentile(sorted_cycles, 0.5), 4), "p95": round(_percentile(sorted_cycles, 0.95), 4)},
+        "pages_parsed": counters["pages"],
+        "fetch_errors": counters["fetch_errors"],
+        "parse_ms": round(stage_seconds["parse"] * 1000, 2),
+        "parse_ms_per_page": round(stage_seconds["parse"] * 1000 / counters["pages"], 3) if counters["pages"] else None,
+        "filter_ms": round(stage_seconds["filter"] * 1000, 2),
+        "peak_rss_kb": peak_rss_kb,
+        "terms": {},
+    }
+    for search_term, latencies in sorted(term_latencies.items()):
+        latencies.sort()
+        report["terms"][search_term] = {"requests": len(latencies), "p50_ms": round(_percentile(latencies, 0.5), 2),
+                                        "p95_ms": round(_percentile(latencies, 0.95), 2)}
+
+    print(f"{cycles} Durchläufe: {report['cycles_per_second']} Durchläufe/s (p50 {report['cycle_seconds']['p50']}s, p95 {report['cycle_seconds']['p95']}s)")
+    print(f"Parsen: {report['parse_ms']} ms für {counters['pages']} Seiten, Filter: {report['filter_ms']} ms, "
+          f"Fehler: {counters['fetch_errors']}, RSS-Spitze: {peak_rss_kb} KB")
+    print(f"{'Suchbegriff':<30} {'Anfragen':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for search_term, term in report["terms"].items():
+        print(f"{search_term:<30} {term['requests']:>8} {term['p50_ms']:>8.1f} {term['p95_ms']:>8.1f}")
+    if json_output:
+        with open(json_output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+        print(f"Ergebnis in '{json_output}' gespeichert.")
+    return report
+
+
+def _benchmark_shard_worker(shard_index, shard_count, base_url, db_filename, cycles, result_queue):
+    """Eine Instanz für benchmark_shards: ruft ihren Anteil der Suchanfragen ab und meldet die Treffer-URLs zurück."""
+    import contextlib
+    import io
+
+    logging.getLogger().setLevel(logging.ERROR)
+    monitor.BASE_URL = base_url
+    monitor.TELEGRAM_ENABLED = False
+    monitor.SHARD_INDEX, monitor.SHARD_COUNT = shard_index, shard_count
+    monitor.INTER_REQUEST_DELAY = monitor.INTER_ITEM_DELAY = monitor.ERROR_DELAY = 0
+    monitor.HOST_RATE_LIMIT, monitor.HOST_BURST = 1e6, 1e6
+    monitor.CIRCUIT_BREAKER = False
+    notified_urls = []
+    monitor.send_telegram_notification = lambda item_title, item_url, *args: notified_urls.append(item_url) # Statt Telegram zählen
+
+    profiles = monitor.load_profiles(monitor.CONFIG_FILE)
+    queries = [planned_search.query for planned_search in monitor.select_shard(monitor.plan_cycle(profiles))]
+    seen_items = monitor.SqliteSeenStore(db_filename, None, shared=True)
+    started = perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()): # Treffer-Ausgaben unterdrücken
+            for _ in range(cycles):
+                monitor.run_cycle(profiles, seen_items)
+    finally:
+        seen_items.close()
+        monitor.close_event_loop()
+        monitor.HTTP_CLIENT.close()
+    result_queue.put((shard_index, queries, notified_urls, perf_counter() - started))
+
+
+def benchmark_shards(record_dir, shard_count, cycles=5, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=1):
+    """
+    Startet shard_count Instanzen gleichzeitig gegen den Replay-Server (siehe benchmark_replay), alle mit derselben
+    gemeinsamen SQLite-Datenbank, und danach alle noch einmal als "Neustart". Prüft, dass jede Suchanfrage genau
+    einer Instanz gehört und kein Inserat doppelt gemeldet wird (auch nicht nach dem Neustart), und misst die Laufzeit.
+    """
+    import tempfile
+
+    if not monitor.load_profiles(monitor.CONFIG_FILE):
+        print(f"Konfiguration '{monitor.CONFIG_FILE}' fehlt, ist leer oder enthält kein gültiges Profil.")
+        return None
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    server = context.Process(target=_run_replay_server, args=(record_dir, port_queue, latency_ms, jitter_ms, error_rate, seed), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get()}"
+
+    def run_instances(db_filename, instance_cycles):
+        result_queue = context.Queue()
+        workers = [context.Process(target=_benchmark_shard_worker, args=(index, shard_count, base_url, db_filename, instance_cycles, result_queue))
+                   for index in range(shard_count)]
+        started = perf_counter()
+        for worker in workers:
+            worker.start()
+        results = sorted(result_queue.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        return results, perf_counter() - started
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_filename = os.path.join(temp_dir, "seen_items.sqlite3")
+            first_run, first_seconds = run_instances(db_filename, cycles)
+            restart_run, restart_seconds = run_instances(db_filename, 1)
+    finally:
+        server.terminate()
+
+    all_queries = [query for _, queries, _, _ in first_run for query in queries]
+    notified = [url for _, _, urls, _ in first_run for url in urls]
+    notified_after_restart = sum(len(urls) for _, _, urls, _ in restart_run)
+    print(f"{shard_count} Instanz(en), {cycles} Durchläufe: {first_seconds:.2f}s gesamt (inkl. Prozessstart)")
+    print(f"{'Instanz':>8} {'Abrufe':>7} {'Treffer':>8} {'Sekunden':>9}")
+    for shard_index, queries, urls, seconds in first_run:
+        print(f"{shard_index + 1:>8} {len(queries):>7} {len(urls):>8} {seconds:>9.2f}")
+    print(f"Suchanfragen: {len(set(all_queries))} verschieden, {len(all_queries) - len(set(all_queries))} mehrfach zugeordnet")
+    print(f"Treffer: {len(notified)} gemeldet, {len(notified) - len(set(notified))} doppelt, "
+          f"{notified_after_restart} erneut nach Neustart ({restart_seconds:.2f}s)")
+    return len(all_queries) == len(set(all_queries)) and len(notified) == len(set(notified)) and notified_after_restart == 0
+
+
+def benchmark_circuit_breaker(record_dir, outage_seconds=10.0, outage_status=503, retry_after=None, latency_ms=0.0, seed=1):
+    """
+    Simuliert einen Ausfall der Plattform: der Replay-Server (siehe benchmark_replay) beantwortet ab der ersten Anfrage
+    outage_seconds lang jede Anfrage mit outage_status (optional mit Retry-After). Die Suchdurchläufe laufen dabei
+    ohne Pause hintereinander, einmal ohne und einmal mit Schutzschalter, jeweils für das Dreifache der Ausfalldauer.
+    Verglichen werden gesendete, fehlgeschlagene und zurückgestellte Anfragen, die Zeit in Durchläufen mit Fehlern
+    und wie lange nach dem Ende des Ausfalls der erste fehlerfreie Durchlauf kam.
+    """
+    import contextlib
+    import io
+
+    profiles = monitor.load_profiles(monitor.CONFIG_FILE)
+    if not profiles:
+        print(f"Konfiguration '{monitor.CONFIG_FILE}' fehlt, ist leer oder enthält kein gültiges Profil.")
+        return None
+    logging.getLogger().setLevel(logging.CRITICAL) # Die erwarteten Fehler nicht einzeln loggen
+
+    monitor.TELEGRAM_ENABLED = False
+    monitor.INTER_REQUEST_DELAY = monitor.INTER_ITEM_DELAY = monitor.ERROR_DELAY = 0
+    monitor.HOST_RATE_LIMIT, monitor.HOST_BURST = 1e6, 1e6
+    monitor.HTTP_CONDITIONAL_REQUESTS = False
+    monitor.PARSE_WORKERS = 0
+    monitor.BREAKER_BASE_DELAY = max(0.5, outage_seconds / 8) # Pausen im Massstab des simulierten Ausfalls
+    monitor.BREAKER_MAX_DELAY = max(1.0, outage_seconds / 2)
+    context = multiprocessing.get_context("spawn")
+    duration = outage_seconds * 3
+
+    print(f"Ausfall: {outage_seconds:.0f}s mit HTTP {outage_status}" + (f" (Retry-After {retry_after}s)" if retry_after is not None else "")
+          + f", Messdauer {duration:.0f}s, {monitor.FETCH_MODE}-Modus, Pause {monitor.BREAKER_BASE_DELAY:.1f}-{monitor.BREAKER_MAX_DELAY:.1f}s")
+    print(f"{'Schutzschalter':<15} {'Durchläufe':>10} {'Gesendet':>9} {'Fehler':>7} {'Zurückgest.':>11} {'s mit Fehlern':>13} {'erholt nach s':>13}")
+    results = {}
+    for enabled in (False, True):
+        monitor.CIRCUIT_BREAKER = enabled
+        monitor.HTTP_CLIENT.breakers.clear()
+        port_queue = context.Queue()
+        server = context.Process(target=_run_replay_server, args=(record_dir, port_queue, latency_ms, 0.0, 0.0, seed,
+                                                                  (outage_seconds, outage_status, retry_after)), daemon=True)
+        server.start()
+        monitor.BASE_URL = f"http://127.0.0.1:{port_queue.get()}"
+        stats_before = dict(monitor.HTTP_CLIENT.stats)
+        cycles, failing_seconds, recovered_after = 0, 0.0, None
+        started = perf_counter()
+        try:
+            while perf_counter() - started < duration:
+                cycle_stats = dict(monitor.HTTP_CLIENT.stats)
+                cycle_started = perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()): # Treffer-Ausgaben unterdrücken
+                    monitor.run_cycle(profiles, monitor.SeenUrlIndex())
+                cycles += 1
+                if monitor.HTTP_CLIENT.stats["failed"] > cycle_stats["failed"] or monitor.HTTP_CLIENT.stats["deferred"] > cycle_stats["deferred"]:
+                    failing_seconds += perf_counter() - cycle_started
+                elif recovered_after is None and cycle_started - started > outage_seconds:
+                    recovered_after = perf_counter() - started - outage_seconds
+                sleep(0.05)
+        finally:
+            monitor.close_event_loop()
+            server.terminate()
+        sent = sum(monitor.HTTP_CLIENT.stats[key] - stats_before[key] for key in ("requests", "failed"))
+        failed = monitor.HTTP_CLIENT.stats["failed"] - stats_before["failed"]
+        deferred = monitor.HTTP_CLIENT.stats["deferred"] - stats_before["deferred"]
+        results[enabled] = (sent, failed, deferred, recovered_after)
+        print(f"{'an' if enabled else 'aus':<15} {cycles:>10} {sent:>9} {failed:>7} {deferred:>11} {failing_seconds:>13.2f} "
+              f"{recovered_after if recovered_after is not None else float('nan'):>13.2f}")
+    monitor.HTTP_CLIENT.close()
+    return results[True][3] is not None and results[True][1] <= results[False][1]
+
+
+def benchmark_platforms(record_dir, platform_count=2, cycles=3, latency_ms=50.0, jitter_ms=0.0, seed=1):
+    """
+    Simuliert platform_count Marktplätze mit je einem Replay-Server (siehe benchmark_replay) auf eigener Loopback-Adresse
+    (127.0.0.1, 127.0.0.2, ... = eigener Host; unter Linux ohne Konfiguration erreichbar), alle mit denselben
+    aufgezeichneten Seiten. Vergleicht die Dauer eines Durchlaufs pro Plattform allein mit einem gemeinsamen Durchlauf
+    über alle Plattformen (ein Planer, ein Abruf-Pool mit Budget pro Host), zeigt Anfragen und höchste Parallelität pro
+    Host und zählt die Meldungen mit und ohne CROSS_POST_DEDUP (jedes Inserat ist auf allen Plattformen "angeboten").
+    """
+    import contextlib
+    import io
+
+    monitoring_config = [item for item in monitor.load_json_file(monitor.CONFIG_FILE, []) if isinstance(item, dict)]
+    if not monitor.compile_profiles(monitoring_config):
+        print(f"Konfiguration '{monitor.CONFIG_FILE}' fehlt, ist leer oder enthält kein gültiges Profil.")
+        return None
+    logging.getLogger().setLevel(logging.ERROR) # Nur Fehler während der Messung
+
+    monitor.TELEGRAM_ENABLED = False
+    monitor.INTER_REQUEST_DELAY = monitor.INTER_ITEM_DELAY = monitor.ERROR_DELAY = 0
+    monitor.HOST_RATE_LIMIT, monitor.HOST_BURST = 1e6, 1e6
+    monitor.HTTP_CONDITIONAL_REQUESTS = False
+    monitor.PARSE_WORKERS = 0
+    monitor.STREAMING_PARSE = False # Ganze Seiten, damit jeder Durchlauf die gleiche Arbeit macht
+    monitor.CIRCUIT_BREAKER = False
+    monitor.LISTING_CHANGE_DETECTION = False # Jeder Durchlauf meldet wie beim ersten Mal (leerer Speicher, kein Cache)
+    context = multiprocessing.get_context("spawn")
+    servers, base_urls = [], []
+    for index in range(platform_count):
+        port_queue = context.Queue()
+        host = f"127.0.0.{index + 1}"
+        server = context.Process(target=_run_replay_server, args=(record_dir, port_queue, latency_ms, jitter_ms, 0.0, seed + index),
+                                 kwargs={"host": host}, daemon=True)
+        server.start()
+        servers.append(server)
+        base_urls.append(f"http://{host}:{port_queue.get()}")
+    monitor.BASE_URL = base_urls[0]
+    names = [monitor.DEFAULT_PLATFORM] + [f"replay{index + 1}" for index in range(1, platform_count)]
+    monitor.configure_platforms({name: {"base_url": base_url} for name, base_url in zip(names[1:], base_urls[1:])})
+    notified_urls = []
+    original_notify, original_dedup = monitor.send_telegram_notification, monitor.CROSS_POST_DEDUP
+    monitor.send_telegram_notification = lambda item_title, item_url, *args: notified_urls.append(item_url) # Statt Telegram zählen
+
+    def run(platform_names, measured_cycles=cycles):
+        """Durchläufe mit leerem Speicher. Gibt (Sekunden pro Durchlauf (Median), Meldungen pro Durchlauf, Pool-Statistik) zurück."""
+        profiles = monitor.compile_profiles([{**item, "platforms": platform_names} for item in monitoring_config])
+        del notified_urls[:]
+        monitor.FETCH_POOL_STATS.clear()
+        seconds = []
+        for _ in range(measured_cycles):
+            started = perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()): # Treffer-Ausgaben unterdrücken
+                monitor.run_cycle(profiles, monitor.SeenUrlIndex())
+            seconds.append(perf_counter() - started)
+        return sorted(seconds)[len(seconds) // 2], len(notified_urls) // measured_cycles, {host: list(stats) for host, stats in monitor.FETCH_POOL_STATS.items()}
+
+    try:
+        run(names, 1) # Aufwärmen: Verbindungen und Extraktoren für alle Hosts
+        alone = {name: run([name]) for name in names}
+        together_seconds, together_notified, pool_stats = run(names)
+        monitor.CROSS_POST_DEDUP = False
+        _, without_dedup_notified, _ = run(names)
+    finally:
+        monitor.CROSS_POST_DEDUP = original_dedup
+        monitor.send_telegram_notification = original_notify
+        monitor.configure_platforms()
+        monitor.close_event_loop()
+        monitor.HTTP_CLIENT.close()
+        for server in servers:
+            server.terminate()
+
+    alone_total = sum(seconds for seconds, _, _ in alone.values())
+    print(f"{platform_count} Plattform(en), {cycles} Durchläufe pro Messung, Latenz {latency_ms:.0f} ms, {monitor.FETCH_MODE}-Modus")
+    print(f"{'Messung':<34} {'s/Durchlauf':>11} {'Meldungen':>10}")
+    for name, (seconds, notified, _) in alone.items():
+        print(f"{'nur ' + name:<34} {seconds:>11.3f} {notified:>10}")
+    print(f"{'Summe einzeln':<34} {alone_total:>11.3f} {sum(notified for _, notified, _ in alone.values()):>10}")
+    print(f"{'alle gemeinsam':<34} {together_seconds:>11.3f} {together_notified:>10}")
+    print(f"{'alle gemeinsam, ohne CROSS_POST_DEDUP':<34} {'':>11} {without_dedup_notified:>10}")
+    if pool_stats:
+        print(f"{'Host':<34} {'Anfragen':>11} {'max. gleichz.':>13}")
+        for host, (requests_sent, peak) in sorted(pool_stats.items()):
+            print(f"{host:<34} {requests_sent // cycles:>11} {peak:>13}")
+    return together_notified == alone[monitor.DEFAULT_PLATFORM][1] and together_seconds < alone_total
+
+
+def _run_telegram_stub(port_queue, rate_limit_every, retry_after):
+    """Minimaler lokaler Ersatz der Telegram Bot API: antwortet auf sendMessage, jede n-te Anfrage mit 429."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    request_counter = {"count": 0}
+    counter_lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            with counter_lock:
+                request_counter["count"] += 1
+                rate_limited = rate_limit_every and request_counter["count"] % rate_limit_every == 0
+            if rate_limited:
+                body = json.dumps({"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                   "parameters": {"retry_after": retry_after}})
+                self.send_response(429)
+            else:
+                body = json.dumps({"ok": True, "result": {}})
+                self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _benchmark_startup_child(base_url, config_file, use_snapshot):
+    """Kindprozess für benchmark_startup: ein Lauf wie mit --once gegen den Replay-Server, ohne Telegram und Pausen."""
+    import contextlib
+    import io
+
+    logging.getLogger().setLevel(logging.ERROR)
+    monitor.BASE_URL, monitor.CONFIG_FILE = base_url, config_file
+    monitor.TELEGRAM_ENABLED = False
+    monitor.SEEN_ITEMS_BACKEND, monitor.SEEN_ITEMS_SNAPSHOT = "json", use_snapshot # Dateien im Arbeitsverzeichnis des Kindprozesses
+    monitor.INTER_REQUEST_DELAY = monitor.INTER_ITEM_DELAY = monitor.ERROR_DELAY = 0
+    monitor.HOST_RATE_LIMIT, monitor.HOST_BURST = 1e6, 1e6
+    with contextlib.redirect_stdout(io.StringIO()): # Treffer-Ausgaben unterdrücken
+        return monitor.main(once=True)
+
+
+def benchmark_startup(record_dir, seen_count=1_000_000, runs=3):
+    """
+    Misst den Kaltstart eines Laufs mit --once in frischen Python-Prozessen gegen die aufgezeichneten Seiten eines
+    lokalen Replay-Servers: Zeit vom Prozessstart bis zur ersten Anfrage und bis zum Ende (Median aus 'runs'), mit
+    seen_count gesehenen Inseraten als JSON bzw. als Schnappschuss und mit sofortigen (wie früher) bzw. verzögerten
+    Imports. Gibt {Variante: (erste Anfrage s, gesamt s)} zurück.
+    """
+    import queue
+    import shutil
+    import subprocess
+    import tempfile
+
+    config_file = os.path.abspath(monitor.CONFIG_FILE)
+    if not monitor.load_profiles(config_file):
+        print(f"Konfiguration '{monitor.CONFIG_FILE}' fehlt, ist leer oder enthält kein gültiges Profil.")
+        return None
+    script_filename = os.path.abspath(monitor.__file__) # Der Monitor selbst (für die Kompilierzeit)
+    module_dir, module_name = os.path.dirname(os.path.abspath(__file__)), os.path.splitext(os.path.basename(__file__))[0]
+    eager_modules = [name for name in ("requests", "bs4", "aiohttp", "lxml.etree", "numpy") if monitor.module_installed(name)]
+
+    context = multiprocessing.get_context("spawn")
+    port_queue, request_times = context.Queue(), context.Queue()
+    server = context.Process(target=_run_replay_server, args=(record_dir, port_queue, 0.0, 0.0, 0.0, 1, None, request_times), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get()}"
+
+    def run_child(work_dir, use_snapshot, eager):
+        imports = f"import {', '.join(eager_modules)}; " if eager and eager_modules else ""
+        code = (f"import sys; sys.path.insert(0, {module_dir!r}); {imports}import {module_name} as benchmarks; "
+                f"sys.exit(benchmarks._benchmark_startup_child({base_url!r}, {config_file!r}, {use_snapshot!r}))")
+        launched = time()
+        subprocess.run([sys.executable, "-c", code], cwd=work_dir, check=True)
+        finished = time()
+        times = [request_times.get(timeout=5)]
+        while True:
+            try:
+                times.append(request_times.get(timeout=0.2))
+            except queue.Empty:
+                break
+        return min(times) - launched, finished - launched
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rng = random.Random(1)
+            seen_ids = monitor.SeenUrlIndex(rng.randrange(1, 10**10) for _ in range(seen_count))
+            json_filename, snapshot_filename = os.path.join(temp_dir, "seen_items.json"), os.path.join(temp_dir, "seen_items.bin")
+            monitor.save_json_file(list(seen_ids.ids), json_filename)
+            seen_ids.ids.write_snapshot(snapshot_filename)
+            work_dir = os.path.join(temp_dir, "lauf")
+            os.makedirs(work_dir)
+            run_child(work_dir, True, False) # Aufwärmen: Bytecode-Cache und Dateicache wie bei wiederholten Timer-Läufen
+
+            variants = [("JSON, sofortige Imports", False, True), ("JSON, verzögerte Imports", False, False),
+                        ("Schnappschuss, sofortige Imports", True, True), ("Schnappschuss, verzögerte Imports", True, False)]
+            for label, use_snapshot, eager in variants:
+                timings = []
+                for _ in range(runs):
+                    shutil.rmtree(work_dir)
+                    os.makedirs(work_dir)
+                    if use_snapshot:
+                        shutil.copy(snapshot_filename, work_dir)
+                    else:
+                        shutil.copy(json_filename, work_dir)
+                    timings.append(run_child(work_dir, use_snapshot, eager))
+                results[label] = (sorted(first for first, _ in timings)[len(timings) // 2],
+                                  sorted(total for _, total in timings)[len(timings) // 2])
+    finally:
+        server.terminate()
+
+    with open(script_filename, 'rb') as f:
+        source = f.read()
+    started = perf_counter()
+    compile(source, script_filename, "exec")
+    compile_ms = (perf_counter() - started) * 1000
+
+    print(f"{seen_count} gesehene Inserate, Median aus {runs} Läufen mit --once (ab Prozessstart)")
+    print(f"{'Variante':<36} {'erste Anfrage ms':>17} {'gesamt ms':>10}")
+    for label, (first_request, total) in results.items():
+        print(f"{label:<36} {first_request * 1000:>17.0f} {total * 1000:>10.0f}")
+    print(f"Als Skript gestartet (python {os.path.basename(script_filename)}) kommen {compile_ms:.0f} ms Kompilieren dazu; "
+          f"'python -m {monitor.__name__}' nutzt den Bytecode-Cache.")
+    return results
+
+
+def benchmark_telegram(message_count=200, digest_threshold=monitor.TELEGRAM_DIGEST_THRESHOLD, rate_limit_every=25, retry_after=1):
+    """
+    Misst Durchsatz und Zustell-Latenz des TelegramDispatcher gegen einen lokalen Stub der Bot API,
+    der jede 'rate_limit_every'-te Anfrage mit 429 (retry_after) beantwortet.
+    """
+    import tempfile
+    logging.getLogger().setLevel(logging.ERROR) # Keine Versand-Logs während der Messung
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    stub = context.Process(target=_run_telegram_stub, args=(port_queue, rate_limit_every, retry_after), daemon=True)
+    stub.start()
+    monitor.TELEGRAM_API_URL = f"http://127.0.0.1:{port_queue.get()}"
+    monitor.TELEGRAM_ENABLED = True
+
+    print(f"{'Modus':<22} {'Nachrichten':>11} {'Anfragen':>9} {'429':>5} {'Sekunden':>9} {'Nachr./s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    try:
+        for label, threshold in (("einzeln", message_count + 1), (f"Sammelnachricht ab {digest_threshold}", digest_threshold)):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                outbox = monitor.TelegramOutbox(os.path.join(temp_dir, "outbox.sqlite3"))
+                dispatcher = monitor.TelegramDispatcher(monitor.TELEGRAM_BOT_TOKENS, outbox, digest_threshold=threshold)
+                monitor.TELEGRAM_DISPATCHER_INSTANCE = dispatcher
+                dispatcher.start()
+                start = perf_counter()
+                for index in range(message_count):
+                    monitor.send_telegram_notification(f"Testinserat {index}", f"https://example.invalid/inserat/{index}", 100 + index, "Benchmark", priority=1 + index % 3)
+                enqueue_seconds = perf_counter() - start
+                while outbox.count():
+                    sleep(0.01)
+                elapsed = perf_counter() - start
+                dispatcher.stop()
+                monitor.TELEGRAM_DISPATCHER_INSTANCE = None
+                latencies = sorted(dispatcher.latencies)
+                p50 = latencies[len(latencies) // 2] * 1000
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+                stats = dispatcher.stats
+                print(f"{label:<22} {stats['messages']:>11} {stats['requests']:>9} {stats['rate_limited']:>5} {elapsed:>9.2f} "
+                      f"{message_count / elapsed:>9.1f} {p50:>8.0f} {p95:>8.0f}")
+                print(f"{'':<22} (Einreihen ohne Warten auf Telegram: {enqueue_seconds * 1000 / message_count:.2f} ms pro Nachricht)")
+    finally:
+        stub.terminate()
+        monitor.HTTP_CLIENT.close()
+
+
+# ==============================================================================
+# 3. SKRIPT STARTPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="gebrauchtplatformen.ch Monitor: Benchmarks und Gleichheitsprüfungen")
+    parser.add_argument("--check", nargs="*", metavar="HTML_DATEI",
+                        help="Prüft, dass die schnellen Wege dieselben Ergebnisse liefern wie die bisherigen (synthetische Daten "
+                             "und optional gespeicherte Ergebnisseiten), und beendet danach mit Exit-Code 1 beim ersten Unterschied.")
+    parser.add_argument("--benchmark-parser", nargs="+", metavar="HTML_DATEI",
+                        help="Vergleicht die HTML-Extraktor-Backends auf gespeicherten Ergebnisseiten und beendet danach.")
+    parser.add_argument("--benchmark-filters", action="store_true",
+                        help="Vergleicht die Grössenfilter (alt vs. vorkompiliert) und beendet danach.")
+    parser.add_argument("--benchmark-batch-filter", nargs="?", const=20000, type=int, metavar="ANZAHL",
+                        help="Vergleicht die Filterung pro Inserat mit der Batch-Filterung auf ANZAHL Inseraten (Standard: 20000) und beendet danach.")
+    parser.add_argument("--benchmark-seen-memory", nargs="*", type=int, metavar="ANZAHL",
+                        help="Misst den Speicherbedarf gesehener Inserate (Standard: 1000000 10000000 Einträge) und beendet danach.")
+    parser.add_argument("--benchmark-history", nargs="?", const=1_000_000, type=int, metavar="ANZAHL",
+                        help="Misst Speichern und Median-Abfragen des Preisverlaufs mit ANZAHL Beobachtungen (Standard: 1000000) und beendet danach.")
+    parser.add_argument("--benchmark-streaming", nargs="+", metavar="HTML_DATEI",
+                        help="Vergleicht Streaming-Parsing mit dem Parsen ganzer Seiten auf gespeicherten Ergebnisseiten und beendet danach.")
+    parser.add_argument("--benchmark-parse-workers", nargs="+", metavar="HTML_DATEI",
+                        help="Misst den Parse-Durchsatz des Worker-Pools für 1..N Prozesse auf gespeicherten Ergebnisseiten und beendet danach.")
+    parser.add_argument("--benchmark-replay", metavar="VERZEICHNIS",
+                        help="Führt Suchdurchläufe gegen die mit 'gebrauchtplatformen_monitor.py --record' aufgezeichneten Seiten "
+                             "auf einem lokalen Server aus und beendet danach.")
+    parser.add_argument("--replay-cycles", type=int, default=5, help="Anzahl Durchläufe für --benchmark-replay (Standard: 5).")
+    parser.add_argument("--replay-latency", type=float, default=0.0, metavar="MS", help="Künstliche Antwortzeit des Replay-Servers in ms.")
+    parser.add_argument("--replay-jitter", type=float, default=0.0, metavar="MS", help="Zufällige Abweichung der Antwortzeit in ms (±).")
+    parser.add_argument("--replay-error-rate", type=float, default=0.0, metavar="ANTEIL", help="Anteil der Anfragen, die mit 503 beantwortet werden (0..1).")
+    parser.add_argument("--replay-seed", type=int, default=1, help="Startwert für Latenz- und Fehlerzufall (für wiederholbare Messungen).")
+    parser.add_argument("--json-out", metavar="DATEI", help="Schreibt das Ergebnis von --benchmark-replay als JSON in die Datei.")
+    parser.add_argument("--replay-outage", type=float, metavar="SEKUNDEN",
+                        help="Mit --benchmark-replay: simuliert einen Ausfall dieser Dauer und vergleicht die Abrufe ohne und mit Schutzschalter.")
+    parser.add_argument("--replay-outage-status", type=int, default=503, metavar="STATUS",
+                        help="HTTP-Status während des simulierten Ausfalls (Standard: 503, z.B. 429 für Drosselung).")
+    parser.add_argument("--replay-retry-after", type=int, metavar="SEKUNDEN", help="Retry-After-Header während des simulierten Ausfalls.")
+    parser.add_argument("--replay-shards", type=int, metavar="N",
+                        help="Mit --benchmark-replay: startet N Instanzen mit gemeinsamem Speicher und prüft auf doppelte Meldungen.")
+    parser.add_argument("--replay-platforms", type=int, metavar="N",
+                        help="Mit --benchmark-replay: simuliert N Plattformen (je ein Replay-Server als eigener Host) und vergleicht "
+                             "einzelne mit gemeinsamen Durchläufen sowie die Meldungen mit und ohne Erkennung von Mehrfach-Inseraten.")
+    parser.add_argument("--benchmark-startup", metavar="VERZEICHNIS",
+                        help="Misst mit --once die Zeit vom Prozessstart bis zur ersten Anfrage an die aufgezeichneten Seiten "
+                             "(JSON vs. Schnappschuss, sofortige vs. verzögerte Imports) und beendet danach.")
+    parser.add_argument("--startup-seen-items", type=int, default=1_000_000, metavar="ANZAHL",
+                        help="Anzahl gesehener Inserate für --benchmark-startup (Standard: 1000000).")
+    parser.add_argument("--benchmark-telegram", nargs="?", const=200, type=int, metavar="ANZAHL",
+                        help="Misst Durchsatz und Latenz des Telegram-Versands gegen einen lokalen Bot-API-Stub (Standard: 200 Nachrichten) und beendet danach.")
+    args = parser.parse_args()
+
+    try:
+        if args.check is not None:
+            run_checks(args.check)
+        elif args.benchmark_parser:
+            benchmark_extractors(args.benchmark_parser)
+        elif args.benchmark_filters:
+            benchmark_filters()
+        elif args.benchmark_batch_filter:
+            benchmark_batch_filter(args.benchmark_batch_filter)
+        elif args.benchmark_seen_memory is not None:
+            benchmark_seen_memory(args.benchmark_seen_memory or (1_000_000, 10_000_000))
+        elif args.benchmark_history:
+            raise SystemExit(0 if benchmark_price_history(args.benchmark_history) else 1)
+        elif args.benchmark_streaming:
+            raise SystemExit(0 if benchmark_streaming(args.benchmark_streaming) else 1)
+        elif args.benchmark_parse_workers:
+            benchmark_parse_workers(args.benchmark_parse_workers)
+        elif args.benchmark_telegram:
+            benchmark_telegram(args.benchmark_telegram)
+        elif args.benchmark_startup:
+            benchmark_startup(args.benchmark_startup, args.startup_seen_items)
+        elif args.benchmark_replay and args.replay_outage:
+            ok = benchmark_circuit_breaker(args.benchmark_replay, args.replay_outage, args.replay_outage_status,
+                                           args.replay_retry_after, args.replay_latency, args.replay_seed)
+            raise SystemExit(0 if ok else 1)
+        elif args.benchmark_replay and args.replay_shards:
+            ok = benchmark_shards(args.benchmark_replay, args.replay_shards, args.replay_cycles, args.replay_latency,
+                                  args.replay_jitter, args.replay_error_rate, args.replay_seed)
+            raise SystemExit(0 if ok else 1)
+        elif args.benchmark_replay and args.replay_platforms:
+            ok = benchmark_platforms(args.benchmark_replay, args.replay_platforms, args.replay_cycles, args.replay_latency or 50.0,
+                                     args.replay_jitter, args.replay_seed)
+            raise SystemExit(0 if ok else 1)
+        elif args.benchmark_replay:
+            report = benchmark_replay(args.benchmark_replay, args.replay_cycles, args.replay_latency, args.replay_jitter,
+                                      args.replay_error_rate, args.replay_seed, args.json_out)
+            raise SystemExit(0 if report is not None else 1)
+        else:
+            parser.print_help()
+            raise SystemExit(2)
+    except AssertionError as e:
+        print(e)
+        raise SystemExit(1)
@@ -1,13 +1,31 @@
 # -*- coding: utf-8 -*- # Stellt sicher, dass Umlaute etc. korrekt interpretiert werden
 
-import requests
-from bs4 import BeautifulSoup
-from time import sleep, time
-from urllib.parse import quote_plus
+from time import sleep, time, monotonic, perf_counter
+from urllib.parse import quote_plus, urlencode, urlsplit
+from collections import namedtuple, deque, OrderedDict
+from contextlib import asynccontextmanager
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from array import array
+from bisect import bisect_left
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import sqlite3
+import hashlib
+import heapq
+import math
+import random
+import threading
+import contextvars
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import logging
 import re
 import json
 import os
+import sys
 import html # Für HTML escaping in Telegram Nachrichten
 
 # ==============================================================================
@@ -16,7 +34,42 @@ import html # Für HTML escaping in Telegram Nachrichten
 
 # --- Dateinamen ---
 CONFIG_FILE = 'monitoring_config.json'      # Datei mit den zu überwachenden Suchanfragen und Kriterien
+CONFIG_POLL_INTERVAL = 10 # Sekunden zwischen zwei Prüfungen, ob die Konfigurationsdatei geändert wurde (Neuladen ohne Neustart)
 SEEN_ITEMS_FILE = 'seen_items.json' # Datei zum Speichern der bereits gefundenen Inserate-URLs
+SEEN_ITEMS_SNAPSHOT_FILE = 'seen_items.bin' # Binärer Schnappschuss der gesehenen Inserate-IDs (wenn SEEN_ITEMS_SNAPSHOT aktiv ist)
+SEEN_ITEMS_DB_FILE = 'seen_items.sqlite3' # SQLite-Datenbank für gesehene Inserate (wenn SEEN_ITEMS_BACKEND = "sqlite")
+PRICE_HISTORY_DB_FILE = 'price_history.sqlite3' # SQLite-Datenbank für den Preisverlauf (wenn PRICE_HISTORY aktiv ist)
+RECORD_DIR = None # Wenn gesetzt (oder --record VERZEICHNIS): geladene Suchseiten für gebrauchtplatformen_benchmarks.py --benchmark-replay speichern
+RECORD_INDEX_FILE = 'recorded_pages.json' # Zuordnung URL-Pfad -> gespeicherte HTML-Datei im RECORD_DIR
+
+# --- Speicher für gesehene Inserate ---
+# "sqlite" = SQLite im WAL-Modus: neue Einträge werden angehängt, Start ohne Laden der ganzen Historie.
+#            Eine vorhandene seen_items.json wird beim ersten Start automatisch übernommen.
+# "json"   = bisheriges Verhalten: ganze Liste in seen_items.json, nach jedem Fund neu geschrieben
+#            (bzw. einmal pro Durchlauf als binärer Schnappschuss, siehe SEEN_ITEMS_SNAPSHOT).
+# "redis"  = gemeinsamer Speicher in Redis (REDIS_URL), für mehrere Instanzen auf verschiedenen Rechnern (siehe Sharding).
+SEEN_ITEMS_BACKEND = "sqlite"
+REDIS_URL = "redis://localhost:6379/0" # Nur mit SEEN_ITEMS_BACKEND = "redis" (benötigt das Paket 'redis')
+REDIS_KEY_PREFIX = "gebrauchtmonitor" # Präfix der Redis-Schlüssel, damit mehrere Monitore eine Instanz teilen können
+SEEN_ITEMS_TTL_DAYS = None # Gesehene Inserate nach so vielen Tagen vergessen (None = nie), nur mit "sqlite" oder "redis"
+# Gesehene Inserate werden auf ihre numerische Inserate-ID normalisiert und kompakt gespeichert.
+# Optional beantwortet ein Bloom-Filter davor "noch nie gesehen" ohne Suche (ca. 1.2 Bytes pro Eintrag).
+# Der Filter wird beim Start aus allen IDs aufgebaut, d.h. die Startzeit wächst wieder mit der Historie.
+SEEN_ITEMS_BLOOM_FILTER = False
+# Mit "json" werden die IDs als binärer Schnappschuss gespeichert (SEEN_ITEMS_SNAPSHOT_FILE, sortiert, 8 Bytes pro
+# Inserat) statt als JSON-Liste: Laden ist ein einziges Einlesen ohne Parsen, wichtig für kurze Läufe mit --once.
+# Eine vorhandene (neuere) seen_items.json wird beim Start übernommen und danach nicht mehr geschrieben.
+# Der Schnappschuss wird einmal pro Durchlauf und beim Beenden geschrieben, nicht nach jedem Fund.
+SEEN_ITEMS_SNAPSHOT = True
+
+# --- Mehrere Instanzen (Sharding) ---
+# Die Suchanfragen werden per konsistentem Hashing auf SHARD_COUNT Instanzen verteilt, jede ruft nur ihren Anteil ab.
+# Treffer werden vor dem Senden im gemeinsamen Speicher beansprucht (SEEN_ITEMS_DB_FILE oder Redis), damit kein
+# Inserat doppelt gemeldet wird, auch nicht nach dem Neustart einer Instanz. SQLite (WAL) funktioniert nur, wenn alle
+# Instanzen auf demselben Rechner laufen; für mehrere Rechner SEEN_ITEMS_BACKEND = "redis" verwenden.
+SHARD_COUNT = 1            # Anzahl Instanzen (1 = kein Sharding)
+SHARD_INDEX = 0            # Nummer dieser Instanz (0-basiert), per --shard I/N (1-basiert) setzbar
+SHARD_VIRTUAL_NODES = 64   # Punkte pro Instanz auf dem Hash-Ring (gleichmässigere Verteilung)
 
 # --- Telegram Bot Konfiguration ---
 # Die Bot-Tokens sind hier nach Priorität geordnet (1=wichtig, 3=unwichtig)
@@ -27,6 +80,15 @@ TELEGRAM_BOT_TOKENS = {
 }
 # Dein Bot Token von @BotFather
 TELEGRAM_CHAT_ID = "YOUR_TELEGRAM_CHAT_ID_HERE"      # Deine Chat ID
+TELEGRAM_API_URL = "https://api.telegram.org" # Basis-URL der Bot API (für Tests auf einen lokalen Stub umstellbar)
+
+# --- Telegram Versand im Hintergrund ---
+TELEGRAM_DISPATCHER = True       # Nachrichten in eine Warteschlange stellen und im Hintergrund senden
+TELEGRAM_OUTBOX_FILE = 'telegram_outbox.sqlite3' # Dauerhafte Warteschlange, überlebt Neustarts
+TELEGRAM_DIGEST_THRESHOLD = 5    # Ab so vielen wartenden Nachrichten pro Bot wird eine Sammelnachricht gesendet
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096 # Maximale Länge einer Telegram-Nachricht
+TELEGRAM_MAX_ATTEMPTS = 10       # Nach so vielen Fehlversuchen wird eine Nachricht verworfen
+TELEGRAM_RETRY_DELAY = 5.0       # Basis-Wartezeit (Sekunden) für erneute Versuche, verdoppelt sich pro Versuch
 
 # --- Globale Grössen-Filter ---
 # Hier werden die Standardgrössen für jeden Typ definiert.
@@ -49,11 +111,222 @@ INTER_REQUEST_DELAY = 1.5 # Kurze Pause zwischen einzelnen Suchanfragen (in Seku
 INTER_ITEM_DELAY = 3.0    # Kurze Pause nach Abarbeitung aller Suchen für ein Item (in Sekunden)
 ERROR_DELAY = 5.0         # Längere Pause nach einem unerwarteten Fehler (in Sekunden)
 
+# --- Änderungserkennung pro Inserat ---
+# Jedes geprüfte Inserat wird mit Preis und Fingerabdruck gemerkt: unveränderte Inserate werden nicht erneut
+# gefiltert, und fällt der Preis eines Inserats unter das Maximum (oder weiter), gibt es eine Preissenkungs-Meldung.
+LISTING_CHANGE_DETECTION = True
+LISTING_CACHE_MAX_ENTRIES = 50000 # Höchstzahl gemerkter Inserate (älteste werden zuerst verdrängt)
+LISTING_CACHE_TTL = 7 * 24 * 3600 # Sekunden, nach denen ein nicht mehr aufgetauchtes Inserat vergessen wird
+
+# --- Preisverlauf ---
+# Optional wird jeder beobachtete Preis (neues Inserat oder geänderter Preis) mit Zeitpunkt, Suchbegriff, Profil und Typ
+# in PRICE_HISTORY_DB_FILE angehängt und zusätzlich pro Profil und Tag als Preis-Histogramm zusammengefasst. Abfragen
+# wie der Median der letzten 30 Tage lesen nur diese Histogramme und bleiben auch bei Millionen Beobachtungen schnell.
+# Darauf beruht die Profil-Regel "max_percent_of_median" (z.B. 80 = nur Inserate bis 80% des Medianpreises des Profils).
+# Mit FILTER_PUSHDOWN (und konfiguriertem Preis-Parameter) liefert die Plattform nur Inserate bis max_price: der Median
+# bezieht sich dann auf diese.
+PRICE_HISTORY = False
+PRICE_HISTORY_WINDOW_DAYS = 30     # Zeitraum für den Median der Regel "max_percent_of_median"
+PRICE_HISTORY_MIN_SAMPLES = 20     # Mindestanzahl Preise im Zeitraum, sonst gilt die Regel als erfüllt
+PRICE_HISTORY_RESOLUTION = 0.01    # Breite der Preisklassen im Histogramm (0.01 = 1%, Median auf ca. 0.5% genau)
+PRICE_HISTORY_RETENTION_DAYS = 365 # Einzelne Beobachtungen nach so vielen Tagen löschen (None = nie), Histogramme bleiben
+
+# --- Batch-Filterung ---
+# Die Filter werden pro Seite für alle Inserate und alle abonnierenden Profile auf einmal ausgewertet: Preis, Text und
+# "gesehen" einmal pro Inserat statt pro Inserat und Profil, Grössenfilter einmal pro Typ, Preisgrenzen als Vergleich
+# über alle Inserate (mit NumPy, falls installiert). Im Log steht pro Inserat dann nur das Ergebnis statt jedes
+# einzelnen Filterschritts (FILTER_BATCH = False für die ausführliche Ausgabe).
+FILTER_BATCH = False
+
+# --- Mehrseitige Ergebnisse ---
+# Pro Profil kann "max_pages" gesetzt werden (Standard: MAX_RESULT_PAGES). Weitere Seiten werden nur geladen,
+# solange die aktuelle Seite bis zum letzten Inserat neue Einträge enthält (siehe should_fetch_next_page).
+MAX_RESULT_PAGES = 1           # Standard für Profile ohne "max_pages" (1 = nur erste Seite, wie bisher)
+PAGE_PARAMETER = "page"        # URL-Parameter für die Seitennummer
+
+# --- Filter in der Such-URL (serverseitig) ---
+# Profilfelder, die als URL-Parameter an die Plattform übergeben werden, damit teure Inserate gar nicht erst geladen werden.
+# Die clientseitigen Filter bleiben als Sicherheitsnetz aktiv. Standardmässig aus: die Parameternamen müssen zuerst an
+# der Plattform geprüft und hier eingetragen werden; Felder ohne Parametername (None) werden nie übergeben.
+# Nur mit dem Sortier-Parameter gelten die Ergebnisse als "neueste zuerst" (Voraussetzung für das vorzeitige Beenden
+# beim Streaming und für das Stoppen vor weiteren Ergebnisseiten, siehe results_newest_first).
+FILTER_PUSHDOWN = False
+SEARCH_URL_PARAMETERS = {
+    "max_price": None,         # Höchstpreis (aus "max_price"), z.B. "priceTo"
+    "category": None,          # Kategorie (aus optionalem Profilfeld "category"), z.B. "category"
+    "sort": None,              # Sortierung (aus optionalem Profilfeld "sort_newest"), z.B. "sorting"
+}
+SORT_NEWEST_VALUE = None       # Wert des Sortier-Parameters für "neueste zuerst", z.B. "newest"
+SORT_BY_NEWEST = False         # Standard für Profile ohne "sort_newest"
+
+# --- Adaptive Abfrageplanung pro Suchbegriff ---
+# Statt alle Suchbegriffe im festen CHECK_INTERVAL abzufragen, bekommt jeder Suchbegriff ein eigenes Intervall,
+# abhängig davon, wie oft dort neue Inserate auftauchen, und von der Priorität des Profils. Die Rate startet bei
+# TARGET_NEW_PER_POLL pro CHECK_INTERVAL (ein leerer Abruf verlängert das Intervall also nur mässig), und insgesamt
+# werden höchstens so viele Anfragen gesendet wie ohne Planung (Anzahl Suchbegriffe pro CHECK_INTERVAL): Verlangen
+# die Intervalle zusammen mehr, werden alle im gleichen Verhältnis verlängert.
+ADAPTIVE_SCHEDULING = False
+MIN_POLL_INTERVAL = 300        # Kürzestes Intervall pro Suchbegriff (Sekunden)
+MAX_POLL_INTERVAL = 6 * 3600   # Längstes Intervall pro Suchbegriff (Sekunden)
+TARGET_NEW_PER_POLL = 1.0      # Angestrebte Anzahl neuer Inserate pro Abruf (bestimmt das Intervall aus der Rate)
+RATE_SMOOTHING = 0.3           # Gewicht der neuesten Messung für die geglättete Rate (0..1)
+PRIORITY_INTERVAL_FACTORS = {1: 0.5, 2: 1.0, 3: 1.5} # Priorität -> Faktor auf das Intervall (1 = häufiger)
+
+# --- HTML-Extraktion ---
+# "lxml" = schneller Pfad mit vorkompilierten XPath-Ausdrücken (benötigt 'lxml')
+# "bs4"  = ursprünglicher BeautifulSoup-Pfad ('html.parser'), wird auch als Fallback verwendet
+EXTRACTOR_BACKEND = "lxml"
+# Schnellweg: Viele Seiten enthalten die Suchergebnisse zusätzlich als JSON (z.B. <script id="__NEXT_DATA__">).
+# Ist es vorhanden, werden die Inserate daraus gelesen (json.loads statt CSS-Selektoren, unabhängig von den
+# generierten Klassennamen), sonst automatisch über EXTRACTOR_BACKEND aus dem HTML. Der Pfad zur Liste der
+# Suchergebnisse im JSON muss in EMBEDDED_JSON_LISTINGS_PATH angegeben werden: Die Seite enthält oft weitere Listen
+# mit Inserate-Links (z.B. "Empfohlen"), die nicht zur Suche gehören. Ohne Pfad bleibt der Schnellweg aus.
+# Zusammenspiel mit STREAMING_PARSE: Im Streaming-Modus wird die erste Seite aus dem HTML gelesen, während sie
+# ankommt (das JSON steht meist am Seitenende); der JSON-Weg gilt dann nur für ganz geladene Seiten (ab Seite 2,
+# sowie Seite 1 ohne Streaming oder beim Aufzeichnen mit --record).
+EMBEDDED_JSON_EXTRACTION = False
+EMBEDDED_JSON_SCRIPT_ID = "__NEXT_DATA__"
+EMBEDDED_JSON_LISTINGS_PATH = None # z.B. ["props", "pageProps", "listings"]; Pflicht für EMBEDDED_JSON_EXTRACTION
+EMBEDDED_JSON_FIELDS = { # Feld im Listing -> mögliche Schlüssel im JSON-Objekt (der erste vorhandene zählt)
+    "url": ("url", "href", "link", "path"),
+    "title": ("title", "name"),
+    "price": ("price", "priceText", "formattedPrice", "priceFormatted"),
+    "description": ("description", "shortDescription", "teaser", "summary"),
+}
+# Pro Seitenlayout (erkannt an den Klassennamen im ersten Inserat) wird gemerkt, welcher der möglichen Selektoren
+# für Link, Preis und Beschreibung greift; alle weiteren Inserate (auch auf späteren Seiten) probieren zuerst nur
+# diesen. Erst wenn er nicht mehr passt, werden wieder alle der Reihe nach geprüft (Metrik 'selector_fallback_<Feld>').
+# Passen bei einem Inserat mehrere Selektoren, gewinnt so der gemerkte statt des ersten in der Liste: deshalb nur
+# einschalten, wenn die Selektoren eines Feldes sich gegenseitig ausschliessen.
+SELECTOR_PLAN_CACHE = False
+SELECTOR_PLAN_MAX_LAYOUTS = 16 # Anzahl gemerkter Seitenlayouts (älteste werden verdrängt)
+# Anzahl Prozesse, die im Async-Modus parallel Seiten parsen (0 = im Hauptprozess parsen).
+# Der Hauptprozess behält die gesehenen Inserate und die Benachrichtigungen, die Worker liefern nur Listing-Tupel zurück.
+PARSE_WORKERS = 0
+
+# --- Streaming-Parsing ---
+# Die erste Ergebnisseite wird stückweise gelesen und inkrementell geparst (benötigt lxml): Jedes Inserat wird
+# verarbeitet und ggf. gemeldet, sobald sein Element geschlossen ist, nicht erst nach dem Laden der ganzen Seite.
+# Gelesen wird nur bis zum Ende der Ergebnisliste (Skripte/JSON danach nicht) oder bis STREAM_STOP_AFTER_KNOWN
+# bereits bekannte Inserate in Folge kamen (nur bei Sortierung "neueste zuerst": der Rest ist älter). Mit
+# LISTING_CHANGE_DETECTION zählt ein Inserat dabei nur als bekannt, wenn es sich für kein Profil geändert hat,
+# damit Preissenkungen weiter unten nicht übersehen werden.
+STREAMING_PARSE = False
+STREAM_CHUNK_SIZE = 16 * 1024   # Bytes pro gelesenem Stück
+STREAM_STOP_AFTER_KNOWN = 5     # Hervorgehobene (alte) Inserate oben auf der Seite sind meist weniger
+
+# --- Abruf-Modus (sequentiell oder parallel) ---
+# "sync"  = klassischer Modus: ein Suchbegriff nach dem anderen, mit festen Pausen.
+# "async" = parallele Abrufe mit begrenzter Anzahl gleichzeitiger Anfragen und einem
+#           Token-Bucket pro Host anstelle der festen Pausen (benötigt 'aiohttp').
+FETCH_MODE = "sync"
+MAX_CONCURRENT_REQUESTS = 8 # Maximale Anzahl gleichzeitig laufender Anfragen pro Host im Async-Modus
+FETCH_POOL_SIZE = None      # Maximale Anzahl gleichzeitig laufender Anfragen über alle Hosts (None = Summe der Host-Budgets)
+HOST_RATE_LIMIT = 1 / INTER_REQUEST_DELAY # Erlaubte Anfragen pro Sekunde und Host (Token-Nachfüllrate)
+HOST_BURST = 3              # Maximale Anzahl Anfragen, die pro Host kurzfristig am Stück erlaubt sind
+
+# --- HTTP-Verbindungen ---
+HTTP_POOL_SIZE = 10           # Anzahl offen gehaltener Verbindungen pro Host (Keep-Alive)
+HTTP_KEEPALIVE_TIMEOUT = 60   # Sekunden, die eine unbenutzte Verbindung im Async-Modus offen bleibt
+HTTP_CONDITIONAL_REQUESTS = True # ETag/Last-Modified senden; bei 304 (unverändert) wird das Parsing übersprungen
+
+# --- Schutzschalter pro Host (Circuit Breaker) ---
+# Nach BREAKER_FAILURE_THRESHOLD Fehlern in Folge (Timeout, Netzwerkfehler, 5xx) oder sofort bei 429 bzw. einem
+# 'Retry-After' wird der Host pausiert: die restlichen Suchanfragen werden zurückgestellt, statt einzeln in den Timeout
+# zu laufen. Die Pause verdoppelt sich mit jeder erneuten Störung (mit Zufallsanteil), ein 'Retry-After' des Servers
+# hat Vorrang. Danach prüft eine einzelne Anfrage, ob der Host wieder antwortet; im Async-Modus steigt die Anzahl
+# gleichzeitiger Anfragen anschliessend langsam wieder von 1 auf MAX_CONCURRENT_REQUESTS.
+CIRCUIT_BREAKER = False
+BREAKER_FAILURE_THRESHOLD = 3  # Fehler in Folge, nach denen der Host pausiert wird
+BREAKER_BASE_DELAY = 30.0      # Erste Pause in Sekunden (verdoppelt sich bei jeder erneuten Störung)
+BREAKER_MAX_DELAY = 30 * 60    # Längste Pause in Sekunden (begrenzt auch ein 'Retry-After')
+BREAKER_JITTER = 0.5           # Zufallsanteil der Pause (0.5 = 50-100% der berechneten Pause)
+
+# --- Mehrere Plattformen ---
+# Ein Durchlauf kann mehrere Marktplätze gleichzeitig abfragen: jede Plattform liefert Such-URL, Extraktor, Inserate-ID
+# und ihr eigenes Ratenlimit (siehe Platform). Die bisherige Seite (BASE_URL) ist DEFAULT_PLATFORM. Weitere Plattformen
+# mit derselben Seitenstruktur (z.B. ein Ableger unter anderer Domain) werden in PLATFORM_SETTINGS eingetragen, fehlende
+# Werte kommen aus den globalen Einstellungen. Ein Profil wählt seine Plattformen mit "platforms" (Liste von Namen,
+# Standard: nur DEFAULT_PLATFORM). Plattformen mit anderer Seitenstruktur brauchen eine Unterklasse von Platform.
+# Im Async-Modus bekommt jeder Host sein eigenes Budget gleichzeitiger Anfragen ("max_concurrency") im gemeinsamen Pool.
+DEFAULT_PLATFORM = "gebrauchtplatform"
+PLATFORM_SETTINGS = {
+    # "ableger": {"base_url": "https://www.ableger.example", "rate_limit": 0.5, "burst": 2, "max_concurrency": 4},
+}
+SEARCH_PATH = "/de/q?query=" # Pfad der Suche vor dem URL-kodierten Suchbegriff (pro Plattform mit "search_path" änderbar)
+# Dasselbe Inserat auf mehreren Plattformen (gleicher Titel und Preis) nur bei der ersten Fundstelle melden.
+# Wirkt erst ab zwei konfigurierten Plattformen; mit nur einer Plattform ändert sich nichts.
+CROSS_POST_DEDUP = True
+
+# --- Metriken pro Verarbeitungsstufe ---
+METRICS_ENABLED = True          # Zeitmessung pro Stufe (HTTP, Parsen, Filter, Versand, Speichern), nur im Speicher und im Log
+METRICS_PORT = None             # Port für den lokalen Endpunkt /metrics (Prometheus-Format), None = aus
+METRICS_HOST = "127.0.0.1"      # Nur lokal erreichbar
+METRICS_RECORD_FILE = None      # Optional: jede Messung als JSON-Zeile in diese Datei schreiben
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # Histogramm-Grenzen (Sekunden)
+
 
 # ==============================================================================
 # 2. INITIALISIERUNG & SETUP
 # ==============================================================================
 
+# --- Verzögerte Imports ---
+# Die grösseren Pakete werden erst beim ersten Gebrauch importiert: Ein Lauf mit --once braucht bis zur ersten
+# Anfrage nur, was er tatsächlich verwendet (z.B. kein BeautifulSoup mit lxml, kein 'requests' im Async-Modus).
+class LazyModule:
+    """
+    Platzhalter für ein Modul, das beim ersten Attributzugriff importiert wird und dann den Platzhalter unter
+    seinem Namen in diesem Skript ersetzt (spätere Zugriffe gehen direkt an das Modul).
+    """
+
+    def __init__(self, module_name, global_name):
+        self._module_name = module_name
+        self._global_name = global_name
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self._module_name)
+        globals()[self._global_name] = module
+        return getattr(module, attribute)
+
+    def __repr__(self):
+        return f"<LazyModule {self._module_name}>"
+
+
+def module_installed(module_name):
+    """Prüft, ob ein Paket installiert ist, ohne es zu importieren."""
+    return importlib.util.find_spec(module_name.partition(".")[0]) is not None
+
+
+def lazy_import(module_name, global_name=None, optional=True):
+    """
+    Gibt einen LazyModule-Platzhalter für module_name zurück (global_name: Name in diesem Skript, Standard wie das
+    Modul). Optionale Pakete, die nicht installiert sind, ergeben wie bisher None.
+    """
+    if optional and not module_installed(module_name):
+        return None
+    return LazyModule(module_name, global_name or module_name)
+
+
+# --- Pflicht-Abhängigkeiten (HTTP im Sync-Modus und Telegram, BeautifulSoup-Extraktor) ---
+requests = lazy_import("requests", optional=False)
+bs4 = lazy_import("bs4", optional=False)
+
+# --- Optionale Abhängigkeit für den Async-Modus ---
+aiohttp = lazy_import("aiohttp")
+
+# --- Optionale Abhängigkeit für die schnelle HTML-Extraktion ---
+etree = lazy_import("lxml.etree", "etree")
+
+# --- Optionale Abhängigkeit für die Batch-Filterung (ohne NumPy werden Listen verwendet) ---
+np = lazy_import("numpy", "np")
+
+# --- Optionale Abhängigkeit für den gemeinsamen Speicher in Redis ---
+redis = lazy_import("redis")
+
+# --- Optionale Brotli-Unterstützung ---
+# requests/urllib3 und aiohttp entpacken 'br' automatisch, sobald das Paket 'brotli' installiert ist.
+ACCEPT_ENCODING = "gzip, deflate, br" if module_installed("brotli") else "gzip, deflate"
+
 # --- Telegram Verfügbarkeit prüfen ---
 # Prüft, ob Tokens und Chat ID grundsätzlich gesetzt sind.
 TELEGRAM_ENABLED = bool(TELEGRAM_BOT_TOKENS and TELEGRAM_CHAT_ID and not TELEGRAM_CHAT_ID.startswith("YOUR_"))
@@ -136,492 +409,4169 @@ def save_json_file(data, filename):
                 logging.error(f"Konnte temporäre Speicherdatei '{temp_filename}' nicht löschen: {e_rem}")
 
 
-def load_seen_items(filename=SEEN_ITEMS_FILE):
-    """Lädt die URLs der bereits gesehenen Inserate als Set."""
-    content = load_json_file(filename, [])
-    seen_set = set(content) # Konvertiere Liste in Set für schnelle Lookups
-    logging.info(f"{len(seen_set)} bereits gesehene Inserate aus '{filename}' geladen.")
-    return seen_set
-
-def save_seen_items(seen_items_set, filename=SEEN_ITEMS_FILE):
-    """Speichert die URLs der gesehenen Inserate aus einem Set."""
-    save_json_file(list(seen_items_set), filename) # Konvertiere Set zurück in Liste für JSON
-    logging.debug(f"{len(seen_items_set)} gesehene Inserate in '{filename}' gespeichert.") # Debug statt Info
-
+# Numerische Inserate-ID als eigenes letztes Pfad-Segment (mind. 6 Ziffern). Zahlen am Ende eines Titels im Link
+# (z.B. '.../nike-air-max-90') sind keine ID: solche Links werden wie alle anderen über den Hash der URL erkannt.
+LISTING_ID_PATTERN = re.compile(r'.*/(\d{6,18})/?$')
+HASHED_ID_FLAG = 1 << 63 # Markiert IDs, die aus einem Hash der URL stammen (kein ID-Segment am Ende)
 
-# ==============================================================================
-# 4. HILFSFUNKTIONEN (Web Scraping / Datenextraktion)
-# ==============================================================================
 
-def extract_price(listing_div):
+def listing_id_from_url(url):
     """
-    Extrahiert den Preis aus einem Listing-Div.
-    Versucht robust, verschiedene Preisformate und CSS-Selektoren zu erkennen.
-    Gibt int (Preis), 0 (Gratis) oder None (nicht gefunden, VB, Anfrage) zurück.
+    Normalisiert eine Inserate-URL auf eine 64-bit Ganzzahl: die numerische Inserate-ID als letztes Pfad-Segment
+    (siehe LISTING_ID_PATTERN), sonst ein 63-bit Hash der ganzen URL mit gesetztem oberstem Bit.
+    Links weiterer Plattformen normalisiert deren Platform.listing_id (gleiche Nummern überschneiden sich so nicht).
     """
-    # Mögliche Selektoren für den Preis (robust gegen kleine Änderungen)
-    possible_price_selectors = [
-        'div.mui-style-1fhgjcy span.mui-style-1nqm73u', # Original Selektor
-        'span[class*="price"]', # Allgemeiner auf Span mit 'price' in Klasse
-        'div[class*="price"]'   # Allgemeiner auf Div mit 'price' in Klasse
-    ]
-    price_text = None
-    for selector in possible_price_selectors:
-        price_tag = listing_div.select_one(selector)
-        if price_tag and price_tag.text.strip():
-            price_text = price_tag.text.strip().lower()
-            logging.debug(f"      Preis-Text gefunden mit Selektor '{selector}': '{price_text}'")
-            break # Ersten gültigen Treffer verwenden
+    if len(PLATFORMS) > 1:
+        platform = platform_for_url(url)
+        if platform.name != DEFAULT_PLATFORM:
+            return platform.listing_id(url)
+    return native_listing_id(url)
 
-    if not price_text:
-        logging.debug("      Kein Preis-Text in den erwarteten Elementen gefunden.")
-        return None
 
-    # Prüfe auf spezielle Preisangaben
-    if 'gratis' in price_text:
-        logging.debug("      Preis als 'Gratis' erkannt.")
-        return 0
-    if any(keyword in price_text for keyword in ['anfrage', 'vb', 'verhandelbar', 'verhandlung']):
-        logging.debug("      Preis als 'Auf Anfrage' oder 'VB' erkannt.")
-        return None
+def native_listing_id(url):
+    """ID-Normalisierung der bisherigen Seite (siehe listing_id_from_url), ohne Zuordnung zu einer Plattform."""
+    path = url.split('?', 1)[0].split('#', 1)[0] if ('?' in url or '#' in url) else url
+    match = LISTING_ID_PATTERN.match(path)
+    if match:
+        return int(match.group(1))
+    digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') | HASHED_ID_FLAG
 
-    # Versuche, eine Zahl zu extrahieren (robust gegen Tausendertrennzeichen und Dezimalstellen)
-    # Entfernt zuerst alles Nicht-Ziffern ausser dem ersten Komma/Punkt
-    cleaned_for_regex = re.sub(r"[^\d,.]", "", price_text)
-    # Sucht nach dem numerischen Teil vor dem ersten Komma/Punkt
-    price_match = re.search(r'^(\d+)', cleaned_for_regex.replace(',', '.'))
 
-    if price_match:
-        price_str = price_match.group(1)
-        try:
-            price_int = int(price_str)
-            logging.debug(f"      Preis extrahiert: {price_int} CHF")
-            return price_int
-        except ValueError:
-            logging.warning(f"      Konnte extrahierten Preis-String '{price_str}' nicht in Zahl umwandeln (aus '{price_text}').")
-            return None
-    else:
-        logging.warning(f"      Konnte keine gültige Zahl aus dem Preis-Text '{price_text}' extrahieren.")
-        return None
+class BloomFilter:
+    """Einfacher Bloom-Filter für 64-bit IDs: 'nicht enthalten' ist sicher, 'enthalten' muss nachgeprüft werden."""
 
+    __slots__ = ("capacity", "size_bits", "hash_count", "bits")
 
-def extract_description(listing_div):
-    """Extrahiert die Kurzbeschreibung aus dem Listing-Div."""
-    possible_desc_selectors = [
-        'div.mui-style-xe4gv6 span.mui-style-1nqm73u', # Original spezifisch
-        'div.mui-style-xe4gv6',                      # Original Container
-        'p[class*="description"]',                   # Allgemeiner auf P mit 'description'
-        'div[class*="description"]'                  # Allgemeiner auf Div mit 'description'
-    ]
-    description = ""
-    for selector in possible_desc_selectors:
-        desc_tag = listing_div.select_one(selector)
-        if desc_tag and desc_tag.text.strip():
-            description = desc_tag.text.strip()
-            logging.debug(f"      Beschreibung gefunden mit Selektor '{selector}'.")
-            break # Ersten Treffer verwenden
-    if not description:
-        logging.debug("      Keine Beschreibung gefunden.")
-    return description
+    def __init__(self, capacity, false_positive_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.size_bits = max(64, int(-self.capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size_bits + 7) // 8)
 
+    @staticmethod
+    def _hashes(item_id):
+        # Double Hashing aus zwei Multiplikationen (ausreichend gut verteilt für IDs)
+        h1 = (item_id * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        h2 = (((item_id ^ (item_id >> 31)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF) | 1
+        return h1, h2
 
-# ==============================================================================
-# 5. FILTERFUNKTIONEN (Kategoriespezifisch)
-# ==============================================================================
+    def add(self, item_id):
+        h1, h2 = self._hashes(item_id)
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % self.size_bits
+            self.bits[position >> 3] |= 1 << (position & 7)
 
-def check_shoe_size(title, description, target_sizes):
-    """Prüft, ob eine der Ziel-Schuhgrössen in Titel oder Beschreibung vorkommt."""
-    if not target_sizes: return True # Kein Filter -> immer OK
-    text_to_check = (title + " " + description).lower()
-    target_sizes_lower = [str(s).lower().strip() for s in target_sizes] # Sicherstellen Strings, lower, kein Whitespace
+    def __contains__(self, item_id):
+        h1, h2 = self._hashes(item_id)
+        bits, size_bits = self.bits, self.size_bits
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % size_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False # Mindestens ein Bit fehlt -> sicher nicht enthalten
+        return True
 
-    for size_str in target_sizes_lower:
-        if not size_str: continue # Leere Grössen überspringen
-        # Regex sucht nach der Grösse als ganzes Wort, optional mit Präfix wie "Gr.", "EU", "Size" etc.
-        size_pattern = re.escape(size_str).replace(r'\ ', r'\s*') # Erlaube variable Leerzeichen
-        pattern = r'(?i)\b(?:gr\.?|eur?|size|eu|größe|grösse|groesse|us|uk|fr)?\s*' + size_pattern + r'\b(?![\d.]?[\d])'
 
-        if re.search(pattern, text_to_check):
-            logging.info(f"      -> Schuhgrössen-Filter: '{size_str.upper()}' gefunden!")
-            return True # Eine passende Grösse reicht
+SEEN_SNAPSHOT_MAGIC = b"GPSEEN01" # Kopf des binären Schnappschusses (danach die sortierten IDs)
 
-    logging.info(f"      -> Schuhgrössen-Filter: Keine der gesuchten Grössen ({', '.join(map(str,target_sizes))}) gefunden.")
-    return False
 
-def check_clothing_size(title, description, target_sizes):
-    """Prüft, ob eine der Ziel-Kleidergrössen (S, M, L etc.) in Titel oder Beschreibung vorkommt."""
-    if not target_sizes: return True # Kein Filter -> immer OK
-    text_to_check = (title + " " + description).lower()
-    target_sizes_lower = [str(s).lower().strip() for s in target_sizes] # Sicherstellen Strings, lower, kein Whitespace
+class CompactIdSet:
+    """
+    Kompaktes Set von 64-bit IDs: ein sortiertes array('Q') (8 Bytes pro Eintrag) plus ein kleines Delta-Set
+    für neue Einträge, das beim Überschreiten einer Grösse in das Array eingemischt wird.
+    Optional mit Bloom-Filter davor, damit unbekannte IDs ohne Suche im Array abgewiesen werden.
+    """
 
-    for size_str in target_sizes_lower:
-        if not size_str: continue # Leere Grössen überspringen
-        # Regex sucht nach der Grösse als ganzes Wort, optional mit Präfix wie "Size", "Gr."
-        pattern = r'(?i)\b(?:size|gr\.?|größe|grösse|groesse|taille|taglia)?\s*' + re.escape(size_str) + r'\b'
+    def __init__(self, ids=(), use_bloom_filter=False):
+        self._sorted = array('Q', sorted(set(ids)))
+        self._delta = set()
+        self._bloom = None
+        if use_bloom_filter:
+            self._rebuild_bloom()
 
-        if re.search(pattern, text_to_check):
-            logging.info(f"      -> Kleidergrössen-Filter: '{size_str.upper()}' gefunden!")
-            return True # Eine passende Grösse reicht
+    def _rebuild_bloom(self):
+        self._bloom = BloomFilter(max(2 * len(self), 100_000))
+        for item_id in self:
+            self._bloom.add(item_id)
 
-    logging.info(f"      -> Kleidergrössen-Filter: Keine der gesuchten Grössen ({', '.join(map(str,target_sizes))}) gefunden.")
-    return False
+    def __len__(self):
+        return len(self._sorted) + len(self._delta)
 
-def check_macbook_specs(title, description, target_specs):
-    """Prüft, ob eine der Ziel-Spezifikationen (z.B. Chip) in Titel oder Beschreibung vorkommt."""
-    if not target_specs: return True # Kein Filter -> immer OK
-    text_to_check = (title + " " + description).lower()
-    target_specs_lower = [str(s).lower().strip() for s in target_specs]
+    def __iter__(self):
+        """Alle IDs in aufsteigender Reihenfolge."""
+        if self._delta:
+            self._merge()
+        return iter(self._sorted)
 
-    for spec_str in target_specs_lower:
-        if not spec_str: continue
-        # Sucht nach der Spezifikation als ganzes Wort, z.B. "m1", nicht "m10"
-        pattern = r'\b' + re.escape(spec_str) + r'\b'
-        if re.search(pattern, text_to_check):
-            logging.info(f"      -> MacBook-Spezifikation: '{spec_str.upper()}' gefunden!")
-            return True # Eine passende Spezifikation reicht
+    def __contains__(self, item_id):
+        if self._bloom is not None and item_id not in self._bloom:
+            return False
+        if item_id in self._delta:
+            return True
+        index = bisect_left(self._sorted, item_id)
+        return index < len(self._sorted) and self._sorted[index] == item_id
 
-    logging.info(f"      -> MacBook-Spezifikation: Keine der gesuchten Specs ({', '.join(map(str,target_specs))}) gefunden.")
-    return False
+    def add(self, item_id):
+        """Fügt eine ID hinzu. Gibt True zurück, wenn sie neu war."""
+        if item_id in self:
+            return False
+        self._delta.add(item_id)
+        if self._bloom is not None:
+            self._bloom.add(item_id)
+            if len(self) > self._bloom.capacity: # Fehlerrate würde steigen -> grösser neu aufbauen
+                self._rebuild_bloom()
+        if len(self._delta) > max(4096, len(self._sorted) // 64):
+            self._merge()
+        return True
 
+    @classmethod
+    def from_snapshot(cls, filename, use_bloom_filter=False):
+        """Lädt ein mit write_snapshot() geschriebenes Set: ein einziges Einlesen des sortierten Arrays, kein Parsen."""
+        with open(filename, 'rb') as f:
+            if f.read(len(SEEN_SNAPSHOT_MAGIC)) != SEEN_SNAPSHOT_MAGIC:
+                raise ValueError("unbekanntes Format")
+            ids = array('Q')
+            ids.frombytes(f.read()) # ValueError, wenn die Datei abgeschnitten ist
+        if sys.byteorder != "little":
+            ids.byteswap()
+        id_set = cls()
+        id_set._sorted = ids
+        if use_bloom_filter:
+            id_set._rebuild_bloom()
+        return id_set
 
-# ==============================================================================
-# 6. BENACHRICHTIGUNGSFUNKTION (Telegram)
-# ==============================================================================
+    def write_snapshot(self, filename):
+        """Schreibt alle IDs sortiert (little-endian, 8 Bytes pro ID) in einen Schnappschuss, über eine temporäre Datei."""
+        if self._delta:
+            self._merge()
+        ids = self._sorted
+        if sys.byteorder != "little":
+            ids = array('Q', ids)
+            ids.byteswap()
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, 'wb') as f:
+            f.write(SEEN_SNAPSHOT_MAGIC)
+            ids.tofile(f)
+        os.replace(temp_filename, filename)
 
-def send_telegram_notification(item_title, item_url, price, item_name, priority=3):
-    """Sendet eine formatierte Nachricht über einen Fund an Telegram, basierend auf der Priorität."""
-    if not TELEGRAM_ENABLED:
-        if not hasattr(send_telegram_notification, "warning_logged"):
-             logging.warning("Telegram ist deaktiviert. Überspringe Benachrichtigung.")
-             send_telegram_notification.warning_logged = True
-        return
+    def _merge(self):
+        """
+        Mischt das Delta-Set linear in das sortierte Array ein: nur das Delta wird sortiert, die Abschnitte des
+        Arrays dazwischen werden am Stück kopiert (O(n + d log n) statt eines neuen Sortierens aller IDs).
+        """
+        merged = array('Q')
+        start = 0
+        for item_id in sorted(self._delta):
+            index = bisect_left(self._sorted, item_id, start)
+            merged.extend(self._sorted[start:index])
+            merged.append(item_id)
+            start = index
+        merged.extend(self._sorted[start:])
+        self._sorted = merged
+        self._delta = set()
 
-    # Wähle den Bot-Token basierend auf der Priorität. Fallback auf Prio 3.
-    bot_token = TELEGRAM_BOT_TOKENS.get(str(priority), TELEGRAM_BOT_TOKENS.get('3'))
 
-    # Preis formatieren
-    if price is None: price_str = "Preis unbekannt"
-    elif price == 0: price_str = "Gratis"
-    else: price_str = f"{price} CHF"
+class SeenUrlIndex:
+    """
+    Gesehene Inserate im Speicher, normalisiert auf ihre Inserate-ID (siehe listing_id_from_url).
+    Verhält sich für 'in', add() und len() wie das bisherige Set von URLs, braucht aber nur ~8 Bytes pro Eintrag.
+    """
 
-    # HTML Escaping für Sicherheit und korrekte Darstellung
-    escaped_title = html.escape(item_title)
-    escaped_price = html.escape(price_str)
-    escaped_url = html.escape(item_url)
+    def __init__(self, ids=(), use_bloom_filter=SEEN_ITEMS_BLOOM_FILTER):
+        self.ids = CompactIdSet(ids, use_bloom_filter)
+        self.price_alerts = {} # Inserate-ID -> zuletzt gemeldeter Preis einer Preissenkung (nur im Speicher)
+        self.cross_posts = set() # Fundstellen für CROSS_POST_DEDUP (siehe cross_post_key, nur im Speicher)
 
-    message_text = (
-        f"[{escaped_title}]:\n"
-        f"[{escaped_price}]\n\n"
-        f"{escaped_url}"
-    )
+    @classmethod
+    def from_snapshot(cls, filename, use_bloom_filter=SEEN_ITEMS_BLOOM_FILTER):
+        """Lädt den Index aus einem binären Schnappschuss (siehe CompactIdSet.write_snapshot)."""
+        seen_index = cls(use_bloom_filter=False)
+        seen_index.ids = CompactIdSet.from_snapshot(filename, use_bloom_filter)
+        return seen_index
 
-    telegram_api_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    def __contains__(self, url):
+        return listing_id_from_url(url) in self.ids
 
-    payload = {
-        'chat_id': TELEGRAM_CHAT_ID,
-        'text': message_text,
-        'parse_mode': 'HTML',
-        'disable_web_page_preview': False # Zeigt eine Vorschau des Links an
-    }
+    def contains_many(self, urls):
+        """Gibt für jede URL zurück, ob das Inserat bekannt ist (wie 'in', für eine ganze Seite auf einmal)."""
+        ids = self.ids
+        return [listing_id_from_url(url) in ids for url in urls]
 
-    try:
-        logging.info(f"Sende Telegram Nachricht für '{item_name}': '{item_title}'")
-        response = requests.post(telegram_api_url, data=payload, timeout=15) # Timeout für Senden
-        response.raise_for_status()  # Löst HTTPError bei Fehlern wie 4xx/5xx aus
-        response_data = response.json()
+    def __len__(self):
+        return len(self.ids)
 
-        if response_data.get('ok'):
-            logging.info("  -> Telegram Nachricht erfolgreich gesendet.")
-        else:
-            # Detailliertere Fehlermeldung von Telegram loggen
-            error_desc = response_data.get('description', 'Keine Beschreibung')
-            error_code = response_data.get('error_code', 'N/A')
-            logging.error(f"  -> Telegram API Fehler (Code {error_code}): {error_desc}. Payload: {payload}")
-    except requests.exceptions.Timeout:
-         logging.error(f"  -> Timeout Fehler beim Senden der Telegram Nachricht für: {item_url}.")
-    except requests.exceptions.HTTPError as e:
-         logging.error(f"  -> HTTP Fehler beim Senden der Telegram Nachricht: {e.response.status_code} - {e.response.text}")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"  -> Netzwerkfehler beim Senden der Telegram Nachricht: {e}")
-    except Exception as e:
-        logging.error(f"  -> Unerwarteter Fehler beim Senden der Telegram Nachricht für {item_url}: {e}", exc_info=True)
+    def add(self, url):
+        self.ids.add(listing_id_from_url(url))
 
+    def claim(self, url):
+        """Merkt sich ein Inserat. Gibt True zurück, wenn es vorher unbekannt war (d.h. jetzt gemeldet werden darf)."""
+        item_id = listing_id_from_url(url)
+        if item_id in self.ids:
+            return False
+        self.ids.add(item_id)
+        return True
 
-# ==============================================================================
-# 7. KERNLOGIK: Inserate prüfen für einen Suchbegriff
-# ==============================================================================
+    def claim_price_drop(self, url, price):
+        """Gibt True zurück, wenn für dieses Inserat noch keine Preissenkung auf diesen oder einen tieferen Preis gemeldet wurde."""
+        item_id = listing_id_from_url(url)
+        if item_id in self.price_alerts and self.price_alerts[item_id] <= price:
+            return False
+        self.price_alerts[item_id] = price
+        return True
 
-def check_single_search_term(search_term, item_config, seen_items_set):
+    def add_cross_post(self, key):
+        """Merkt sich eine Fundstelle (siehe cross_post_key), getrennt von den gesehenen Inseraten."""
+        self.cross_posts.add(key)
+
+    def has_cross_post(self, keys):
+        """Gibt True zurück, wenn eine der Fundstellen 'keys' bekannt ist."""
+        return not self.cross_posts.isdisjoint(keys)
+
+
+def load_seen_items(filename=SEEN_ITEMS_FILE, snapshot_filename=SEEN_ITEMS_SNAPSHOT_FILE):
     """
-    Prüft gebrauchtplatformen.ch für EINEN spezifischen Suchbegriff und die zugehörige Item-Konfiguration.
-    Extrahiert Inserate, filtert sie nach Preis und ggf. Grösse, sendet Benachrichtigungen.
-    Gibt True zurück, wenn neue passende Inserate gefunden wurden, sonst False.
+    Lädt die bereits gesehenen Inserate (URLs oder IDs) als kompakten ID-Index. Mit SEEN_ITEMS_SNAPSHOT aus dem
+    binären Schnappschuss, ausser die JSON-Datei ist neuer (dann wird sie übernommen).
     """
-    item_name = item_config.get("name", "Unbenanntes Item")
-    item_type = item_config.get("type", "global").lower() # Typ bestimmt spezielle Filter
-    max_price = item_config.get("max_price")
-    target_sizes = SIZE_FILTERS_BY_TYPE.get(item_type, []) # Hole Grössen aus der globalen Konfig
-    priority = item_config.get("priority", 3) # Hole Priorität, Standard ist 3 (unwichtig)
+    if SEEN_ITEMS_SNAPSHOT and os.path.exists(snapshot_filename) and not (
+            os.path.exists(filename) and os.path.getmtime(filename) > os.path.getmtime(snapshot_filename)):
+        try:
+            seen_index = SeenUrlIndex.from_snapshot(snapshot_filename)
+            logging.info(f"{len(seen_index)} bereits gesehene Inserate aus '{snapshot_filename}' geladen.")
+            return seen_index
+        except (OSError, ValueError) as e:
+            logging.error(f"Schnappschuss '{snapshot_filename}' nicht lesbar ({e}). Lade '{filename}'.")
+    content = load_json_file(filename, [])
+    seen_index = SeenUrlIndex(item if isinstance(item, int) else listing_id_from_url(item) for item in content)
+    logging.info(f"{len(seen_index)} bereits gesehene Inserate aus '{filename}' geladen.")
+    return seen_index
 
-    # --- Eingabevalidierung für die Konfiguration ---
-    if max_price is None:
-        logging.error(f"FEHLER in Konfiguration für '{item_name}': Kein 'max_price' definiert. Überspringe Suche für '{search_term}'.")
-        return False
-    try:
-        max_price = int(max_price)
-        if max_price < 0: raise ValueError("Preis muss positiv sein.")
-    except (ValueError, TypeError):
-         logging.error(f"FEHLER in Konfiguration für '{item_name}': Ungültiger 'max_price' ({max_price}). Muss eine positive ganze Zahl sein. Überspringe Suche für '{search_term}'.")
-         return False
+def saves_per_cycle(seen_items_set):
+    """
+    Wird nur einmal pro Durchlauf (und beim Beenden) gespeichert statt nach jedem Fund? So beim binären
+    Schnappschuss, der bei jedem Speichern ganz neu geschrieben wird.
+    """
+    return SEEN_ITEMS_SNAPSHOT and isinstance(seen_items_set, SeenUrlIndex)
 
-    logging.info(f"---> Suche nach '{search_term}' (für Item: '{item_name}', Typ: {item_type}, MaxPreis: {max_price}, Größen: {target_sizes or 'N/A'})")
 
-    # --- URL bauen und Seite abrufen ---
-    encoded_search_term = quote_plus(search_term) # URL-Encoding für Suchbegriffe
-    search_url = f"{BASE_URL}/de/q?query={encoded_search_term}"
-    logging.info(f"  URL: {search_url}")
+def save_seen_items(seen_items_set, filename=SEEN_ITEMS_FILE, snapshot_filename=SEEN_ITEMS_SNAPSHOT_FILE):
+    """Speichert die IDs der gesehenen Inserate (oder schreibt die neuen Einträge des SQLite-Stores)."""
+    with METRICS.timer("persist"):
+        _save_seen_items(seen_items_set, filename, snapshot_filename)
 
-    try:
-        response = requests.get(search_url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status() # Fehler bei Status Codes >= 400
-        logging.debug(f"    Seite für '{search_term}' erfolgreich geladen (Status: {response.status_code}).")
-    except requests.exceptions.Timeout:
-         logging.error(f"    Timeout ({REQUEST_TIMEOUT}s) beim Laden der Seite für '{search_term}'.")
-         return False
-    except requests.exceptions.HTTPError as e:
-         logging.error(f"    HTTP Fehler {e.response.status_code} beim Laden der Seite für '{search_term}'.")
-         return False
-    except requests.exceptions.RequestException as e:
-        logging.error(f"    Netzwerkfehler beim Laden der Seite für '{search_term}': {e}")
-        return False
-    except Exception as e:
-        logging.error(f"    Unerwarteter Fehler beim Seitenabruf für '{search_term}': {e}", exc_info=True)
-        return False
 
-    # --- HTML parsen und Inserate finden ---
-    soup = BeautifulSoup(response.text, 'html.parser')
-    listing_selector = 'div.mui-style-qlw8p1'
-    listings = soup.select(listing_selector)
-    logging.info(f"    {len(listings)} potenzielle Inserate-Elemente mit Selektor '{listing_selector}' gefunden.")
+def _save_seen_items(seen_items_set, filename, snapshot_filename):
+    if isinstance(seen_items_set, (SqliteSeenStore, RedisSeenStore)):
+        seen_items_set.flush() # Nur neue Einträge anhängen
+        logging.debug(f"{len(seen_items_set)} gesehene Inserate in '{seen_items_set.db_filename}' gespeichert.")
+        return
+    if SEEN_ITEMS_SNAPSHOT:
+        try:
+            seen_items_set.ids.write_snapshot(snapshot_filename)
+        except OSError as e:
+            logging.error(f"Fehler beim Speichern des Schnappschusses '{snapshot_filename}': {e}")
+            return
+        logging.debug(f"{len(seen_items_set)} gesehene Inserate in '{snapshot_filename}' gespeichert.")
+        return
+    save_json_file(list(seen_items_set.ids), filename) # Sortierte Liste der IDs für JSON
+    logging.debug(f"{len(seen_items_set)} gesehene Inserate in '{filename}' gespeichert.") # Debug statt Info
 
-    if not listings:
-        # Zusätzliche Prüfung auf "Keine Ergebnisse"-Nachricht
-        no_results_tag = soup.find(lambda tag: tag.name in ['div', 'p', 'h3', 'span'] and 'keine resultate' in tag.get_text(strip=True).lower())
-        if no_results_tag:
-            logging.info(f"    Keine Inserate gefunden (Bestätigung auf der Seite).")
-        else:
-            logging.warning(f"    Keine Inserate mit Selektor '{listing_selector}' gefunden und keine 'Keine Resultate'-Meldung. Seitenstruktur möglicherweise geändert?")
-        return False # Keine Inserate -> keine neuen Funde
 
-    # --- Inserate einzeln verarbeiten ---
-    new_items_found_count = 0
-    processed_urls_in_this_run = set() # Verhindert doppelte Verarbeitung innerhalb desselben Laufs
+def _to_signed_id(item_id):
+    """SQLite speichert vorzeichenbehaftete 64-bit Zahlen: IDs mit gesetztem oberstem Bit werden negativ abgelegt."""
+    return item_id - (1 << 64) if item_id & HASHED_ID_FLAG else item_id
 
-    for i, listing_div in enumerate(listings):
-        logging.debug(f"    Verarbeite potenzielles Inserat #{i+1}...")
 
-        # --- Link und Titel extrahieren (möglichst robust) ---
-        item_title = "N/A"
-        item_url = None
-        link_tag = None
+class SqliteSeenStore:
+    """
+    Speicher für gesehene Inserate in einer SQLite-Datenbank (WAL-Modus), pro Inserat nur die ID (siehe
+    listing_id_from_url) und der Zeitpunkt des ersten Sehens. Neue Einträge werden angehängt statt die ganze
+    Datei neu zu schreiben, Lookups laufen über den Primärschlüssel, und es wird nichts komplett in den Speicher
+    geladen (ausser optional ein Bloom-Filter). Alte Einträge können per TTL gelöscht werden.
+    Verhält sich für 'in', add() und len() wie ein Set von URLs.
+    Mit 'shared' teilen sich mehrere Prozesse die Datenbank: claim() schreibt sofort, und die Anzahl wird gezählt
+    statt aus dem eigenen Zähler genommen (andere Instanzen fügen ebenfalls ein).
+    """
 
-        possible_link_selectors = [
-            'a[href^="/de/vi/"]', # Haupt-Link des Inserats
-            'h2 a[href^="/de/vi/"]' # Link innerhalb des Titels
-        ]
-        for selector in possible_link_selectors:
-            link_tag = listing_div.select_one(selector)
-            if link_tag and link_tag.get('href'):
-                href = link_tag['href']
-                item_url = f"{BASE_URL}{href}"
-                # Titel aus verschiedenen Quellen versuchen
-                title_tag = listing_div.find('h2')
-                item_title = title_tag.text.strip() if title_tag else link_tag.text.strip()
-                if not item_title: # Fallback: Alt-Text eines Bildes
-                    img_tag = link_tag.find('img', alt=True)
-                    if img_tag: item_title = img_tag['alt'].strip()
-                item_title = item_title or f"Inserat {i+1} (Titel nicht extrahierbar)" # Absoluter Fallback
-                logging.debug(f"      Link und Titel gefunden (Selector '{selector}'): '{item_title}' -> {item_url}")
-                break # Ersten gültigen Link verwenden
-
-        if not item_url:
-             external_link = listing_div.find('a', href=lambda h: h and ('ricardo.ch' in h or 'anibis.ch' in h))
-             if external_link:
-                  logging.debug(f"      Inserat #{i+1} ist ein externer Link ({external_link['href']}). Überspringe.")
-             else:
-                  logging.warning(f"      Konnte keinen gültigen Inserats-Link im Element #{i+1} finden. Überspringe.")
-             continue # Nächstes Listing
+    def __init__(self, db_filename=SEEN_ITEMS_DB_FILE, json_filename=SEEN_ITEMS_FILE, use_bloom_filter=SEEN_ITEMS_BLOOM_FILTER, shared=False):
+        self.db_filename = db_filename
+        self.shared = shared
+        self._connection = sqlite3.connect(db_filename, timeout=30) # Wartet auf die Schreibsperre anderer Instanzen
+        self._connection.execute("PRAGMA journal_mode=WAL")   # Anhängen ins Write-Ahead-Log, absturzsicher
+        self._connection.execute("PRAGMA synchronous=NORMAL") # Im WAL-Modus trotzdem konsistent nach Absturz
+        self._connection.execute("CREATE TABLE IF NOT EXISTS seen_ids (listing_id INTEGER PRIMARY KEY, first_seen REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS seen_ids_first_seen ON seen_ids (first_seen)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS price_alerts (listing_id INTEGER PRIMARY KEY, price REAL NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS cross_posts (key TEXT PRIMARY KEY, first_seen REAL NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._connection.commit()
 
-        # --- Prüfen, ob schon bekannt oder doppelt in diesem Lauf ---
-        if item_url in seen_items_set:
-            logging.debug(f"      Inserat '{item_title}' ({item_url}) ist bereits bekannt. Überspringe.")
-            continue
-        if item_url in processed_urls_in_this_run:
-            logging.debug(f"      Inserat '{item_title}' ({item_url}) wurde in diesem Durchlauf bereits verarbeitet. Überspringe Duplikat.")
-            continue
+        count = self._get_meta("count")
+        self._count = int(count) if count is not None else self._connection.execute("SELECT COUNT(*) FROM seen_ids").fetchone()[0]
+        self._import_json(json_filename)
 
-        # === Neues, potenzielles Inserat gefunden! ===
-        logging.info(f"    >> Neues potenzielles Inserat gefunden: '{item_title}'")
-        logging.info(f"       URL: {item_url}")
-        processed_urls_in_this_run.add(item_url) # Markieren als in diesem Lauf gesehen
+        self._bloom = None
+        if use_bloom_filter:
+            self._rebuild_bloom()
 
-        # --- Kriterien prüfen ---
-        passes_filters = True # Annahme: Passt, bis ein Filter fehlschlägt
+    def _get_meta(self, key):
+        row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
 
-        # 1. Preis extrahieren und prüfen
-        price = extract_price(listing_div)
-        logging.info(f"      Prüfe Preis (Max: {max_price} CHF)...")
-        if price is None:
-            passes_filters = False
-            logging.info(f"      -> Preisfilter FEHLGESCHLAGEN: Preis nicht extrahierbar oder 'Auf Anfrage'/'VB'.")
-        elif price > max_price:
-            passes_filters = False
-            logging.info(f"      -> Preisfilter FEHLGESCHLAGEN: Preis ({price} CHF) ist zu hoch (Max: {max_price} CHF).")
-        else:
-            logging.info(f"      -> Preis ({price if price is not None else 'N/A'} CHF) OK!")
-
-        # 2. Spezifischer Grössen-Filter (nur wenn Preis passt und Filter nötig)
-        if passes_filters and item_type in ["shoes", "clothing", "macbook"] and target_sizes:
-            description = extract_description(listing_div)
-            logging.debug(f"      Extrahierte Beschreibung (für Grössenfilter): '{description[:100]}...'") # Log nur Anfang
-
-            size_check_function = None
-            if item_type == "shoes": size_check_function = check_shoe_size
-            elif item_type == "clothing": size_check_function = check_clothing_size
-            elif item_type == "macbook": size_check_function = check_macbook_specs
-
-            if size_check_function:
-                logging.info(f"      Prüfe Grössenfilter ({item_type}): {target_sizes}")
-                if not size_check_function(item_title, description, target_sizes):
-                    passes_filters = False
-                    logging.info(f"      -> Grössenfilter FEHLGESCHLAGEN.")
-                else:
-                     logging.info(f"      -> Grössenfilter OK!")
+    def _set_meta(self, key, value):
+        self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
 
-        # --- Ergebnis verarbeiten ---
-        if passes_filters:
-            new_items_found_count += 1
-            console_message = (
-                f"\n✅ TREFFER! (Für Item: '{item_name}' / Suchbegriff: '{search_term}')\n"
-                f"   Titel: {item_title}\n"
-                f"   Preis: {price if price is not None else 'N/A'} CHF (Max: {max_price} CHF)\n"
-                f"   URL: {item_url}"
-            )
-            if item_type in ["shoes", "clothing"] and target_sizes:
-                console_message += f"\n   (Grössenfilter aktiv: {', '.join(map(str,target_sizes))})"
+    def _insert_many(self, rows):
+        """Fügt (ID, first_seen)-Paare ein, ignoriert bekannte IDs. Gibt die Anzahl neuer Einträge zurück."""
+        before = self._connection.total_changes
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO seen_ids (listing_id, first_seen) VALUES (?, ?)",
+            ((_to_signed_id(item_id), first_seen) for item_id, first_seen in rows),
+        )
+        inserted = self._connection.total_changes - before
+        self._count += inserted
+        return inserted
 
-            # Farbige Ausgabe in der Konsole
-            print("\033[92m" + "="*70 + "\033[0m") # Grüner Trenner
-            print(console_message)
-            print("\033[92m" + "="*70 + "\033[0m") # Grüner Trenner
+    def _import_json(self, json_filename):
+        """Übernimmt einmalig die Einträge aus einer bestehenden seen_items.json (die Datei bleibt unverändert liegen)."""
+        if self._get_meta("json_imported") or not json_filename or not os.path.exists(json_filename):
+            return
+        content = load_json_file(json_filename, [])
+        imported_at = os.path.getmtime(json_filename) # Genauer ist der erste Zeitpunkt nicht bekannt
+        imported = self._insert_many(
+            (item if isinstance(item, int) else listing_id_from_url(item), imported_at) for item in content
+        )
+        self._set_meta("json_imported", json_filename)
+        self.flush()
+        logging.info(f"{imported} gesehene Inserate aus '{json_filename}' in '{self.db_filename}' übernommen.")
 
-            # Benachrichtigung senden und als gesehen markieren
-            send_telegram_notification(item_title, item_url, price, item_name, priority)
-            seen_items_set.add(item_url)
-        else:
-            logging.info(f"    -- Inserat '{item_title}' passt nicht zu allen Kriterien für '{item_name}'.")
+    def _rebuild_bloom(self):
+        self._bloom = BloomFilter(max(2 * self._count, 100_000))
+        for (signed_id,) in self._connection.execute("SELECT listing_id FROM seen_ids"):
+            self._bloom.add(signed_id & 0xFFFFFFFFFFFFFFFF)
 
-    # --- Abschluss für diesen Suchbegriff ---
-    if new_items_found_count > 0:
-         logging.info(f"---> {new_items_found_count} neue(s) passende(s) Inserat(e) für Suchbegriff '{search_term}' gefunden und verarbeitet.")
-         return True # Signalisiert, dass etwas Neues gefunden wurde
-    else:
+    def __contains__(self, url):
+        item_id = listing_id_from_url(url)
+        if self._bloom is not None and item_id not in self._bloom:
+            return False # Sicher unbekannt, keine Datenbankabfrage nötig
+        return self._connection.execute("SELECT 1 FROM seen_ids WHERE listing_id = ?", (_to_signed_id(item_id),)).fetchone() is not None
+
+    def contains_many(self, urls):
+        """Wie 'in' für eine ganze Seite: eine Abfrage pro 500 Inserate statt einer pro Inserat."""
+        item_ids = [listing_id_from_url(url) for url in urls]
+        signed_ids = [_to_signed_id(item_id) for item_id in item_ids]
+        candidates = [signed_id for item_id, signed_id in zip(item_ids, signed_ids)
+                      if self._bloom is None or item_id in self._bloom] # Sicher unbekannte gar nicht abfragen
+        known = set()
+        for start in range(0, len(candidates), 500): # SQLite begrenzt die Anzahl Parameter pro Abfrage
+            chunk = candidates[start:start + 500]
+            rows = self._connection.execute(f"SELECT listing_id FROM seen_ids WHERE listing_id IN ({','.join('?' * len(chunk))})", chunk)
+            known.update(signed_id for (signed_id,) in rows)
+        return [signed_id in known for signed_id in signed_ids]
+
+    def __len__(self):
+        if self.shared:
+            return self._connection.execute("SELECT COUNT(*) FROM seen_ids").fetchone()[0]
+        return self._count
+
+    def add(self, url, first_seen=None):
+        """Merkt sich ein Inserat (ohne Wirkung, wenn es schon bekannt ist). Dauerhaft erst nach flush()."""
+        item_id = listing_id_from_url(url)
+        self._insert_many([(item_id, time() if first_seen is None else first_seen)])
+        if self._bloom is not None:
+            self._bloom.add(item_id)
+            if self._count > self._bloom.capacity: # Fehlerrate würde steigen -> grösser neu aufbauen
+                self._rebuild_bloom()
+
+    def claim(self, url):
+        """
+        Merkt sich ein Inserat und gibt True zurück, wenn es vorher unbekannt war. Der Eintrag wird vor dem Melden
+        geschrieben: Zwei Instanzen können dasselbe Inserat nicht beide beanspruchen, und nach einem Absturz wird
+        es nicht erneut gemeldet.
+        """
+        item_id = listing_id_from_url(url)
+        claimed = self._insert_many([(item_id, time())]) == 1
+        if self.shared:
+            self._connection.commit()
+        if claimed and self._bloom is not None:
+            self._bloom.add(item_id)
+        return claimed
+
+    def claim_price_drop(self, url, price):
+        """Gibt True zurück, wenn für dieses Inserat noch keine Preissenkung auf diesen oder einen tieferen Preis gemeldet wurde."""
+        before = self._connection.total_changes
+        self._connection.execute(
+            "INSERT INTO price_alerts (listing_id, price) VALUES (?, ?) "
+            "ON CONFLICT (listing_id) DO UPDATE SET price = excluded.price WHERE excluded.price < price_alerts.price",
+            (_to_signed_id(listing_id_from_url(url)), price),
+        )
+        if self.shared:
+            self._connection.commit()
+        return self._connection.total_changes > before
+
+    def add_cross_post(self, key):
+        """Merkt sich eine Fundstelle (siehe cross_post_key) in einer eigenen Tabelle, nicht bei den gesehenen Inseraten."""
+        self._connection.execute("INSERT OR IGNORE INTO cross_posts (key, first_seen) VALUES (?, ?)", (key, time()))
+        if self.shared:
+            self._connection.commit()
+
+    def has_cross_post(self, keys):
+        """Gibt True zurück, wenn eine der Fundstellen 'keys' bekannt ist."""
+        if not keys:
+            return False
+        return self._connection.execute(f"SELECT 1 FROM cross_posts WHERE key IN ({','.join('?' * len(keys))}) LIMIT 1", keys).fetchone() is not None
+
+    def flush(self):
+        """Schreibt alle neuen Einträge dauerhaft (eine kleine Transaktion statt Neuschreiben der ganzen Datei)."""
+        if not self.shared: # Den Zähler teilen sich sonst mehrere Instanzen
+            self._set_meta("count", self._count)
+        self._connection.commit()
+
+    def evict_older_than(self, max_age_seconds):
+        """Löscht Einträge, die zuerst vor mehr als max_age_seconds gesehen wurden. Gibt die Anzahl zurück."""
+        evicted = self._connection.execute("DELETE FROM seen_ids WHERE first_seen < ?", (time() - max_age_seconds,)).rowcount
+        self._count -= evicted
+        self._connection.execute("DELETE FROM cross_posts WHERE first_seen < ?", (time() - max_age_seconds,))
+        self.flush()
+        return evicted # Der Bloom-Filter behält die IDs bis zum nächsten Neuaufbau (nur mehr Nachprüfungen)
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+
+class RedisSeenStore:
+    """
+    Gemeinsamer Speicher für gesehene Inserate in Redis, für mehrere Instanzen auf verschiedenen Rechnern.
+    Gesehene Inserate liegen in einem Sorted Set (Inserate-ID -> Zeitpunkt des ersten Sehens), gemeldete
+    Preissenkungen in einem zweiten (Inserate-ID -> Preis) und die Fundstellen für CROSS_POST_DEDUP in einem
+    dritten (Schlüssel -> Zeitpunkt). Jede Beanspruchung ist ein einzelner atomarer Befehl.
+    Verhält sich für 'in', add() und len() wie ein Set von URLs.
+    """
+
+    def __init__(self, url=REDIS_URL, key_prefix=REDIS_KEY_PREFIX):
+        self.db_filename = url # Für Log-Ausgaben wie beim SQLite-Store
+        self._client = redis.Redis.from_url(url)
+        self._seen_key = f"{key_prefix}:seen_ids"
+        self._price_key = f"{key_prefix}:price_alerts"
+        self._cross_post_key = f"{key_prefix}:cross_posts"
+
+    def __contains__(self, url):
+        return self._client.zscore(self._seen_key, listing_id_from_url(url)) is not None
+
+    def contains_many(self, urls):
+        """Wie 'in' für eine ganze Seite, mit einem einzigen Befehl (ZMSCORE)."""
+        if not urls:
+            return []
+        return [score is not None for score in self._client.zmscore(self._seen_key, [listing_id_from_url(url) for url in urls])]
+
+    def __len__(self):
+        return self._client.zcard(self._seen_key)
+
+    def add(self, url, first_seen=None):
+        self._client.zadd(self._seen_key, {listing_id_from_url(url): time() if first_seen is None else first_seen}, nx=True)
+
+    def claim(self, url):
+        """Merkt sich ein Inserat und gibt True zurück, wenn es vorher unbekannt war (siehe SqliteSeenStore.claim)."""
+        return self._client.zadd(self._seen_key, {listing_id_from_url(url): time()}, nx=True) == 1
+
+    def claim_price_drop(self, url, price):
+        """Gibt True zurück, wenn für dieses Inserat noch keine Preissenkung auf diesen oder einen tieferen Preis gemeldet wurde."""
+        return self._client.zadd(self._price_key, {listing_id_from_url(url): price}, lt=True, ch=True) == 1 # LT: nur tiefere Preise
+
+    def add_cross_post(self, key):
+        """Merkt sich eine Fundstelle (siehe cross_post_key), getrennt von den gesehenen Inseraten."""
+        self._client.zadd(self._cross_post_key, {key: time()}, nx=True)
+
+    def has_cross_post(self, keys):
+        """Gibt True zurück, wenn eine der Fundstellen 'keys' bekannt ist."""
+        return bool(keys) and any(score is not None for score in self._client.zmscore(self._cross_post_key, keys))
+
+    def flush(self):
+        pass # Redis schreibt jeden Befehl sofort
+
+    def evict_older_than(self, max_age_seconds):
+        """Löscht Einträge, die zuerst vor mehr als max_age_seconds gesehen wurden. Gibt die Anzahl zurück."""
+        self._client.zremrangebyscore(self._cross_post_key, "-inf", time() - max_age_seconds)
+        return self._client.zremrangebyscore(self._seen_key, "-inf", time() - max_age_seconds)
+
+    def close(self):
+        self._client.close()
+
+
+def open_seen_items():
+    """
+    Öffnet den Speicher für gesehene Inserate gemäss SEEN_ITEMS_BACKEND (SQLite-Store, Redis oder Set aus der JSON-Datei).
+    Mit SHARD_COUNT > 1 wird der SQLite-Store im gemeinsamen Modus geöffnet.
+    """
+    if SEEN_ITEMS_BACKEND == "redis":
+        if redis is not None:
+            seen_store = RedisSeenStore(REDIS_URL)
+            logging.info(f"{len(seen_store)} bereits gesehene Inserate in Redis ({REDIS_URL}).")
+            return seen_store
+        logging.warning("SEEN_ITEMS_BACKEND 'redis' benötigt das Paket 'redis' (pip install redis). Verwende SQLite.")
+    if SEEN_ITEMS_BACKEND in ("sqlite", "redis"):
+        seen_store = SqliteSeenStore(SEEN_ITEMS_DB_FILE, SEEN_ITEMS_FILE, shared=SHARD_COUNT > 1)
+        logging.info(f"{len(seen_store)} bereits gesehene Inserate in '{SEEN_ITEMS_DB_FILE}'.")
+        return seen_store
+    if SHARD_COUNT > 1 and not hasattr(open_seen_items, "warning_logged"):
+        logging.warning("SEEN_ITEMS_BACKEND 'json' ist nicht zwischen Instanzen geteilt: Treffer können mehrfach gemeldet werden.")
+        open_seen_items.warning_logged = True
+    return load_seen_items(SEEN_ITEMS_FILE, SEEN_ITEMS_SNAPSHOT_FILE)
+
+
+def evict_expired_seen_items(seen_items):
+    """
+    Löscht gesehene Inserate, die älter als SEEN_ITEMS_TTL_DAYS sind (nur mit SQLite oder Redis).
+    Bei mehreren Instanzen räumt nur die erste den gemeinsamen Speicher auf.
+    """
+    if SEEN_ITEMS_TTL_DAYS is None or not isinstance(seen_items, (SqliteSeenStore, RedisSeenStore)) or SHARD_INDEX != 0:
+        return
+    evicted = seen_items.evict_older_than(SEEN_ITEMS_TTL_DAYS * 86400)
+    if evicted:
+        logging.info(f"{evicted} gesehene Inserate älter als {SEEN_ITEMS_TTL_DAYS} Tage entfernt.")
+
+
+# ==============================================================================
+# 4. METRIKEN (Zeitmessung pro Verarbeitungsstufe)
+# ==============================================================================
+
+METRIC_STAGES = ( # Reihenfolge für die Zusammenfassung im Log
+    "http_dns", "http_connect", "http_ttfb", "http_download", "extract_json", "extract_dom", "parse", "extract",
+    "seen_lookup", "filter", "notify", "notify_send", "persist",
+)
+
+_METRIC_LABELS = contextvars.ContextVar("metric_labels", default=(None, None)) # (Suchbegriff, Profil) der laufenden Verarbeitung
+
+
+class StageMetrics:
+    """
+    Zeitmessung und Zähler pro Verarbeitungsstufe, aufgeschlüsselt nach Suchbegriff und Profil.
+    Die Labels kommen aus dem Kontext (siehe labels()), damit tiefere Schichten wie HTTP oder Parser
+    nichts über Suchbegriffe wissen müssen. Thread-sicher (der Telegram-Versand misst aus eigenen Threads).
+    Optional wird jede Messung als JSON-Zeile in METRICS_RECORD_FILE geschrieben.
+    """
+
+    def __init__(self, buckets=METRICS_BUCKETS, record_file=METRICS_RECORD_FILE):
+        self.buckets = tuple(buckets)
+        self._histograms = {} # (Stufe, Suchbegriff, Profil) -> [Zähler pro Bucket..., Summe, Anzahl]
+        self._counters = {}   # (Ereignis, Suchbegriff, Profil) -> Anzahl
+        self._lock = threading.Lock()
+        self._last_totals = {}
+        self._record_file = open(record_file, 'a', encoding='utf-8') if record_file else None
+
+    def labels(self, term=None, profile=None):
+        """Kontextmanager: setzt Suchbegriff und/oder Profil für alle Messungen innerhalb des Blocks."""
+        current_term, current_profile = _METRIC_LABELS.get()
+        return _MetricLabels((term if term is not None else current_term, profile if profile is not None else current_profile))
+
+    def observe(self, stage, seconds):
+        """Erfasst eine Dauer (Sekunden) für eine Stufe."""
+        if not METRICS_ENABLED:
+            return
+        term, profile = _METRIC_LABELS.get()
+        key = (stage, term, profile)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+            if self._record_file is not None:
+                self._record_file.write(json.dumps({"ts": round(time(), 3), "stage": stage, "seconds": round(seconds, 6),
+                                                    "term": term, "profile": profile}, ensure_ascii=False) + "\n")
+
+    def count(self, event, amount=1):
+        """Erhöht einen Zähler (z.B. geprüfte Inserate, Treffer)."""
+        if not METRICS_ENABLED:
+            return
+        term, profile = _METRIC_LABELS.get()
+        key = (event, term, profile)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def timer(self, stage):
+        """Kontextmanager, der die Dauer des Blocks als 'stage' erfasst."""
+        return _StageTimer(self, stage)
+
+    def flush(self):
+        if self._record_file is not None:
+            with self._lock:
+                self._record_file.flush()
+
+    def stage_totals(self):
+        """Summierte Dauer pro Stufe über alle Suchbegriffe und Profile."""
+        totals = {}
+        with self._lock:
+            for (stage, _, _), histogram in self._histograms.items():
+                totals[stage] = totals.get(stage, 0.0) + histogram[-2]
+        return totals
+
+    def stats_summary(self):
+        """Kurzer Text mit der Zeit pro Stufe seit dem letzten Aufruf (für das Log nach jedem Durchlauf)."""
+        totals = self.stage_totals()
+        parts = []
+        for stage in METRIC_STAGES + tuple(sorted(set(totals) - set(METRIC_STAGES))):
+            spent = totals.get(stage, 0.0) - self._last_totals.get(stage, 0.0)
+            if spent > 0:
+                parts.append(f"{stage} {spent * 1000:.0f}ms")
+        self._last_totals = totals
+        self.flush()
+        return "Stufen: " + (", ".join(parts) if parts else "keine Messungen")
+
+    def render_prometheus(self):
+        """Alle Histogramme und Zähler im Prometheus-Textformat."""
+        def label_text(pairs):
+            return ",".join(f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                            for name, value in pairs if value is not None)
+
+        lines = [
+            "# HELP gebrauchtmonitor_stage_seconds Dauer pro Verarbeitungsstufe in Sekunden",
+            "# TYPE gebrauchtmonitor_stage_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: tuple(str(part) for part in item[0]))
+            counters = sorted(self._counters.items(), key=lambda item: tuple(str(part) for part in item[0]))
+        for (stage, term, profile), histogram in histograms:
+            labels = label_text((("stage", stage), ("term", term), ("profile", profile)))
+            for bound, bucket_count in zip(self.buckets, histogram):
+                lines.append(f'gebrauchtmonitor_stage_seconds_bucket{{{labels},le="{bound}"}} {bucket_count}')
+            lines.append(f'gebrauchtmonitor_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram[-1]}')
+            lines.append(f"gebrauchtmonitor_stage_seconds_sum{{{labels}}} {histogram[-2]:.6f}")
+            lines.append(f"gebrauchtmonitor_stage_seconds_count{{{labels}}} {histogram[-1]}")
+        lines.append("# HELP gebrauchtmonitor_events_total Zähler (Seiten, Inserate, Treffer, ...)")
+        lines.append("# TYPE gebrauchtmonitor_events_total counter")
+        for (event, term, profile), value in counters:
+            lines.append(f"gebrauchtmonitor_events_total{{{label_text((('event', event), ('term', term), ('profile', profile)))}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricLabels:
+    """Setzt die Metrik-Labels für die Dauer eines with-Blocks (auch in asyncio-Tasks korrekt getrennt)."""
+
+    def __init__(self, labels):
+        self._labels = labels
+        self._token = None
+
+    def __enter__(self):
+        self._token = _METRIC_LABELS.set(self._labels)
+        return self
+
+    def __exit__(self, *exc_info):
+        _METRIC_LABELS.reset(self._token)
+
+
+class _StageTimer:
+    def __init__(self, metrics, stage):
+        self._metrics = metrics
+        self._stage = stage
+        self._started = None
+
+    def __enter__(self):
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe(self._stage, perf_counter() - self._started)
+
+
+METRICS = StageMetrics()
+
+
+def start_metrics_server(port, host=METRICS_HOST):
+    """Startet einen lokalen HTTP-Endpunkt '/metrics' (Prometheus-Format) in einem Hintergrund-Thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != "/metrics":
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = METRICS.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        logging.error(f"Metrik-Endpunkt konnte nicht auf {host}:{port} gestartet werden: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"Metriken verfügbar unter http://{host}:{port}/metrics")
+    return server
+
+
+# ==============================================================================
+# 5. HTTP-SCHICHT (gemeinsame Session, Keep-Alive, bedingte Anfragen)
+# ==============================================================================
+
+NOT_MODIFIED = object() # Rückgabewert, wenn der Server mit 304 antwortet (Seite unverändert)
+DEFERRED = object()     # Rückgabewert, wenn der Host pausiert ist (Schutzschalter offen) und die Anfrage nicht gesendet wurde
+
+
+class CircuitOpenError(Exception):
+    """Der Schutzschalter des Hosts ist offen: die Anfrage wurde nicht gesendet."""
+
+    def __init__(self, host, seconds):
+        super().__init__(f"Host {host} pausiert (noch {seconds:.0f}s)")
+        self.host = host
+        self.seconds = seconds
+
+
+def parse_retry_after(value):
+    """Wartezeit in Sekunden aus einem Retry-After-Header (Sekunden oder HTTP-Datum), None wenn fehlend oder ungültig."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, retry_at.timestamp() - time())
+
+
+class HostCircuitBreaker:
+    """
+    Schutzschalter für einen Host. Geschlossen: Anfragen gehen normal raus. Offen: Anfragen werden sofort mit
+    CircuitOpenError abgelehnt, bis die Pause abgelaufen ist. Danach halboffen: genau eine Probe-Anfrage darf raus;
+    antwortet der Host, schliesst der Schalter, sonst öffnet er mit doppelter Pause erneut.
+    Zusätzlich begrenzt er die gleichzeitigen Anfragen im Async-Modus: jeder Fehler halbiert das Limit, nach dem
+    Schliessen beginnt es bei 1 und steigt pro erfolgreicher Anfrage um 1/Limit (also etwa +1 pro vollem Durchgang).
+    """
+
+    def __init__(self, host, max_concurrency=MAX_CONCURRENT_REQUESTS):
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+        self.failures = 0        # Fehler in Folge
+        self.trips = 0           # Öffnungen in Folge ohne erfolgreiche Probe (bestimmt die Pause)
+        self.open_until = None   # monotonic()-Zeitpunkt, bis zu dem der Host pausiert ist (None = geschlossen)
+        self.probe_started = None # Beginn der laufenden Probe-Anfrage (halboffen)
+        self.in_flight = 0
+        self._slot_freed = None  # asyncio.Event für Anfragen, die auf einen freien Platz warten
+
+    def seconds_until_retry(self, now=None):
+        """Sekunden, bis wieder eine Anfrage an den Host gesendet werden darf (0 = sofort)."""
+        if self.open_until is None:
+            return 0.0
+        now = monotonic() if now is None else now
+        if self.probe_started is not None: # Spätestens nach dem Timeout der Probe ist klar, wie es weitergeht
+            return max(0.0, self.probe_started + REQUEST_TIMEOUT - now)
+        return max(0.0, self.open_until - now)
+
+    def check(self):
+        """Wirft CircuitOpenError, solange der Host pausiert ist oder die Probe-Anfrage noch läuft."""
+        if self.open_until is None:
+            return
+        seconds = self.seconds_until_retry()
+        if seconds > 0:
+            METRICS.count("breaker_deferred")
+            raise CircuitOpenError(self.host, seconds)
+
+    def before_request(self):
+        """Wie check(), unmittelbar vor dem Senden. Nach Ablauf der Pause wird die Anfrage zur einzigen Probe-Anfrage."""
+        self.check()
+        if self.open_until is not None:
+            self.probe_started = monotonic()
+            logging.info(f"Host {self.host}: Pause vorbei, prüfe mit einer einzelnen Anfrage.")
+
+    def record_response(self, status, headers):
+        """Wertet den Status einer Antwort aus: 429 und 5xx zählen als Störung, alles andere heisst 'Host antwortet'."""
+        if status == 429:
+            self.record_failure("429 Too Many Requests", parse_retry_after(headers.get("Retry-After")), throttled=True)
+        elif status >= 500:
+            self.record_failure(f"HTTP {status}", parse_retry_after(headers.get("Retry-After")))
+        else:
+            self.record_success()
+
+    def record_success(self):
+        if self.open_until is not None:
+            logging.info(f"Host {self.host} antwortet wieder. Schutzschalter geschlossen, Parallelität beginnt wieder bei 1.")
+            self.open_until = None
+            self.probe_started = None
+            self.trips = 0
+            self.concurrency = 1.0
+        else:
+            self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+        self.failures = 0
+        self._wake_waiting()
+
+    def record_failure(self, reason, retry_after=None, throttled=False):
+        """
+        Erfasst eine Störung. Der Host wird pausiert bei BREAKER_FAILURE_THRESHOLD Fehlern in Folge, bei einer
+        fehlgeschlagenen Probe, bei 429 ('throttled') und wenn der Server mit 'retry_after' eine Wartezeit nennt.
+        """
+        self.failures += 1
+        self.concurrency = max(1.0, self.concurrency / 2)
+        METRICS.count("breaker_failures")
+        if throttled or retry_after is not None or self.probe_started is not None or self.failures >= BREAKER_FAILURE_THRESHOLD:
+            self._trip(reason, retry_after)
+        self._wake_waiting()
+
+    def _trip(self, reason, retry_after):
+        if retry_after is not None:
+            delay = min(retry_after, BREAKER_MAX_DELAY)
+        else:
+            delay = min(BREAKER_MAX_DELAY, BREAKER_BASE_DELAY * 2 ** self.trips)
+            delay *= 1 - BREAKER_JITTER * random.random() # Mehrere Instanzen sollen nicht gleichzeitig wiederkommen
+        self.trips += 1
+        self.open_until = monotonic() + delay
+        self.probe_started = None
+        self.concurrency = 1.0
+        METRICS.count("breaker_opened")
+        logging.warning(f"Host {self.host} pausiert für {delay:.0f}s ({reason}, {self.failures} Fehler in Folge). "
+                        f"Weitere Suchanfragen werden zurückgestellt.")
+
+    # --- Parallelitätslimit (nur Async-Modus) ---
+
+    async def acquire_slot(self):
+        """Wartet, bis weniger als das aktuelle Limit an Anfragen an diesen Host läuft."""
+        while self.in_flight >= int(self.concurrency):
+            if self._slot_freed is None:
+                self._slot_freed = asyncio.Event()
+            await self._slot_freed.wait()
+        self.in_flight += 1
+
+    def release_slot(self):
+        self.in_flight -= 1
+        self._wake_waiting()
+
+    def _wake_waiting(self):
+        if self._slot_freed is not None:
+            self._slot_freed.set() # Alle Wartenden prüfen das Limit neu
+            self._slot_freed = None
+
+
+class HttpClient:
+    """
+    Gemeinsame HTTP-Schicht für Suchanfragen und Telegram.
+    Hält Verbindungen offen (Connection-Pooling/Keep-Alive), fordert komprimierte Antworten an
+    und merkt sich ETag/Last-Modified pro Seite, um unveränderte Seiten mit 304 zu erkennen.
+    Zählt übertragene Bytes und wiederverwendete Verbindungen.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, conditional_requests=HTTP_CONDITIONAL_REQUESTS):
+        self.conditional_requests = conditional_requests
+        self._session = None # Wird bei der ersten synchronen Anfrage erstellt (importiert erst dann 'requests')
+        self._adapter = None
+        self._pool_size = pool_size
+        self._async_session = None
+        self.validators = {} # cache_key -> {'If-None-Match': ..., 'If-Modified-Since': ...}
+        self.breakers = {}   # Host -> HostCircuitBreaker
+        self.stats = {
+            "requests": 0,
+            "not_modified": 0,
+            "failed": 0,   # Timeouts, Netzwerkfehler, 429 und 5xx
+            "deferred": 0, # Nicht gesendet, weil der Host pausiert war
+            "bytes_received": 0, # Bytes über die Leitung (ggf. komprimiert)
+            "bytes_decoded": 0,  # Bytes nach dem Entpacken
+            "async_new_connections": 0,
+            "async_reused_connections": 0,
+        }
+
+    @property
+    def session(self):
+        """Die requests-Session mit Connection-Pool, beim ersten Gebrauch erstellt."""
+        if self._session is None:
+            session = requests.Session()
+            self._adapter = requests.adapters.HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size)
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            session.headers.update(HEADERS)
+            session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+            self._session = session
+        return self._session
+
+    # --- Bedingte Anfragen (ETag / Last-Modified) ---
+
+    def _conditional_headers(self, cache_key):
+        if not self.conditional_requests or cache_key is None:
+            return {}
+        return dict(self.validators.get(cache_key, {}))
+
+    def _store_validators(self, cache_key, headers):
+        if not self.conditional_requests or cache_key is None:
+            return
+        validators = {}
+        if headers.get("ETag"):
+            validators["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = headers["Last-Modified"]
+        if validators:
+            self.validators[cache_key] = validators
+        else:
+            self.validators.pop(cache_key, None)
+
+    def forget_validators(self, cache_key):
+        """Verwirft ETag/Last-Modified einer Seite: die nächste Anfrage lädt sie wieder vollständig (kein 304)."""
+        self.validators.pop(cache_key, None)
+
+    def _record(self, wire_bytes, decoded_bytes):
+        self.stats["requests"] += 1
+        self.stats["bytes_received"] += wire_bytes
+        self.stats["bytes_decoded"] += decoded_bytes
+
+    # --- Schutzschalter pro Host ---
+
+    def breaker_for(self, url):
+        """Gibt den Schutzschalter für den Host der URL zurück, oder None wenn CIRCUIT_BREAKER aus ist."""
+        if not CIRCUIT_BREAKER:
+            return None
+        host = urlsplit(url).hostname
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = HostCircuitBreaker(host, host_concurrency(host))
+        return breaker
+
+    def seconds_until_retry(self, url):
+        """Sekunden, bis wieder Anfragen an den Host der URL gesendet werden (0 = sofort)."""
+        breaker = self.breaker_for(url)
+        return breaker.seconds_until_retry() if breaker is not None else 0.0
+
+    def check_breaker(self, url):
+        """Wirft CircuitOpenError, wenn der Host der URL pausiert ist (z.B. vor dem Warten auf das Ratenlimit)."""
+        breaker = self.breaker_for(url)
+        if breaker is None:
+            return
+        try:
+            breaker.check()
+        except CircuitOpenError:
+            self.stats["deferred"] += 1
+            raise
+
+    def _before_request(self, breaker):
+        if breaker is None:
+            return
+        try:
+            breaker.before_request()
+        except CircuitOpenError:
+            self.stats["deferred"] += 1
+            raise
+
+    def _record_status(self, breaker, status, headers):
+        if status == 429 or status >= 500:
+            self.stats["failed"] += 1
+        if breaker is not None:
+            breaker.record_response(status, headers)
+
+    def _record_error(self, breaker, error):
+        """Timeout oder Netzwerkfehler beim Senden (keine Antwort vom Host)."""
+        self.stats["failed"] += 1
+        if breaker is not None:
+            breaker.record_failure(type(error).__name__)
+
+    @asynccontextmanager
+    async def _breaker_slot(self, breaker):
+        """Belegt im Async-Modus einen Platz im Parallelitätslimit des Hosts und prüft den Schutzschalter."""
+        if breaker is None:
+            yield
+            return
+        await breaker.acquire_slot()
+        try:
+            self._before_request(breaker) # Erst nach dem Warten: der Host kann inzwischen pausiert sein
+            yield
+        finally:
+            breaker.release_slot()
+
+    # --- Synchrone Anfragen (requests) ---
+
+    def get(self, url, cache_key=None, timeout=REQUEST_TIMEOUT):
+        """
+        Lädt eine Seite über die gemeinsame Session. Gibt den Text oder NOT_MODIFIED zurück.
+        Fehler (Timeout, HTTP-Fehler, Netzwerk) werden als requests-Exceptions weitergereicht,
+        CircuitOpenError ohne Anfrage, wenn der Host pausiert ist (siehe HostCircuitBreaker).
+        'cache_key' trennt die gespeicherten Validatoren, wenn dieselbe URL für mehrere Profile abgerufen wird.
+        """
+        breaker = self.breaker_for(url)
+        self._before_request(breaker)
+        started = perf_counter()
+        try:
+            response = self.session.get(url, headers=self._conditional_headers(cache_key), timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            self._record_error(breaker, e)
+            raise
+        self._record_status(breaker, response.status_code, response.headers)
+        # requests misst die Zeit bis zu den Antwort-Headern (inkl. DNS/Verbindungsaufbau), der Rest ist der Download
+        time_to_first_byte = response.elapsed.total_seconds()
+        METRICS.observe("http_ttfb", time_to_first_byte)
+        METRICS.observe("http_download", max(0.0, perf_counter() - started - time_to_first_byte))
+        if response.status_code == 304:
+            self._record(0, 0)
+            self.stats["not_modified"] += 1
+            return NOT_MODIFIED
+        response.raise_for_status() # Fehler bei Status Codes >= 400
+        content = response.content
+        wire_bytes = response.raw.tell() if hasattr(response.raw, "tell") else 0
+        self._record(wire_bytes or len(content), len(content))
+        self._store_validators(cache_key, response.headers)
+        return response.text
+
+    def post(self, url, **kwargs):
+        """Sendet eine POST-Anfrage über die gemeinsame Session und gibt die requests-Response zurück."""
+        response = self.session.post(url, **kwargs)
+        content = response.content
+        wire_bytes = response.raw.tell() if hasattr(response.raw, "tell") else 0
+        self._record(wire_bytes or len(content), len(content))
+        return response
+
+    # --- Gestreamte Anfragen (Inhalt stückweise lesen) ---
+
+    @staticmethod
+    def stream_encoding(headers):
+        """Zeichenkodierung aus dem Content-Type. Ohne Angabe UTF-8 (nicht ISO-8859-1 wie bei requests für text/*)."""
+        _, _, charset = headers.get("Content-Type", "").partition("charset=")
+        return charset.split(";", 1)[0].strip().strip('"') or "utf-8"
+
+    def open_stream(self, url, cache_key=None, timeout=REQUEST_TIMEOUT):
+        """Wie get(), liest den Inhalt aber noch nicht. Gibt NOT_MODIFIED oder die offene Antwort zurück (siehe iter_chunks)."""
+        breaker = self.breaker_for(url)
+        self._before_request(breaker)
+        try:
+            response = self.session.get(url, headers=self._conditional_headers(cache_key), timeout=timeout, stream=True)
+        except requests.exceptions.RequestException as e:
+            self._record_error(breaker, e)
+            raise
+        self._record_status(breaker, response.status_code, response.headers)
+        METRICS.observe("http_ttfb", response.elapsed.total_seconds())
+        if response.status_code == 304:
+            response.close()
+            self._record(0, 0)
+            self.stats["not_modified"] += 1
+            return NOT_MODIFIED
+        if response.status_code >= 400:
+            response.close()
+            response.raise_for_status()
+        self._store_validators(cache_key, response.headers)
+        return response
+
+    def iter_chunks(self, response, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Liefert den (entpackten) Inhalt einer offenen Antwort stückweise. Bricht der Aufrufer vorzeitig ab,
+        wird die Verbindung geschlossen statt den Rest zu lesen (sie geht dann nicht zurück in den Pool).
+        """
+        decoded_bytes = 0
+        try:
+            for chunk in response.iter_content(chunk_size):
+                decoded_bytes += len(chunk)
+                yield chunk
+        finally:
+            wire_bytes = response.raw.tell() if hasattr(response.raw, "tell") else 0
+            self._record(wire_bytes or decoded_bytes, decoded_bytes)
+            response.close()
+
+    async def open_stream_async(self, url, cache_key=None):
+        """Asynchrone Variante von open_stream() (siehe iter_chunks_async). Der Platz im Parallelitätslimit gilt bis zu den Antwort-Headern."""
+        breaker = self.breaker_for(url)
+        async with self._breaker_slot(breaker):
+            try:
+                response = await self._get_async_session().get(url, headers=self._conditional_headers(cache_key))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record_error(breaker, e)
+                raise
+        self._record_status(breaker, response.status, response.headers)
+        if response.status == 304:
+            response.release()
+            self._record(0, 0)
+            self.stats["not_modified"] += 1
+            return NOT_MODIFIED
+        response.raise_for_status() # Gibt die Verbindung bei Fehlern selbst frei
+        self._store_validators(cache_key, response.headers)
+        return response
+
+    async def iter_chunks_async(self, response, chunk_size=STREAM_CHUNK_SIZE):
+        """Asynchrone Variante von iter_chunks()."""
+        decoded_bytes = 0
+        try:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                decoded_bytes += len(chunk)
+                yield chunk
+        finally:
+            self._record(decoded_bytes, decoded_bytes) # Bei abgebrochenem Lesen ist die übertragene Menge nicht bekannt
+            if response.content.at_eof():
+                response.release() # Verbindung zurück in den Pool
+            else:
+                response.close()
+
+    # --- Asynchrone Anfragen (aiohttp) ---
+
+    def _get_async_session(self):
+        """Gibt die dauerhafte aiohttp-Session zurück (wird beim ersten Aufruf erstellt)."""
+        if self._async_session is None or self._async_session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_async_connection_created)
+            trace_config.on_connection_reuseconn.append(self._on_async_connection_reused)
+            trace_config.on_request_start.append(self._on_async_request_start)
+            trace_config.on_request_end.append(self._on_async_request_end)
+            trace_config.on_dns_resolvehost_start.append(self._on_async_dns_start)
+            trace_config.on_dns_resolvehost_end.append(self._on_async_dns_end)
+            trace_config.on_connection_create_start.append(self._on_async_connect_start)
+            connector = aiohttp.TCPConnector(limit=fetch_pool_size(host_budgets(PLATFORMS.values())), keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT)
+            self._async_session = aiohttp.ClientSession(
+                connector=connector,
+                headers={**HEADERS, "Accept-Encoding": ACCEPT_ENCODING},
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                trace_configs=[trace_config],
+            )
+        return self._async_session
+
+    async def get_async(self, url, cache_key=None):
+        """Wie get(), aber asynchron über eine dauerhafte aiohttp-Session. Fehler werden als aiohttp-Exceptions weitergereicht."""
+        breaker = self.breaker_for(url)
+        async with self._breaker_slot(breaker):
+            try:
+                response = await self._get_async_session().get(url, headers=self._conditional_headers(cache_key))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record_error(breaker, e)
+                raise
+            self._record_status(breaker, response.status, response.headers)
+            async with response:
+                if response.status == 304:
+                    self._record(0, 0)
+                    self.stats["not_modified"] += 1
+                    return NOT_MODIFIED
+                response.raise_for_status() # Fehler bei Status Codes >= 400
+                with METRICS.timer("http_download"):
+                    body = await response.read()
+                wire_bytes = response.content_length if response.content_length is not None else len(body)
+                self._record(wire_bytes, len(body))
+                self._store_validators(cache_key, response.headers)
+                return body.decode(response.get_encoding(), errors="replace")
+
+    async def _on_async_connection_created(self, session, context, params):
+        self.stats["async_new_connections"] += 1
+        METRICS.observe("http_connect", perf_counter() - context.connect_started)
+
+    async def _on_async_connect_start(self, session, context, params):
+        context.connect_started = perf_counter()
+
+    async def _on_async_dns_start(self, session, context, params):
+        context.dns_started = perf_counter()
+
+    async def _on_async_dns_end(self, session, context, params):
+        METRICS.observe("http_dns", perf_counter() - context.dns_started)
+
+    async def _on_async_request_start(self, session, context, params):
+        context.request_started = perf_counter()
+
+    async def _on_async_request_end(self, session, context, params):
+        # Wird nach den Antwort-Headern ausgelöst, der Body wird erst danach gelesen
+        METRICS.observe("http_ttfb", perf_counter() - context.request_started)
+
+    async def _on_async_connection_reused(self, session, context, params):
+        self.stats["async_reused_connections"] += 1
+
+    async def close_async(self):
+        """Schliesst die aiohttp-Session (muss auf derselben Event-Loop laufen, die sie erstellt hat)."""
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+
+    # --- Statistik & Aufräumen ---
+
+    def connection_stats(self):
+        """Gibt (neu aufgebaute, wiederverwendete) Verbindungen zurück, summiert über sync und async."""
+        new_connections = self.stats["async_new_connections"]
+        reused_connections = self.stats["async_reused_connections"]
+        pools = self._adapter.poolmanager.pools if self._adapter is not None else {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += pool.num_connections
+            reused_connections += max(0, pool.num_requests - pool.num_connections)
+        return new_connections, reused_connections
+
+    def stats_summary(self):
+        """Kurzer Text mit den bisherigen HTTP-Statistiken für das Log."""
+        new_connections, reused_connections = self.connection_stats()
+        summary = (
+            f"HTTP: {self.stats['requests']} Anfragen, {self.stats['not_modified']}x unverändert (304), "
+            f"{self.stats['failed']} fehlgeschlagen, {self.stats['deferred']} zurückgestellt, "
+            f"{new_connections} neue / {reused_connections} wiederverwendete Verbindungen, "
+            f"{self.stats['bytes_received'] / 1024:.1f} KB übertragen ({self.stats['bytes_decoded'] / 1024:.1f} KB entpackt)"
+        )
+        paused = [f"{host} (noch {breaker.seconds_until_retry():.0f}s)" for host, breaker in self.breakers.items() if breaker.open_until is not None]
+        if paused:
+            summary += ". Pausiert: " + ", ".join(paused)
+        return summary
+
+    def close(self):
+        """Schliesst die synchrone Session (die Async-Session wird über close_async() geschlossen)."""
+        if self._session is not None:
+            self._session.close()
+
+
+HTTP_CLIENT = HttpClient()
+
+
+# ==============================================================================
+# 6. HILFSFUNKTIONEN (Web Scraping / Datenextraktion)
+# ==============================================================================
+
+# Ein extrahiertes Inserat. 'price_text' ist der rohe (kleingeschriebene) Preistext oder None;
+# er wird erst mit parse_price_text() ausgewertet, wenn das Inserat tatsächlich neu ist.
+Listing = namedtuple("Listing", ["url", "title", "price_text", "description"])
+
+# Ergebnis einer Seiten-Extraktion: Anzahl gefundener Inserate-Elemente, die Listings mit gültigem Link
+# und ob die Seite explizit "Keine Resultate" meldet (nur geprüft, wenn keine Elemente gefunden wurden).
+# 'complete' ist False, wenn das Streaming die Seite vorzeitig nicht weitergelesen hat (nur die ersten Inserate).
+PageExtraction = namedtuple("PageExtraction", ["node_count", "listings", "no_results", "complete"], defaults=(True,))
+
+LISTING_SELECTOR = 'div.mui-style-qlw8p1' # CSS-Selektor für ein einzelnes Inserat auf der Ergebnisseite
+LISTING_CLASS = LISTING_SELECTOR.split('.', 1)[1] # Klasse daraus (für den Streaming-Parser)
+
+# Mögliche Selektoren für den Link des Inserats
+POSSIBLE_LINK_SELECTORS = [
+    'a[href^="/de/vi/"]', # Haupt-Link des Inserats
+    'h2 a[href^="/de/vi/"]' # Link innerhalb des Titels
+]
+
+# Mögliche Selektoren für den Preis (robust gegen kleine Änderungen)
+POSSIBLE_PRICE_SELECTORS = [
+    'div.mui-style-1fhgjcy span.mui-style-1nqm73u', # Original Selektor
+    'span[class*="price"]', # Allgemeiner auf Span mit 'price' in Klasse
+    'div[class*="price"]'   # Allgemeiner auf Div mit 'price' in Klasse
+]
+
+# Mögliche Selektoren für die Kurzbeschreibung
+POSSIBLE_DESC_SELECTORS = [
+    'div.mui-style-xe4gv6 span.mui-style-1nqm73u', # Original spezifisch
+    'div.mui-style-xe4gv6',                      # Original Container
+    'p[class*="description"]',                   # Allgemeiner auf P mit 'description'
+    'div[class*="description"]'                  # Allgemeiner auf Div mit 'description'
+]
+
+
+def find_price_text(listing_div):
+    """Sucht den Preis-Text in einem (BeautifulSoup) Listing-Div. Gibt den kleingeschriebenen Text oder None zurück."""
+    for selector in POSSIBLE_PRICE_SELECTORS:
+        price_tag = listing_div.select_one(selector)
+        if price_tag and price_tag.text.strip():
+            price_text = price_tag.text.strip().lower()
+            logging.debug(f"      Preis-Text gefunden mit Selektor '{selector}': '{price_text}'")
+            return price_text # Ersten gültigen Treffer verwenden
+    return None
+
+
+def parse_price_text(price_text):
+    """
+    Wertet einen Preis-Text aus.
+    Versucht robust, verschiedene Preisformate zu erkennen.
+    Gibt int (Preis), 0 (Gratis) oder None (nicht gefunden, VB, Anfrage) zurück.
+    """
+    if not price_text:
+        logging.debug("      Kein Preis-Text in den erwarteten Elementen gefunden.")
+        return None
+
+    # Prüfe auf spezielle Preisangaben
+    if 'gratis' in price_text:
+        logging.debug("      Preis als 'Gratis' erkannt.")
+        return 0
+    if any(keyword in price_text for keyword in ['anfrage', 'vb', 'verhandelbar', 'verhandlung']):
+        logging.debug("      Preis als 'Auf Anfrage' oder 'VB' erkannt.")
+        return None
+
+    # Versuche, eine Zahl zu extrahieren (robust gegen Tausendertrennzeichen und Dezimalstellen)
+    # Entfernt zuerst alles Nicht-Ziffern ausser dem ersten Komma/Punkt
+    cleaned_for_regex = re.sub(r"[^\d,.]", "", price_text)
+    # Sucht nach dem numerischen Teil vor dem ersten Komma/Punkt
+    price_match = re.search(r'^(\d+)', cleaned_for_regex.replace(',', '.'))
+
+    if price_match:
+        price_str = price_match.group(1)
+        try:
+            price_int = int(price_str)
+            logging.debug(f"      Preis extrahiert: {price_int} CHF")
+            return price_int
+        except ValueError:
+            logging.warning(f"      Konnte extrahierten Preis-String '{price_str}' nicht in Zahl umwandeln (aus '{price_text}').")
+            return None
+    else:
+        logging.warning(f"      Konnte keine gültige Zahl aus dem Preis-Text '{price_text}' extrahieren.")
+        return None
+
+
+def extract_price(listing_div):
+    """
+    Extrahiert den Preis aus einem (BeautifulSoup) Listing-Div.
+    Gibt int (Preis), 0 (Gratis) oder None (nicht gefunden, VB, Anfrage) zurück.
+    """
+    return parse_price_text(find_price_text(listing_div))
+
+
+def extract_description(listing_div):
+    """Extrahiert die Kurzbeschreibung aus dem (BeautifulSoup) Listing-Div."""
+    description = ""
+    for selector in POSSIBLE_DESC_SELECTORS:
+        desc_tag = listing_div.select_one(selector)
+        if desc_tag and desc_tag.text.strip():
+            description = desc_tag.text.strip()
+            logging.debug(f"      Beschreibung gefunden mit Selektor '{selector}'.")
+            break # Ersten Treffer verwenden
+    if not description:
+        logging.debug("      Keine Beschreibung gefunden.")
+    return description
+
+
+def log_listing_without_url(index, external_href):
+    """Loggt ein Inserate-Element ohne gültigen Link (externer Link oder unbekannte Struktur)."""
+    if external_href:
+        logging.debug(f"      Inserat #{index+1} ist ein externer Link ({external_href}). Überspringe.")
+    else:
+        logging.warning(f"      Konnte keinen gültigen Inserats-Link im Element #{index+1} finden. Überspringe.")
+
+
+def is_external_href(href):
+    """Erkennt Links auf andere Plattformen, die auf der Ergebnisseite eingebettet sind."""
+    return bool(href) and ('ricardo.ch' in href or 'anibis.ch' in href)
+
+
+class SelectorPlan:
+    """
+    Extraktionsplan für ein Seitenlayout: pro Feld der Index des Selektors, der zuletzt einen Wert geliefert hat.
+    first() probiert nur diesen; liefert er nichts, werden alle Selektoren wieder der Reihe nach geprüft und der
+    Plan auf den neuen Treffer umgestellt.
+    """
+
+    __slots__ = ("winners",)
+
+    def __init__(self):
+        self.winners = {} # Feld -> Index in der Liste möglicher Selektoren
+
+    def first(self, field, candidates, lookup):
+        """Gibt den ersten nicht-leeren Wert von lookup(Selektor) zurück (oder None), zuerst mit dem gemerkten Selektor."""
+        winner = self.winners.get(field)
+        if winner is not None:
+            value = lookup(candidates[winner])
+            if value:
+                return value
+            METRICS.count(f"selector_fallback_{field}")
+        for index, candidate in enumerate(candidates):
+            if index == winner:
+                continue
+            value = lookup(candidate)
+            if value:
+                if winner is not None:
+                    logging.debug(f"      Extraktionsplan: '{field}' wechselt von Selektor #{winner + 1} zu #{index + 1}.")
+                self.winners[field] = index
+                return value
+        return None
+
+
+def first_selector_match(plan, field, candidates, lookup):
+    """Wie SelectorPlan.first(); ohne Plan (SELECTOR_PLAN_CACHE aus) werden alle Selektoren der Reihe nach geprüft."""
+    if plan is not None:
+        return plan.first(field, candidates, lookup)
+    for candidate in candidates:
+        value = lookup(candidate)
+        if value:
+            return value
+    return None
+
+
+class SelectorPlanCache:
+    """Extraktionspläne pro Seitenlayout (Signatur: Klassennamen im ersten Inserat), begrenzt auf 'max_layouts'."""
+
+    def __init__(self, max_layouts=SELECTOR_PLAN_MAX_LAYOUTS):
+        self.max_layouts = max_layouts
+        self._plans = OrderedDict() # Signatur -> SelectorPlan, zuletzt genutzte zuletzt
+
+    def plan_for(self, signature):
+        """Gibt den Plan für das Layout zurück (neu, wenn das Layout zum ersten Mal vorkommt), oder None ohne Plan-Cache."""
+        if not SELECTOR_PLAN_CACHE:
+            return None
+        plan = self._plans.get(signature)
+        if plan is None:
+            METRICS.count("selector_plan_new")
+            plan = self._plans[signature] = SelectorPlan()
+            if len(self._plans) > self.max_layouts:
+                self._plans.popitem(last=False)
+        else:
+            self._plans.move_to_end(signature)
+        return plan
+
+
+class BeautifulSoupExtractor:
+    """Ursprünglicher Extraktionspfad: kompletter BeautifulSoup-Baum ('html.parser') plus CSS-Selektoren pro Inserat."""
+
+    name = "bs4"
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url # None = BASE_URL
+        self.plans = SelectorPlanCache()
+
+    def plan_for(self, listing_div):
+        """Extraktionsplan für das Layout dieses Inserats (siehe SelectorPlanCache)."""
+        return self.plans.plan_for(frozenset(name for tag in listing_div.find_all(True) for name in tag.get('class', ())))
+
+    def extract(self, html_text):
+        """Extrahiert alle Inserate einer Ergebnisseite. Gibt ein PageExtraction zurück."""
+        with METRICS.timer("parse"):
+            soup = bs4.BeautifulSoup(html_text, 'html.parser')
+        with METRICS.timer("extract"):
+            return self.extract_page(soup)
+
+    def extract_page(self, soup):
+        """Sucht die Inserate im geparsten Dokument und extrahiert sie."""
+        listing_divs = soup.select(LISTING_SELECTOR)
+
+        if not listing_divs:
+            # Zusätzliche Prüfung auf "Keine Ergebnisse"-Nachricht
+            no_results_tag = soup.find(lambda tag: tag.name in ['div', 'p', 'h3', 'span'] and 'keine resultate' in tag.get_text(strip=True).lower())
+            return PageExtraction(0, [], bool(no_results_tag))
+
+        listings = []
+        plan = self.plan_for(listing_divs[0]) # Gilt für alle Inserate der Seite
+        for i, listing_div in enumerate(listing_divs):
+            logging.debug(f"    Verarbeite potenzielles Inserat #{i+1}...")
+            listing = self.extract_listing(listing_div, i, plan)
+            if listing is not None:
+                listings.append(listing)
+        return PageExtraction(len(listing_divs), listings, False)
+
+    def extract_listing(self, listing_div, index, plan=None):
+        """
+        Extrahiert Link, Titel, Preis-Text und Beschreibung aus einem Listing-Div. Gibt None ohne gültigen Link zurück.
+        Mit 'plan' (siehe SelectorPlan) wird pro Feld zuerst nur der zuletzt erfolgreiche Selektor probiert.
+        """
+        def select_link(selector):
+            tag = listing_div.select_one(selector)
+            return tag if tag and tag.get('href') else None
+
+        def select_text(selector):
+            tag = listing_div.select_one(selector)
+            return tag.text.strip() if tag else None
+
+        # --- Link und Titel extrahieren (möglichst robust) ---
+        link_tag = first_selector_match(plan, "link", POSSIBLE_LINK_SELECTORS, select_link)
+        if link_tag is None:
+            external_link = listing_div.find('a', href=is_external_href)
+            log_listing_without_url(index, external_link['href'] if external_link else None)
+            return None
+
+        item_url = f"{self.base_url or BASE_URL}{link_tag['href']}"
+        # Titel aus verschiedenen Quellen versuchen
+        title_tag = listing_div.find('h2')
+        item_title = title_tag.text.strip() if title_tag else link_tag.text.strip()
+        if not item_title: # Fallback: Alt-Text eines Bildes
+            img_tag = link_tag.find('img', alt=True)
+            if img_tag: item_title = img_tag['alt'].strip()
+        item_title = item_title or f"Inserat {index+1} (Titel nicht extrahierbar)" # Absoluter Fallback
+        logging.debug(f"      Link und Titel gefunden: '{item_title}' -> {item_url}")
+
+        price_text = first_selector_match(plan, "price", POSSIBLE_PRICE_SELECTORS, select_text)
+        description = first_selector_match(plan, "description", POSSIBLE_DESC_SELECTORS, select_text) or ""
+        return Listing(item_url, item_title, price_text.lower() if price_text else None, description)
+
+
+def _xpath_has_class(class_name):
+    """XPath-Bedingung, die einem CSS-Klassenselektor ('.class_name') entspricht."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+class LxmlExtractor:
+    """
+    Schneller Extraktionspfad: lxml parst die Seite in C, danach holen vorkompilierte XPath-Ausdrücke
+    (Übersetzungen der CSS-Selektoren oben) in einem Durchgang Link, Titel, Preis und Beschreibung.
+    Liefert dieselben Listings wie der BeautifulSoup-Pfad.
+    """
+
+    name = "lxml"
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url # None = BASE_URL
+        self._parser = etree.HTMLParser(encoding="utf-8")
+        self._listings = etree.XPath(f"//div[{_xpath_has_class('mui-style-qlw8p1')}]")
+        self._link = etree.XPath(".//a[starts-with(@href, '/de/vi/')]") # Deckt beide POSSIBLE_LINK_SELECTORS ab
+        self._title = etree.XPath(".//h2")
+        self._img_with_alt = etree.XPath(".//img[@alt]")
+        self._external_link = etree.XPath(".//a[contains(@href, 'ricardo.ch') or contains(@href, 'anibis.ch')]")
+        self._price = [ # Reihenfolge wie POSSIBLE_PRICE_SELECTORS
+            etree.XPath(f".//span[{_xpath_has_class('mui-style-1nqm73u')}][ancestor::div[{_xpath_has_class('mui-style-1fhgjcy')}]]"),
+            etree.XPath(".//span[contains(@class, 'price')]"),
+            etree.XPath(".//div[contains(@class, 'price')]"),
+        ]
+        self._description = [ # Reihenfolge wie POSSIBLE_DESC_SELECTORS
+            etree.XPath(f".//span[{_xpath_has_class('mui-style-1nqm73u')}][ancestor::div[{_xpath_has_class('mui-style-xe4gv6')}]]"),
+            etree.XPath(f".//div[{_xpath_has_class('mui-style-xe4gv6')}]"),
+            etree.XPath(".//p[contains(@class, 'description')]"),
+            etree.XPath(".//div[contains(@class, 'description')]"),
+        ]
+        # Sichtbarer Text wie bei BeautifulSoup '.text' (ohne Kommentare, <script> und <style>)
+        self._text = etree.XPath("descendant-or-self::text()[not(ancestor::script) and not(ancestor::style)]")
+        self._no_results_candidates = etree.XPath("//div | //p | //h3 | //span")
+        self._classes = etree.XPath(".//@class")
+        self.plans = SelectorPlanCache()
+
+    def plan_for(self, listing_node):
+        """Extraktionsplan für das Layout dieses Inserats (siehe SelectorPlanCache)."""
+        return self.plans.plan_for(frozenset(self._classes(listing_node)))
+
+    def text(self, element):
+        """Gibt den sichtbaren Text eines Elements zurück (entspricht BeautifulSoup '.text')."""
+        return "".join(self._text(element))
+
+    def _first_text(self, listing_node, field, xpaths, plan):
+        """Text des ersten Treffers des ersten Ausdrucks, dessen erster Treffer nicht leer ist (wie select_one-Fallbacks)."""
+        def lookup(xpath):
+            matches = xpath(listing_node)
+            return self.text(matches[0]).strip() if matches else None
+        return first_selector_match(plan, field, xpaths, lookup)
+
+    def parse(self, html_text):
+        """Parst eine HTML-Seite in einen lxml-Baum."""
+        root = etree.fromstring(html_text.encode("utf-8"), self._parser)
+        if root is None: # Leeres Dokument
+            root = etree.fromstring(b"<html></html>", self._parser)
+        return root
+
+    def extract(self, html_text):
+        """Extrahiert alle Inserate einer Ergebnisseite. Gibt ein PageExtraction zurück."""
+        with METRICS.timer("parse"):
+            root = self.parse(html_text)
+        with METRICS.timer("extract"):
+            return self.extract_page(root)
+
+    def extract_page(self, root):
+        """Sucht die Inserate im geparsten Baum und extrahiert sie."""
+        listing_nodes = self._listings(root)
+
+        if not listing_nodes:
+            no_results = any(
+                'keine resultate' in "".join(part.strip() for part in self._text(node)).lower()
+                for node in self._no_results_candidates(root)
+            )
+            return PageExtraction(0, [], no_results)
+
+        listings = []
+        plan = self.plan_for(listing_nodes[0]) # Gilt für alle Inserate der Seite
+        for i, listing_node in enumerate(listing_nodes):
+            listing = self.extract_listing(listing_node, i, plan)
+            if listing is not None:
+                listings.append(listing)
+        return PageExtraction(len(listing_nodes), listings, False)
+
+    def extract_listing(self, listing_node, index, plan=None):
+        """
+        Extrahiert Link, Titel, Preis-Text und Beschreibung aus einem Listing-Knoten. Gibt None ohne gültigen Link zurück.
+        Mit 'plan' (siehe SelectorPlan) wird pro Feld zuerst nur der zuletzt erfolgreiche Ausdruck probiert.
+        """
+        links = self._link(listing_node)
+        if not links:
+            external_links = self._external_link(listing_node)
+            log_listing_without_url(index, external_links[0].get('href') if external_links else None)
+            return None
+
+        link_node = links[0]
+        item_url = f"{self.base_url or BASE_URL}{link_node.get('href')}"
+        title_nodes = self._title(listing_node)
+        item_title = self.text(title_nodes[0] if title_nodes else link_node).strip()
+        if not item_title: # Fallback: Alt-Text eines Bildes
+            img_nodes = self._img_with_alt(link_node)
+            if img_nodes: item_title = img_nodes[0].get('alt').strip()
+        item_title = item_title or f"Inserat {index+1} (Titel nicht extrahierbar)" # Absoluter Fallback
+
+        price_text = self._first_text(listing_node, "price", self._price, plan)
+        description = self._first_text(listing_node, "description", self._description, plan) or ""
+        return Listing(item_url, item_title, price_text.lower() if price_text else None, description)
+
+
+LISTING_URL_PREFIX = '/de/vi/' # Pfad-Anfang eines Inserate-Links (wie in POSSIBLE_LINK_SELECTORS)
+
+
+class EmbeddedJsonExtractor:
+    """
+    Schnellweg über die in die Seite eingebetteten Suchergebnisse (JSON im <script id="__NEXT_DATA__">):
+    Der Block wird per regulärem Ausdruck ohne HTML-Parser gefunden, mit json.loads dekodiert und auf dieselben
+    Felder abgebildet wie im DOM-Pfad (Link, Titel, kleingeschriebener Preis-Text, Beschreibung).
+    Die Inserate-Liste steht unter dem fest konfigurierten Pfad 'listings_path' (EMBEDDED_JSON_LISTINGS_PATH).
+    Fehlt der Block oder die Liste unter diesem Pfad, übernimmt der DOM-Extraktor 'fallback'.
+    Wie oft welcher Weg genutzt wird und wie lange er dauert, landet in den Metriken (extract_json / extract_dom).
+    """
+
+    name = "json"
+
+    def __init__(self, fallback, listings_path, script_id=EMBEDDED_JSON_SCRIPT_ID):
+        self.fallback = fallback
+        self.base_url = fallback.base_url # Gleiche Basis-URL wie der DOM-Extraktor
+        self._script = re.compile(
+            r'<script[^>]*\bid=["\']' + re.escape(script_id) + r'["\'][^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE)
+        self._listings_path = listings_path
+
+    def extract(self, html_text):
+        """Extrahiert alle Inserate einer Ergebnisseite (JSON, sonst DOM). Gibt ein PageExtraction zurück."""
+        page, path, seconds = self.extract_timed(html_text)
+        record_extraction_path(path, seconds)
+        return page
+
+    def extract_timed(self, html_text):
+        """Wie extract(), gibt aber (PageExtraction, genutzter Weg "json"/"dom", Dauer in Sekunden) zurück, ohne Metriken zu erfassen."""
+        started = perf_counter()
+        page = self.extract_embedded(html_text)
+        if page is not None:
+            return page, "json", perf_counter() - started
+        started = perf_counter()
+        return self.fallback.extract(html_text), "dom", perf_counter() - started
+
+    def extract_embedded(self, html_text):
+        """Liest die Inserate aus dem eingebetteten JSON. Gibt None zurück, wenn das nicht möglich ist."""
+        match = self._script.search(html_text)
+        if match is None:
+            return None
+        try:
+            state = json.loads(match.group(1))
+        except ValueError as e:
+            logging.debug(f"    Eingebettetes JSON nicht lesbar ({e}), verwende HTML.")
+            return None
+
+        items = self._follow_path(state, self._listings_path)
+        if items is None:
+            logging.debug(f"    Keine Inserate-Liste unter {self._listings_path} im eingebetteten JSON, verwende HTML.")
+            return None
+
+        listings = []
+        for index, item in enumerate(items):
+            listing = self._listing_from_item(item, index) if isinstance(item, dict) else None
+            if listing is not None:
+                listings.append(listing)
+        return PageExtraction(len(items), listings, not items)
+
+    @staticmethod
+    def _follow_path(state, path):
+        for key in path:
+            try:
+                state = state[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return state if isinstance(state, list) else None
+
+    @staticmethod
+    def _first_value(item, field):
+        for key in EMBEDDED_JSON_FIELDS[field]:
+            value = item.get(key)
+            if value not in (None, ""):
+                return value
+        return None
+
+    def _item_url(self, item):
+        url = self._first_value(item, "url")
+        return url if isinstance(url, str) and LISTING_URL_PREFIX in url else None
+
+    def _listing_from_item(self, item, index):
+        """Bildet ein JSON-Objekt auf ein Listing ab (wie LxmlExtractor.extract_listing). Gibt None ohne gültigen Link zurück."""
+        url = self._item_url(item)
+        if url is None:
+            log_listing_without_url(index, self._first_value(item, "url"))
+            return None
+        item_url = url if url.startswith(("http://", "https://")) else f"{self.base_url or BASE_URL}{url}"
+        item_title = str(self._first_value(item, "title") or "").strip() or f"Inserat {index+1} (Titel nicht extrahierbar)"
+
+        price = self._first_value(item, "price")
+        if isinstance(price, dict): # z.B. {"amount": 120, "currency": "CHF"}
+            price = next((price[key] for key in ("formatted", "text", "amount", "value") if price.get(key) not in (None, "")), None)
+        price_text = str(price).strip().lower() if price is not None else None
+        description = self._first_value(item, "description")
+        return Listing(item_url, item_title, price_text or None, str(description).strip() if description is not None else "")
+
+
+def record_extraction_path(path, seconds):
+    """Erfasst, welcher Extraktionsweg ("json" oder "dom") für eine Seite genutzt wurde und wie lange er gedauert hat."""
+    METRICS.count(f"extract_path_{path}")
+    METRICS.observe(f"extract_{path}", seconds)
+
+
+EXTRACTORS = {} # Backend-Name (bzw. mit Basis-URL) -> Instanz (einmal erzeugt, XPath-Ausdrücke werden wiederverwendet)
+
+
+def get_extractor(backend=None, base_url=None):
+    """
+    Gibt die Extraktor-Instanz für das Backend zurück. Fällt auf BeautifulSoup zurück, wenn lxml fehlt.
+    'base_url' wird vor relative Inserate-Links gesetzt (None = BASE_URL, siehe Platform).
+    """
+    backend = backend or EXTRACTOR_BACKEND
+    if backend == "lxml" and etree is None:
+        if not hasattr(get_extractor, "warning_logged"):
+            logging.warning("EXTRACTOR_BACKEND 'lxml' benötigt das Paket 'lxml' (pip install lxml). Verwende BeautifulSoup.")
+            get_extractor.warning_logged = True
+        backend = "bs4"
+    key = backend if base_url is None else (backend, base_url)
+    if key not in EXTRACTORS:
+        EXTRACTORS[key] = LxmlExtractor(base_url) if backend == "lxml" else BeautifulSoupExtractor(base_url)
+    return EXTRACTORS[key]
+
+
+def get_page_extractor(backend=None, base_url=None):
+    """Extraktor für ganze Ergebnisseiten: mit EMBEDDED_JSON_EXTRACTION zuerst der JSON-Schnellweg, sonst direkt der DOM-Extraktor."""
+    dom_extractor = get_extractor(backend, base_url)
+    if not EMBEDDED_JSON_EXTRACTION:
+        return dom_extractor
+    if not EMBEDDED_JSON_LISTINGS_PATH:
+        if not hasattr(get_page_extractor, "warning_logged"):
+            logging.warning("EMBEDDED_JSON_EXTRACTION benötigt EMBEDDED_JSON_LISTINGS_PATH (Pfad zur Inserate-Liste). Verwende HTML.")
+            get_page_extractor.warning_logged = True
+        return dom_extractor
+    key = ("json", dom_extractor.name) if base_url is None else ("json", dom_extractor.name, base_url)
+    if key not in EXTRACTORS:
+        EXTRACTORS[key] = EmbeddedJsonExtractor(dom_extractor, EMBEDDED_JSON_LISTINGS_PATH)
+    return EXTRACTORS[key]
+
+
+def streaming_enabled():
+    """Streaming-Parsing aktiv? Benötigt lxml; beim Aufzeichnen (RECORD_DIR) wird die ganze Seite gebraucht."""
+    if not STREAMING_PARSE or RECORD_DIR:
+        return False
+    if etree is None:
+        if not hasattr(streaming_enabled, "warning_logged"):
+            logging.warning("STREAMING_PARSE benötigt das Paket 'lxml' (pip install lxml). Lade ganze Seiten.")
+            streaming_enabled.warning_logged = True
+        return False
+    return True
+
+
+class StreamingListingParser:
+    """
+    Inkrementeller Parser für den Streaming-Modus (lxml HTMLPullParser): bekommt die Antwort stückweise und gibt
+    jedes Inserat zurück, sobald sein Element geschlossen ist (extrahiert wie LxmlExtractor). 'finished' wird
+    gesetzt, sobald das Element um die Ergebnisliste geschlossen ist. Verarbeitete Inserate und <script>/<style>
+    werden sofort aus dem Baum entfernt, damit pro Seite nur wenig im Speicher bleibt.
+    """
+
+    def __init__(self, extractor=None, encoding="utf-8"):
+        self._extractor = extractor or get_extractor("lxml")
+        self._parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+        self._container = None # Elternelement des ersten Inserats (die Ergebnisliste)
+        self._plan = None # Extraktionsplan, beim ersten Inserat bestimmt
+        self.node_count = 0
+        self.listings = []
+        self.finished = False
+        self.root = None # Nach close(): was vom Baum übrig ist
+
+    @staticmethod
+    def _is_listing(element):
+        return element.tag == "div" and LISTING_CLASS in (element.get("class") or "").split()
+
+    def feed(self, chunk):
+        """Verarbeitet ein Stück der Antwort (Bytes). Gibt die Inserate zurück, die darin fertig geworden sind."""
+        self._parser.feed(chunk)
+        return self._read_events()
+
+    def close(self):
+        """Schliesst den Parser und gibt die ganze Seite als PageExtraction zurück."""
+        root = self.root = self._parser.close()
+        self._read_events()
+        if not self.node_count: # Keine Inserate: Seite wurde ganz gelesen, "Keine Resultate" wie gewohnt prüfen
+            return self._extractor.extract_page(root)
+        return PageExtraction(self.node_count, self.listings, False)
+
+    def _read_events(self):
+        completed = []
+        for event, element in self._parser.read_events():
+            if self.finished:
+                continue
+            if event == "start":
+                if self._container is None and self._is_listing(element):
+                    self._container = element.getparent()
+                continue
+            if element is self._container:
+                self.finished = True
+            elif element.tag in ("script", "style"):
+                element.clear(keep_tail=True)
+            elif self._is_listing(element):
+                if self._plan is None:
+                    self._plan = self._extractor.plan_for(element)
+                listing = self._extractor.extract_listing(element, self.node_count, self._plan)
+                self.node_count += 1
+                if listing is not None:
+                    completed.append(listing)
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                while element.getprevious() is not None: # Bereits verarbeitete Geschwister entfernen
+                    del parent[0]
+        self.listings.extend(completed)
+        return completed
+
+
+class Platform:
+    """
+    Anbindung eines Marktplatzes: baut die Such-URLs, liefert die Extraktoren für die Ergebnisseiten, normalisiert
+    Inserate-Links auf IDs und bestimmt Ratenlimit und Parallelitäts-Budget seines Hosts. Die Grundklasse beschreibt die
+    bisherige Seite (Suche unter SEARCH_PATH, Filter aus SEARCH_URL_PARAMETERS, Inserate wie in LISTING_SELECTOR);
+    ohne 'base_url' gilt BASE_URL. Nicht gesetzte Limits kommen aus HOST_RATE_LIMIT, HOST_BURST und MAX_CONCURRENT_REQUESTS.
+    Für einen Marktplatz mit anderer Seitenstruktur werden build_search_url, search_filters, die Extraktoren und
+    native_id in einer Unterklasse überschrieben und die Instanz in PLATFORMS eingetragen.
+    """
+
+    def __init__(self, name, base_url=None, search_path=SEARCH_PATH, rate_limit=None, burst=None, max_concurrency=None):
+        self.name = name
+        self._base_url = base_url
+        self.search_path = search_path
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+
+    def __repr__(self):
+        return f"Platform({self.name!r}, {self.base_url!r})"
+
+    @property
+    def base_url(self):
+        return self._base_url or BASE_URL
+
+    @property
+    def host(self):
+        return urlsplit(self.base_url).hostname
+
+    def owns_url(self, url):
+        """Gehört der (absolute) Link zu dieser Plattform?"""
+        return url.startswith(self.base_url)
+
+    def rate_limit_policy(self):
+        """(Tokens pro Sekunde, Vorrat) für den Token-Bucket des Hosts (siehe HostRateLimiter)."""
+        return (HOST_RATE_LIMIT if self.rate_limit is None else self.rate_limit,
+                HOST_BURST if self.burst is None else self.burst)
+
+    def concurrency_budget(self):
+        """Höchstzahl gleichzeitiger Anfragen an den Host (siehe FetchPool und HostCircuitBreaker)."""
+        return self.max_concurrency or MAX_CONCURRENT_REQUESTS
+
+    def search_filters(self, profiles):
+        """URL-Filter für die Abonnenten einer Suchanfrage (siehe build_search_filters)."""
+        return build_search_filters(profiles)
+
+    def build_search_url(self, search_term, page_number=1, filters=()):
+        """Baut die Such-URL für einen Suchbegriff, mit optionalen Filter-Parametern und ab Seite 2 mit Seitennummer."""
+        encoded_search_term = quote_plus(search_term) # URL-Encoding für Suchbegriffe
+        parameters = list(filters)
+        if page_number > 1:
+            parameters.append((PAGE_PARAMETER, page_number))
+        if parameters:
+            return f"{self.base_url}{self.search_path}{encoded_search_term}&{urlencode(parameters)}"
+        return f"{self.base_url}{self.search_path}{encoded_search_term}"
+
+    def dom_extractor(self, backend=None):
+        """DOM-Extraktor (z.B. für den Streaming-Parser), der relative Links mit der Basis-URL der Plattform ergänzt."""
+        return get_extractor(backend, self._base_url)
+
+    def page_extractor(self, backend=None):
+        """Extraktor für ganze Ergebnisseiten (siehe get_page_extractor)."""
+        return get_page_extractor(backend, self._base_url)
+
+    def native_id(self, url):
+        """Inserate-ID, wie sie die Plattform selbst vergibt (bisherige Seite: numerisches letztes Pfad-Segment)."""
+        return native_listing_id(url)
+
+    def listing_id(self, url):
+        """
+        Inserate-ID für den Speicher gesehener Inserate. Die Standard-Plattform behält ihre Nummern (bestehende
+        Speicher bleiben gültig), weitere Plattformen einen 63-bit Hash aus Plattformname und eigener ID.
+        """
+        if self.name == DEFAULT_PLATFORM:
+            return self.native_id(url)
+        digest = hashlib.blake2b(f"{self.name}:{self.native_id(url)}".encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') | HASHED_ID_FLAG
+
+
+PLATFORMS = {} # Name -> Platform (siehe configure_platforms)
+
+
+def configure_platforms(settings=None):
+    """Baut PLATFORMS aus DEFAULT_PLATFORM und 'settings' (Name -> Einstellungen, Standard: PLATFORM_SETTINGS) neu auf."""
+    settings = PLATFORM_SETTINGS if settings is None else settings
+    platforms = {DEFAULT_PLATFORM: Platform(DEFAULT_PLATFORM)}
+    for name, platform_settings in settings.items():
+        try:
+            platforms[name] = Platform(name, **platform_settings)
+        except TypeError as e:
+            logging.error(f"FEHLER in PLATFORM_SETTINGS für '{name}': {e}. Plattform wird ignoriert.")
+    PLATFORMS.clear()
+    PLATFORMS.update(platforms)
+
+
+configure_platforms()
+
+
+def platform_for_url(url):
+    """Plattform, zu der ein Inserate-Link gehört (Links ohne bekannte Basis-URL gehören zu DEFAULT_PLATFORM)."""
+    for platform in PLATFORMS.values():
+        if platform.name != DEFAULT_PLATFORM and platform.owns_url(url):
+            return platform
+    return PLATFORMS[DEFAULT_PLATFORM]
+
+
+def host_budgets(platforms):
+    """Host -> Parallelitäts-Budget der Plattformen (bei mehreren Plattformen auf einem Host zählt das kleinste)."""
+    budgets = {}
+    for platform in platforms:
+        budget = platform.concurrency_budget()
+        budgets[platform.host] = min(budgets.get(platform.host, budget), budget)
+    return budgets
+
+
+def host_concurrency(host):
+    """Parallelitäts-Budget eines Hosts: das seiner Plattform, sonst MAX_CONCURRENT_REQUESTS."""
+    return host_budgets(PLATFORMS.values()).get(host, MAX_CONCURRENT_REQUESTS)
+
+
+def fetch_pool_size(budgets):
+    """Grösse des gemeinsamen Abruf-Pools: FETCH_POOL_SIZE, sonst die Summe der Host-Budgets."""
+    return FETCH_POOL_SIZE or sum(budgets.values()) or MAX_CONCURRENT_REQUESTS
+
+
+# ==============================================================================
+# 7. FILTERFUNKTIONEN (Kategoriespezifisch)
+# ==============================================================================
+
+def check_shoe_size(title, description, target_sizes):
+    """Prüft, ob eine der Ziel-Schuhgrössen in Titel oder Beschreibung vorkommt."""
+    if not target_sizes: return True # Kein Filter -> immer OK
+    text_to_check = (title + " " + description).lower()
+    target_sizes_lower = [str(s).lower().strip() for s in target_sizes] # Sicherstellen Strings, lower, kein Whitespace
+
+    for size_str in target_sizes_lower:
+        if not size_str: continue # Leere Grössen überspringen
+        # Regex sucht nach der Grösse als ganzes Wort, optional mit Präfix wie "Gr.", "EU", "Size" etc.
+        size_pattern = re.escape(size_str).replace(r'\ ', r'\s*') # Erlaube variable Leerzeichen
+        pattern = r'(?i)\b(?:gr\.?|eur?|size|eu|größe|grösse|groesse|us|uk|fr)?\s*' + size_pattern + r'\b(?![\d.]?[\d])'
+
+        if re.search(pattern, text_to_check):
+            logging.info(f"      -> Schuhgrössen-Filter: '{size_str.upper()}' gefunden!")
+            return True # Eine passende Grösse reicht
+
+    logging.info(f"      -> Schuhgrössen-Filter: Keine der gesuchten Grössen ({', '.join(map(str,target_sizes))}) gefunden.")
+    return False
+
+def check_clothing_size(title, description, target_sizes):
+    """Prüft, ob eine der Ziel-Kleidergrössen (S, M, L etc.) in Titel oder Beschreibung vorkommt."""
+    if not target_sizes: return True # Kein Filter -> immer OK
+    text_to_check = (title + " " + description).lower()
+    target_sizes_lower = [str(s).lower().strip() for s in target_sizes] # Sicherstellen Strings, lower, kein Whitespace
+
+    for size_str in target_sizes_lower:
+        if not size_str: continue # Leere Grössen überspringen
+        # Regex sucht nach der Grösse als ganzes Wort, optional mit Präfix wie "Size", "Gr."
+        pattern = r'(?i)\b(?:size|gr\.?|größe|grösse|groesse|taille|taglia)?\s*' + re.escape(size_str) + r'\b'
+
+        if re.search(pattern, text_to_check):
+            logging.info(f"      -> Kleidergrössen-Filter: '{size_str.upper()}' gefunden!")
+            return True # Eine passende Grösse reicht
+
+    logging.info(f"      -> Kleidergrössen-Filter: Keine der gesuchten Grössen ({', '.join(map(str,target_sizes))}) gefunden.")
+    return False
+
+def check_macbook_specs(title, description, target_specs):
+    """Prüft, ob eine der Ziel-Spezifikationen (z.B. Chip) in Titel oder Beschreibung vorkommt."""
+    if not target_specs: return True # Kein Filter -> immer OK
+    text_to_check = (title + " " + description).lower()
+    target_specs_lower = [str(s).lower().strip() for s in target_specs]
+
+    for spec_str in target_specs_lower:
+        if not spec_str: continue
+        # Sucht nach der Spezifikation als ganzes Wort, z.B. "m1", nicht "m10"
+        pattern = r'\b' + re.escape(spec_str) + r'\b'
+        if re.search(pattern, text_to_check):
+            logging.info(f"      -> MacBook-Spezifikation: '{spec_str.upper()}' gefunden!")
+            return True # Eine passende Spezifikation reicht
+
+    logging.info(f"      -> MacBook-Spezifikation: Keine der gesuchten Specs ({', '.join(map(str,target_specs))}) gefunden.")
+    return False
+
+
+# ------------------------------------------------------------------------------
+# Vorkompilierte Filter-Engine
+# ------------------------------------------------------------------------------
+# Die drei Funktionen oben bauen pro Grösse und pro Inserat eine eigene Regex. Die Engine baut pro Typ
+# EIN kombiniertes Muster (alle Grössen als Alternativen mit gemeinsamem Präfix/Suffix) und kompiliert es
+# einmal beim Laden der Konfiguration. Ein Muster trifft genau dann, wenn eine der Einzel-Regexen trifft.
+
+# Typ -> (Log-Bezeichnung, Bezeichnung der Werte, Regex vor der Grösse, Funktion Grösse -> Regex-Stück, Regex nach der Grösse, Flags)
+SIZE_FILTER_PATTERNS = {
+    "shoes": (
+        "Schuhgrössen-Filter", "Grössen",
+        r'\b(?:gr\.?|eur?|size|eu|größe|grösse|groesse|us|uk|fr)?\s*',
+        lambda size_str: re.escape(size_str).replace(r'\ ', r'\s*'), # Erlaube variable Leerzeichen
+        r'\b(?![\d.]?[\d])',
+        re.IGNORECASE,
+    ),
+    "clothing": (
+        "Kleidergrössen-Filter", "Grössen",
+        r'\b(?:size|gr\.?|größe|grösse|groesse|taille|taglia)?\s*',
+        re.escape,
+        r'\b',
+        re.IGNORECASE,
+    ),
+    "macbook": (
+        "MacBook-Spezifikation", "Specs",
+        r'\b',
+        re.escape,
+        r'\b',
+        0,
+    ),
+}
+
+
+class SizeFilter:
+    """Vorkompilierter Grössen-/Spezifikationsfilter für einen Typ (ein Regex-Durchlauf pro Inserat)."""
+
+    __slots__ = ("item_type", "target_sizes", "label", "noun", "sizes", "sizes_display", "pattern")
+
+    def __init__(self, item_type, target_sizes):
+        self.item_type = item_type
+        self.target_sizes = list(target_sizes)
+        self.label, self.noun, prefix, size_to_regex, suffix, flags = SIZE_FILTER_PATTERNS[item_type]
+        # Sicherstellen Strings, lower, kein Whitespace; leere Grössen überspringen
+        self.sizes = [size_str for size_str in (str(s).lower().strip() for s in self.target_sizes) if size_str]
+        self.sizes_display = ', '.join(map(str, self.target_sizes)) # Für die Log-Ausgabe vorberechnet
+        if self.sizes:
+            # Eine benannte Gruppe pro Grösse, damit im Log steht, welche Grösse gefunden wurde
+            alternatives = "|".join(f"(?P<s{i}>{size_to_regex(size_str)})" for i, size_str in enumerate(self.sizes))
+            self.pattern = re.compile(prefix + "(?:" + alternatives + ")" + suffix, flags)
+        else:
+            self.pattern = None # Nur leere Grössen konfiguriert -> nichts kann passen
+
+    def matches_text(self, text_to_check):
+        """Prüft einen bereits kleingeschriebenen Text (Titel + " " + Beschreibung)."""
+        match = self.pattern.search(text_to_check) if self.pattern is not None else None
+        if match:
+            logging.info(f"      -> {self.label}: '{self.sizes[int(match.lastgroup[1:])].upper()}' gefunden!")
+            return True # Eine passende Grösse reicht
+        logging.info(f"      -> {self.label}: Keine der gesuchten {self.noun} ({self.sizes_display}) gefunden.")
+        return False
+
+    def matches(self, title, description):
+        """Prüft, ob eine der Zielgrössen in Titel oder Beschreibung vorkommt."""
+        return self.matches_text((title + " " + description).lower())
+
+    def matches_many(self, texts):
+        """Wie matches_text() für viele Texte auf einmal, ohne Log-Ausgabe pro Text (für die Batch-Filterung)."""
+        if self.pattern is None:
+            return [False] * len(texts)
+        search = self.pattern.search
+        return [search(text) is not None for text in texts]
+
+
+SIZE_FILTERS = {} # Typ -> SizeFilter (oder None, wenn der Typ keinen Filter hat)
+
+
+def get_size_filter(item_type):
+    """Gibt den vorkompilierten Filter für einen Typ zurück (None = kein Grössenfilter nötig)."""
+    if item_type not in SIZE_FILTERS:
+        target_sizes = SIZE_FILTERS_BY_TYPE.get(item_type, [])
+        SIZE_FILTERS[item_type] = SizeFilter(item_type, target_sizes) if item_type in SIZE_FILTER_PATTERNS and target_sizes else None
+    return SIZE_FILTERS[item_type]
+
+
+# ==============================================================================
+# 8. BENACHRICHTIGUNGSFUNKTION (Telegram)
+# ==============================================================================
+
+def send_telegram_message(bot_token, message_text, description, client=None):
+    """
+    Sendet eine fertige Nachricht an die Telegram Bot API (blockierend) über 'client' (None = HTTP_CLIENT).
+    Gibt ("ok", None), ("retry", Sekunden) bei 429 Too Many Requests oder ("error", None) zurück.
+    """
+    with METRICS.timer("notify_send"):
+        return _send_telegram_message(bot_token, message_text, description, client or HTTP_CLIENT)
+
+
+def _send_telegram_message(bot_token, message_text, description, client):
+    telegram_api_url = f"{TELEGRAM_API_URL}/bot{bot_token}/sendMessage"
+
+    payload = {
+        'chat_id': TELEGRAM_CHAT_ID,
+        'text': message_text,
+        'parse_mode': 'HTML',
+        'disable_web_page_preview': False # Zeigt eine Vorschau des Links an
+    }
+
+    try:
+        response = client.post(telegram_api_url, data=payload, timeout=15) # Timeout für Senden
+        if response.status_code == 429:
+            # Telegram nennt die Wartezeit in 'parameters.retry_after' (Fallback: Retry-After Header)
+            try:
+                retry_after = float(response.json().get('parameters', {}).get('retry_after'))
+            except (ValueError, TypeError):
+                retry_after = float(response.headers.get('Retry-After', TELEGRAM_RETRY_DELAY))
+            logging.warning(f"  -> Telegram Ratenlimit erreicht (429). Warte {retry_after:.0f}s.")
+            return "retry", retry_after
+        response.raise_for_status()  # Löst HTTPError bei Fehlern wie 4xx/5xx aus
+        response_data = response.json()
+
+        if response_data.get('ok'):
+            logging.info("  -> Telegram Nachricht erfolgreich gesendet.")
+            return "ok", None
+        # Detailliertere Fehlermeldung von Telegram loggen
+        error_desc = response_data.get('description', 'Keine Beschreibung')
+        error_code = response_data.get('error_code', 'N/A')
+        logging.error(f"  -> Telegram API Fehler (Code {error_code}): {error_desc}. Payload: {payload}")
+    except requests.exceptions.Timeout:
+         logging.error(f"  -> Timeout Fehler beim Senden der Telegram Nachricht für: {description}.")
+    except requests.exceptions.HTTPError as e:
+         logging.error(f"  -> HTTP Fehler beim Senden der Telegram Nachricht: {e.response.status_code} - {e.response.text}")
+    except requests.exceptions.RequestException as e:
+        logging.error(f"  -> Netzwerkfehler beim Senden der Telegram Nachricht: {e}")
+    except Exception as e:
+        logging.error(f"  -> Unerwarteter Fehler beim Senden der Telegram Nachricht für {description}: {e}", exc_info=True)
+    return "error", None
+
+
+def format_telegram_message(item_title, item_url, price):
+    """Baut den HTML-Text einer Fund-Nachricht."""
+    # Preis formatieren
+    if price is None: price_str = "Preis unbekannt"
+    elif price == 0: price_str = "Gratis"
+    else: price_str = f"{price} CHF"
+
+    # HTML Escaping für Sicherheit und korrekte Darstellung
+    escaped_title = html.escape(item_title)
+    escaped_price = html.escape(price_str)
+    escaped_url = html.escape(item_url)
+
+    return (
+        f"[{escaped_title}]:\n"
+        f"[{escaped_price}]\n\n"
+        f"{escaped_url}"
+    )
+
+
+def send_telegram_notification(item_title, item_url, price, item_name, priority=3):
+    """
+    Sendet eine formatierte Nachricht über einen Fund an Telegram, basierend auf der Priorität.
+    Läuft der Hintergrund-Versand (TelegramDispatcher), wird die Nachricht nur in die Warteschlange gestellt.
+    """
+    if not TELEGRAM_ENABLED:
+        if not hasattr(send_telegram_notification, "warning_logged"):
+             logging.warning("Telegram ist deaktiviert. Überspringe Benachrichtigung.")
+             send_telegram_notification.warning_logged = True
+        return
+
+    with METRICS.timer("notify"):
+        _send_or_enqueue_telegram_notification(item_title, item_url, price, item_name, priority)
+
+
+def _send_or_enqueue_telegram_notification(item_title, item_url, price, item_name, priority):
+    message_text = format_telegram_message(item_title, item_url, price)
+
+    if TELEGRAM_DISPATCHER_INSTANCE is not None:
+        logging.info(f"Stelle Telegram Nachricht für '{item_name}' in die Warteschlange: '{item_title}'")
+        TELEGRAM_DISPATCHER_INSTANCE.enqueue(priority, message_text)
+        return
+
+    # Wähle den Bot-Token basierend auf der Priorität. Fallback auf Prio 3.
+    bot_token = TELEGRAM_BOT_TOKENS.get(str(priority), TELEGRAM_BOT_TOKENS.get('3'))
+    logging.info(f"Sende Telegram Nachricht für '{item_name}': '{item_title}'")
+    send_telegram_message(bot_token, message_text, item_url)
+
+
+class TelegramOutbox:
+    """
+    Dauerhafte Warteschlange für Telegram-Nachrichten (SQLite, WAL-Modus).
+    Nachrichten werden erst nach erfolgreichem Versand gelöscht und überleben so einen Neustart.
+    Jeder Thread bekommt seine eigene Datenbankverbindung.
+    """
+
+    def __init__(self, filename=TELEGRAM_OUTBOX_FILE):
+        self.filename = filename
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, priority TEXT NOT NULL, "
+            "text TEXT NOT NULL, created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (priority, next_attempt)")
+        connection.commit()
+
+    def _connection(self):
+        if not hasattr(self._local, "connection"):
+            self._local.connection = sqlite3.connect(self.filename, timeout=30)
+        return self._local.connection
+
+    def put(self, priority, text):
+        """Legt eine Nachricht dauerhaft ab."""
+        now = time()
+        connection = self._connection()
+        connection.execute("INSERT INTO outbox (priority, text, created_at, next_attempt) VALUES (?, ?, ?, ?)", (priority, text, now, now))
+        connection.commit()
+
+    def due(self, priority, limit=100):
+        """Fällige Nachrichten einer Priorität als Liste von (id, text, created_at, attempts), älteste zuerst."""
+        return self._connection().execute(
+            "SELECT id, text, created_at, attempts FROM outbox WHERE priority = ? AND next_attempt <= ? ORDER BY id LIMIT ?",
+            (priority, time(), limit),
+        ).fetchall()
+
+    def count(self, priority=None):
+        if priority is None:
+            return self._connection().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+        return self._connection().execute("SELECT COUNT(*) FROM outbox WHERE priority = ?", (priority,)).fetchone()[0]
+
+    def delete(self, ids):
+        connection = self._connection()
+        connection.executemany("DELETE FROM outbox WHERE id = ?", ((message_id,) for message_id in ids))
+        connection.commit()
+
+    def postpone(self, ids, delay, count_attempt=True):
+        """Verschiebt Nachrichten um 'delay' Sekunden (bei Fehlern zählt das als Versuch, bei 429 nicht)."""
+        connection = self._connection()
+        connection.executemany(
+            "UPDATE outbox SET next_attempt = ?, attempts = attempts + ? WHERE id = ?",
+            ((time() + delay, 1 if count_attempt else 0, message_id) for message_id in ids),
+        )
+        connection.commit()
+
+
+class TelegramDispatcher:
+    """
+    Versendet Telegram-Nachrichten im Hintergrund, damit das Scraping nie auf Telegram wartet.
+    Pro Bot-Token (Priorität) gibt es einen eigenen Thread mit eigener Warteschlange aus der dauerhaften Outbox.
+    Stauen sich mindestens TELEGRAM_DIGEST_THRESHOLD Nachrichten, werden sie zu Sammelnachrichten zusammengefasst.
+    429-Antworten werden mit der von Telegram genannten 'retry_after'-Wartezeit respektiert.
+    Jeder Thread sendet über einen eigenen HttpClient: die requests-Session und die Zähler von HTTP_CLIENT
+    gehören dem Suchdurchlauf und sind nicht für den gleichzeitigen Gebrauch aus mehreren Threads gedacht.
+    """
+
+    def __init__(self, bot_tokens, outbox, digest_threshold=TELEGRAM_DIGEST_THRESHOLD):
+        self.bot_tokens = dict(bot_tokens)
+        self.outbox = outbox
+        self.digest_threshold = digest_threshold
+        self._wakeups = {priority: threading.Event() for priority in self.bot_tokens}
+        self._stopping = threading.Event()
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self.stats = {"messages": 0, "requests": 0, "digests": 0, "rate_limited": 0, "failed": 0}
+        self.latencies = deque(maxlen=10000) # Sekunden von enqueue() bis zur erfolgreichen Zustellung
+
+    def start(self):
+        """Startet einen Versand-Thread pro Bot; bereits wartende Nachrichten aus der Outbox werden sofort gesendet."""
+        for priority in self.bot_tokens:
+            thread = threading.Thread(target=self._worker, args=(priority,), name=f"telegram-{priority}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        pending = self.outbox.count()
+        if pending:
+            logging.info(f"{pending} Telegram Nachricht(en) aus '{self.outbox.filename}' werden nachgeliefert.")
+
+    def enqueue(self, priority, message_text):
+        """Stellt eine Nachricht für den Bot der Priorität in die Warteschlange (Fallback auf Prio 3)."""
+        priority = str(priority) if str(priority) in self.bot_tokens else '3'
+        self.outbox.put(priority, message_text)
+        self._wakeups[priority].set()
+
+    def stop(self, timeout=10.0):
+        """Beendet die Threads, nachdem fällige Nachrichten gesendet wurden (höchstens 'timeout' Sekunden)."""
+        self._stopping.set()
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+        deadline = monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - monotonic()))
+        remaining = self.outbox.count()
+        if remaining:
+            logging.warning(f"{remaining} Telegram Nachricht(en) bleiben in '{self.outbox.filename}' und werden beim nächsten Start gesendet.")
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _build_batches(self, rows):
+        """Teilt fällige Nachrichten in Sendungen auf: einzeln, oder ab der Schwelle als Sammelnachrichten (max. 4096 Zeichen)."""
+        if len(rows) < self.digest_threshold:
+            return [([row], row[1]) for row in rows]
+        batches = []
+        current_rows, current_texts = [], []
+        for row in rows:
+            candidate = "\n\n".join(current_texts + [row[1]])
+            if current_rows and len(candidate) + 40 > TELEGRAM_MAX_MESSAGE_LENGTH:
+                batches.append((current_rows, f"<b>{len(current_rows)} neue Treffer</b>\n\n" + "\n\n".join(current_texts)))
+                current_rows, current_texts = [], []
+            current_rows.append(row)
+            current_texts.append(row[1])
+        if current_rows:
+            batches.append((current_rows, f"<b>{len(current_rows)} neue Treffer</b>\n\n" + "\n\n".join(current_texts)))
+        return batches
+
+    def _worker(self, priority):
+        client = HttpClient(pool_size=1, conditional_requests=False)
+        try:
+            self._send_loop(priority, client)
+        finally:
+            client.close()
+
+    def _send_loop(self, priority, client):
+        bot_token = self.bot_tokens[priority]
+        wakeup = self._wakeups[priority]
+        while True:
+            rows = self.outbox.due(priority)
+            if not rows:
+                if self._stopping.is_set():
+                    return
+                wakeup.wait(timeout=1.0)
+                wakeup.clear()
+                continue
+
+            for batch_rows, message_text in self._build_batches(rows):
+                ids = [row[0] for row in batch_rows]
+                self._count("requests")
+                status, retry_after = send_telegram_message(bot_token, message_text, f"{len(ids)} Nachricht(en)", client)
+                if status == "ok":
+                    self.outbox.delete(ids)
+                    self._count("messages", len(ids))
+                    if len(ids) > 1:
+                        self._count("digests")
+                    now = time()
+                    self.latencies.extend(now - row[2] for row in batch_rows)
+                elif status == "retry":
+                    self._count("rate_limited")
+                    self.outbox.postpone(ids, retry_after, count_attempt=False)
+                    break # Restliche Sendungen erst nach der Wartezeit
+                else:
+                    failed = [row[0] for row in batch_rows if row[3] + 1 >= TELEGRAM_MAX_ATTEMPTS]
+                    if failed:
+                        logging.error(f"  -> {len(failed)} Telegram Nachricht(en) nach {TELEGRAM_MAX_ATTEMPTS} Versuchen verworfen.")
+                        self.outbox.delete(failed)
+                        self._count("failed", len(failed))
+                    for row in batch_rows:
+                        if row[0] not in failed:
+                            self.outbox.postpone([row[0]], TELEGRAM_RETRY_DELAY * 2 ** row[3])
+                    break
+
+    def stats_summary(self):
+        """Kurzer Text mit den bisherigen Versand-Statistiken für das Log."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            latencies = sorted(self.latencies)
+        latency = f", Latenz p50 {latencies[len(latencies) // 2]:.2f}s" if latencies else ""
+        return (f"Telegram: {stats['messages']} Nachrichten in {stats['requests']} Anfragen ({stats['digests']} Sammelnachrichten), "
+                f"{stats['rate_limited']}x Ratenlimit, {stats['failed']} verworfen{latency}")
+
+
+TELEGRAM_DISPATCHER_INSTANCE = None # Wird in main() gestartet, wenn TELEGRAM_DISPATCHER aktiv ist
+
+
+# ==============================================================================
+# 9. KERNLOGIK: Inserate prüfen für einen Suchbegriff
+# ==============================================================================
+
+class SearchProfile:
+    """
+    Ein geprüftes, unveränderliches Suchprofil aus der Konfiguration. Alle Werte werden einmal beim Laden
+    validiert und umgewandelt (max_price, priority, max_pages als int, Typ in Kleinbuchstaben, Grössenfilter
+    vorkompiliert), damit der Suchdurchlauf nichts mehr prüfen oder parsen muss.
+    """
+
+    __slots__ = ("name", "type", "max_price", "target_sizes", "size_filter", "priority", "max_pages",
+                 "category", "sort_newest", "max_percent_of_median", "search_terms", "platforms", "source")
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            object.__setattr__(self, field, values[field])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SearchProfile ist unveränderlich.")
+
+    def __repr__(self):
+        return f"SearchProfile({self.name!r}, type={self.type!r}, max_price={self.max_price})"
+
+    def with_name(self, name):
+        """Gibt das Profil mit dem Namen 'name' zurück: dasselbe Objekt, wenn er gleich bleibt, sonst eine Kopie."""
+        if name == self.name:
+            return self
+        values = {field: getattr(self, field) for field in self.__slots__}
+        values["name"] = name
+        return SearchProfile(**values)
+
+    @classmethod
+    def from_config(cls, item_config, index):
+        """
+        Prüft einen Eintrag aus der Konfiguration und gibt ein SearchProfile zurück,
+        oder None (mit Fehlermeldung im Log), wenn das Profil übersprungen werden muss.
+        """
+        if not isinstance(item_config, dict):
+            logging.error(f"FEHLER in Konfiguration: Eintrag #{index+1} ist kein Such-Objekt. Überspringe.")
+            return None
+        item_name = profile_name(item_config, index)
+        item_type = str(item_config.get("type", "global")).lower() # Typ bestimmt spezielle Filter
+        max_price = item_config.get("max_price")
+        priority = item_config.get("priority", 3) # Hole Priorität, Standard ist 3 (unwichtig)
+        max_pages = item_config.get("max_pages", MAX_RESULT_PAGES) # Anzahl Ergebnisseiten, die höchstens geladen werden
+        max_percent_of_median = item_config.get("max_percent_of_median") # Optional: Preis höchstens X% des Medians (Preisverlauf)
+        search_terms = item_config.get("search_terms", [])
+        platforms = item_config.get("platforms", [DEFAULT_PLATFORM]) # Marktplätze, auf denen gesucht wird (siehe Platform)
+
+        # --- Eingabevalidierung für die Konfiguration ---
+        if not search_terms or not isinstance(search_terms, list):
+            logging.warning(f"Überspringe Profil '{item_name}': Enthält keine gültige Liste von 'search_terms'.")
+            return None
+        if not all(isinstance(term, str) and term.strip() for term in search_terms):
+            logging.warning(f"Überspringe Profil '{item_name}': 'search_terms' enthält ungültige oder leere Einträge.")
+            return None
+        if max_price is None:
+            logging.error(f"FEHLER in Konfiguration für '{item_name}': Kein 'max_price' definiert. Überspringe Profil.")
+            return None
+        if isinstance(platforms, str):
+            platforms = [platforms]
+        if not platforms or not isinstance(platforms, list):
+            logging.error(f"FEHLER in Konfiguration für '{item_name}': 'platforms' muss eine Liste von Plattform-Namen sein. Überspringe Profil.")
+            return None
+        unknown_platforms = [name for name in platforms if name not in PLATFORMS]
+        if unknown_platforms:
+            logging.error(f"FEHLER in Konfiguration für '{item_name}': Unbekannte Plattform(en) {unknown_platforms} "
+                          f"(bekannt: {', '.join(PLATFORMS)}). Überspringe Profil.")
+            return None
+        try:
+            max_price = int(max_price)
+            if max_price < 0: raise ValueError("Preis muss positiv sein.")
+        except (ValueError, TypeError):
+             logging.error(f"FEHLER in Konfiguration für '{item_name}': Ungültiger 'max_price' ({max_price}). Muss eine positive ganze Zahl sein. Überspringe Profil.")
+             return None
+        try:
+            priority = int(priority)
+        except (ValueError, TypeError):
+             logging.error(f"FEHLER in Konfiguration für '{item_name}': Ungültige 'priority' ({priority}). Verwende 3.")
+             priority = 3
+        try:
+            max_pages = int(max_pages)
+            if max_pages < 1: raise ValueError("Mindestens eine Seite.")
+        except (ValueError, TypeError):
+             logging.error(f"FEHLER in Konfiguration für '{item_name}': Ungültiges 'max_pages' ({max_pages}). Verwende {MAX_RESULT_PAGES}.")
+             max_pages = MAX_RESULT_PAGES
+        if max_percent_of_median is not None:
+            try:
+                max_percent_of_median = float(max_percent_of_median)
+                if max_percent_of_median <= 0: raise ValueError("Muss positiv sein.")
+            except (ValueError, TypeError):
+                 logging.error(f"FEHLER in Konfiguration für '{item_name}': Ungültiges 'max_percent_of_median' ({max_percent_of_median}). Regel wird nicht angewendet.")
+                 max_percent_of_median = None
+
+        return cls(
+            name=item_name,
+            type=item_type,
+            max_price=max_price,
+            target_sizes=tuple(SIZE_FILTERS_BY_TYPE.get(item_type, [])), # Grössen aus der globalen Konfig
+            size_filter=get_size_filter(item_type),
+            priority=priority,
+            max_pages=max_pages,
+            category=item_config.get("category"), # Optional: Kategorie für den serverseitigen Filter
+            sort_newest=bool(item_config.get("sort_newest", SORT_BY_NEWEST)),
+            max_percent_of_median=max_percent_of_median,
+            search_terms=tuple(term.strip() for term in search_terms),
+            platforms=tuple(dict.fromkeys(platforms)), # Reihenfolge wie konfiguriert, ohne Doppelte
+            source=json.dumps(item_config, sort_keys=True, ensure_ascii=False), # Zum Erkennen unveränderter Profile
+        )
+
+
+def profile_name(item_config, index):
+    """Name eines Profils aus der Konfiguration; ohne "name" abhängig von der Position in der Liste."""
+    return item_config.get("name", f"Unbenanntes Profil #{index+1}")
+
+
+def compile_profiles(monitoring_config, previous_profiles=()):
+    """
+    Kompiliert die geladene Konfiguration (Liste von Such-Objekten) zu einem Tupel von SearchProfile.
+    Unveränderte Profile aus 'previous_profiles' werden als dasselbe Objekt übernommen; der Name wird dabei neu
+    bestimmt, da er ohne "name" von der (evtl. verschobenen) Position abhängt.
+    """
+    previous_by_source = {profile.source: profile for profile in previous_profiles}
+    profiles = []
+    for index, item_config in enumerate(monitoring_config):
+        source = json.dumps(item_config, sort_keys=True, ensure_ascii=False)
+        profile = previous_by_source.get(source)
+        if profile is not None:
+            profile = profile.with_name(profile_name(item_config, index))
+        else:
+            profile = SearchProfile.from_config(item_config, index)
+        if profile is not None:
+            profiles.append(profile)
+    return tuple(profiles)
+
+
+def load_profiles(filename=CONFIG_FILE, previous_profiles=()):
+    """
+    Lädt und kompiliert die Konfigurationsdatei. Gibt das Tupel der Profile zurück,
+    oder None (mit Fehlermeldung), wenn die Datei fehlt, leer oder kein gültiges Listenformat ist.
+    """
+    monitoring_config = load_json_file(filename, [])
+    if not monitoring_config:
+        logging.error(f"FEHLER: Konfiguration '{filename}' konnte nicht geladen werden oder ist leer. Bitte erstellen/prüfen Sie die Datei.")
+        return None
+    if not isinstance(monitoring_config, list):
+        logging.error(f"FEHLER: Der Inhalt von '{filename}' muss eine Liste von Such-Objekten sein. Aktueller Typ: {type(monitoring_config)}")
+        return None
+    return compile_profiles(monitoring_config, previous_profiles)
+
+
+class ConfigWatcher:
+    """
+    Beobachtet die Konfigurationsdatei (Änderungszeit und Grösse, geprüft zwischen den Durchläufen) und
+    tauscht die kompilierten Profile bei Änderungen als Ganzes aus. Eine fehlerhafte neue Datei wird verworfen,
+    die bisherigen Profile bleiben dann aktiv.
+    """
+
+    def __init__(self, filename=CONFIG_FILE):
+        self.filename = filename
+        self.profiles = ()
+        self._signature = None
+
+    def _current_signature(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """Erstes Laden. Gibt False zurück, wenn keine gültige Konfiguration vorhanden ist."""
+        self._signature = self._current_signature()
+        profiles = load_profiles(self.filename)
+        if profiles is None:
+            return False
+        self.profiles = profiles
+        return True
+
+    def poll(self):
+        """Lädt die Konfiguration neu, falls sich die Datei geändert hat. Gibt True zurück, wenn neue Profile aktiv sind."""
+        signature = self._current_signature()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        profiles = load_profiles(self.filename, self.profiles)
+        if profiles is None:
+            logging.error(f"Neue Konfiguration '{self.filename}' ist ungültig. Behalte die bisherigen {len(self.profiles)} Profile.")
+            return False
+        kept = sum(1 for profile in profiles if any(profile is previous for previous in self.profiles))
+        self.profiles = profiles # Austausch als Ganzes, zwischen zwei Durchläufen
+        logging.info(f"Konfiguration '{self.filename}' neu geladen: {len(profiles)} Profile ({kept} unverändert, {len(profiles) - kept} neu/geändert).")
+        return True
+
+
+def build_search_filters(profiles):
+    """
+    Übersetzt die Profilfelder aller Abonnenten einer Suchanfrage in URL-Parameter (Liste von (Name, Wert)).
+    Da ein Abruf an mehrere Profile verteilt wird, darf der Filter nichts ausschliessen, was eines davon sucht:
+    Höchstpreis = grösster max_price, Kategorie nur wenn alle dieselbe haben, Sortierung nur wenn alle sie wünschen.
+    """
+    if not FILTER_PUSHDOWN:
+        return []
+    filters = []
+    if SEARCH_URL_PARAMETERS.get("max_price"):
+        filters.append((SEARCH_URL_PARAMETERS["max_price"], max(profile.max_price for profile in profiles)))
+    categories = {profile.category for profile in profiles}
+    if SEARCH_URL_PARAMETERS.get("category") and len(categories) == 1 and None not in categories:
+        filters.append((SEARCH_URL_PARAMETERS["category"], categories.pop()))
+    if SEARCH_URL_PARAMETERS.get("sort") and SORT_NEWEST_VALUE and all(profile.sort_newest for profile in profiles):
+        filters.append((SEARCH_URL_PARAMETERS["sort"], SORT_NEWEST_VALUE))
+    return filters
+
+
+def results_newest_first(filters):
+    """Sind die Ergebnisse sicher nach Datum sortiert (neueste zuerst)? Nur wenn der Sortier-Parameter in der URL steht."""
+    return bool(SEARCH_URL_PARAMETERS.get("sort")) and (SEARCH_URL_PARAMETERS["sort"], SORT_NEWEST_VALUE) in filters
+
+
+PRICE_FILTER_STATS = {True: [0, 0, 0], False: [0, 0, 0]} # Pushdown aktiv? -> [Seiten, Inserate, würden clientseitig verworfen]
+
+
+def record_price_drops(profiles, page, filters):
+    """
+    Zählt, wie viele Inserate einer Seite der clientseitige Preisfilter für ALLE Abonnenten verwerfen würde
+    (zu teuer oder ohne lesbaren Preis). Der Vergleich mit/ohne Pushdown zeigt, wie viel der Seite umsonst geladen wird.
+    Verworfen wird hier nichts: die Inserate laufen danach wie immer durch process_listings.
+    """
+    max_price = max(profile.max_price for profile in profiles)
+    dropped = 0
+    for listing in page.listings:
+        price = parse_price_text(listing.price_text)
+        if price is None or price > max_price:
+            dropped += 1
+    stats = PRICE_FILTER_STATS[bool(filters)]
+    stats[0] += 1
+    stats[1] += len(page.listings)
+    stats[2] += dropped
+    if page.listings:
+        logging.debug(f"    Preisfilter: {dropped} von {len(page.listings)} Inseraten würden verworfen ({'mit' if filters else 'ohne'} Filter in der URL).")
+
+
+def price_filter_stats_summary():
+    """Kurzer Text mit den Inseraten pro Seite, die der Preisfilter verwerfen würde, getrennt nach mit/ohne Filter in der URL."""
+    parts = []
+    for pushed_down, label in ((False, "ohne"), (True, "mit")):
+        pages, listings, dropped = PRICE_FILTER_STATS[pushed_down]
+        if pages:
+            parts.append(f"{label} Filter in der URL würden Ø {dropped / pages:.1f} von {listings / pages:.1f} Inseraten pro Seite verworfen")
+    return "Preisfilter: " + ("; ".join(parts) if parts else "noch keine Seiten")
+
+
+def build_search_url(search_term, page_number=1, filters=(), platform=None):
+    """
+    Baut die Such-URL für einen Suchbegriff auf 'platform' (Standard: DEFAULT_PLATFORM), mit optionalen
+    Filter-Parametern (siehe build_search_filters) und ab Seite 2 mit Seitennummer.
+    """
+    return (platform or PLATFORMS[DEFAULT_PLATFORM]).build_search_url(search_term, page_number, filters)
+
+
+def record_search_page(search_url, html_text):
+    """Speichert eine geladene Suchseite im RECORD_DIR (für das Offline-Replay), zusammen mit ihrem URL-Pfad im Index."""
+    parts = urlsplit(search_url)
+    request_path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    filename = hashlib.sha1(request_path.encode('utf-8')).hexdigest()[:16] + ".html"
+    try:
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        with open(os.path.join(RECORD_DIR, filename), 'w', encoding='utf-8') as f:
+            f.write(html_text)
+    except IOError as e:
+        logging.error(f"Fehler beim Aufzeichnen der Seite '{request_path}': {e}")
+        return
+    index_filename = os.path.join(RECORD_DIR, RECORD_INDEX_FILE)
+    index = load_json_file(index_filename, {})
+    if index.get(request_path) != filename:
+        index[request_path] = filename
+        save_json_file(index, index_filename)
+
+
+def log_deferred_search(search_term, error):
+    """Loggt eine wegen pausiertem Host (offener Schutzschalter) nicht gesendete Suchanfrage."""
+    logging.info(f"    {error}: Suchanfrage für '{search_term}' zurückgestellt.")
+
+
+def fetch_search_page(search_term, cache_key=None, page_number=1, filters=(), platform=None):
+    """
+    Lädt eine Suchergebnisseite für einen Suchbegriff (blockierend) über die gemeinsame HTTP-Session.
+    Gibt den HTML-Text, NOT_MODIFIED (304), DEFERRED (Host pausiert) oder None bei Fehlern zurück.
+    """
+    search_url = build_search_url(search_term, page_number, filters, platform)
+    logging.info(f"  URL: {search_url}")
+
+    try:
+        html_text = HTTP_CLIENT.get(search_url, cache_key=(search_url, cache_key))
+        logging.debug(f"    Seite für '{search_term}' erfolgreich geladen.")
+        if RECORD_DIR and html_text is not NOT_MODIFIED:
+            record_search_page(search_url, html_text)
+        return html_text
+    except CircuitOpenError as e:
+        log_deferred_search(search_term, e)
+        return DEFERRED
+    except requests.exceptions.Timeout:
+         logging.error(f"    Timeout ({REQUEST_TIMEOUT}s) beim Laden der Seite für '{search_term}'.")
+    except requests.exceptions.HTTPError as e:
+         logging.error(f"    HTTP Fehler {e.response.status_code} beim Laden der Seite für '{search_term}'.")
+    except requests.exceptions.RequestException as e:
+        logging.error(f"    Netzwerkfehler beim Laden der Seite für '{search_term}': {e}")
+    except Exception as e:
+        logging.error(f"    Unerwarteter Fehler beim Seitenabruf für '{search_term}': {e}", exc_info=True)
+    return None
+
+
+def check_single_search_term(search_term, profile, seen_items_set):
+    """
+    Prüft gebrauchtplatformen.ch für EINEN spezifischen Suchbegriff und das zugehörige SearchProfile.
+    Extrahiert Inserate, filtert sie nach Preis und ggf. Grösse, sendet Benachrichtigungen.
+    Gibt True zurück, wenn neue passende Inserate gefunden wurden, sonst False.
+    """
+    logging.info(f"---> Suche nach '{search_term}' (für Item: '{profile.name}', Typ: {profile.type}, MaxPreis: {profile.max_price}, Größen: {profile.target_sizes or 'N/A'})")
+
+    # --- Seite abrufen ---
+    filters = build_search_filters([profile])
+    html_text = fetch_search_page(search_term, cache_key=profile.name, filters=filters)
+    if html_text is None or html_text is DEFERRED:
+        return False
+    if html_text is NOT_MODIFIED:
+        logging.info(f"    Seite für '{search_term}' unverändert (304). Überspringe Parsing.")
+        return False
+
+    return process_search_page(search_term, profile, html_text, seen_items_set, filters)
+
+
+def process_search_page(search_term, profile, html_text, seen_items_set, filters=()):
+    """
+    Verarbeitet eine bereits geladene Suchergebnisseite: Inserate extrahieren, filtern, benachrichtigen.
+    Gibt True zurück, wenn neue passende Inserate gefunden wurden, sonst False.
+    """
+    page = extract_search_page(html_text)
+    record_price_drops([profile], page, filters)
+    return process_listings(search_term, profile, page, seen_items_set)
+
+
+def extract_search_page(html_text, platform=None):
+    """Parst eine Suchergebnisseite mit dem Extraktor der Plattform und loggt, was gefunden wurde. Gibt ein PageExtraction zurück."""
+    return log_page_extraction((platform or PLATFORMS[DEFAULT_PLATFORM]).page_extractor().extract(html_text))
+
+
+def log_page_extraction(page):
+    """Loggt, was auf einer Seite gefunden wurde, und gibt die Seite unverändert zurück."""
+    METRICS.count("pages")
+    METRICS.count("listings", len(page.listings))
+    logging.info(f"    {page.node_count} potenzielle Inserate-Elemente mit Selektor '{LISTING_SELECTOR}' gefunden.")
+
+    if not page.node_count:
+        if page.no_results:
+            logging.info(f"    Keine Inserate gefunden (Bestätigung auf der Seite).")
+        else:
+            logging.warning(f"    Keine Inserate mit Selektor '{LISTING_SELECTOR}' gefunden und keine 'Keine Resultate'-Meldung. Seitenstruktur möglicherweise geändert?")
+    return page
+
+
+def evaluate_listing(listing, profile):
+    """Prüft Preis und ggf. Grösse eines Inserats für ein Profil. Gibt (passt, Preis) zurück."""
+    max_price = profile.max_price
+    passes_filters = True # Annahme: Passt, bis ein Filter fehlschlägt
+
+    # 1. Preis extrahieren und prüfen
+    price = parse_price_text(listing.price_text)
+    logging.info(f"      Prüfe Preis (Max: {max_price} CHF)...")
+    if price is None:
+        passes_filters = False
+        logging.info(f"      -> Preisfilter FEHLGESCHLAGEN: Preis nicht extrahierbar oder 'Auf Anfrage'/'VB'.")
+    elif price > max_price:
+        passes_filters = False
+        logging.info(f"      -> Preisfilter FEHLGESCHLAGEN: Preis ({price} CHF) ist zu hoch (Max: {max_price} CHF).")
+    else:
+        logging.info(f"      -> Preis ({price if price is not None else 'N/A'} CHF) OK!")
+        if profile.max_percent_of_median is not None and not check_median_price(profile, price):
+            passes_filters = False
+
+    # 2. Spezifischer Grössen-Filter (nur wenn Preis passt und Filter nötig)
+    if passes_filters and profile.size_filter is not None:
+        description = listing.description
+        logging.debug(f"      Extrahierte Beschreibung (für Grössenfilter): '{description[:100]}...'") # Log nur Anfang
+
+        logging.info(f"      Prüfe Grössenfilter ({profile.type}): {profile.target_sizes}")
+        if not profile.size_filter.matches(listing.title, description):
+            passes_filters = False
+            logging.info(f"      -> Grössenfilter FEHLGESCHLAGEN.")
+        else:
+             logging.info(f"      -> Grössenfilter OK!")
+    return passes_filters, price
+
+
+def median_price_limit(profile):
+    """
+    Preisgrenze der Regel "max_percent_of_median": max_percent_of_median Prozent des Medianpreises des Profils
+    der letzten PRICE_HISTORY_WINDOW_DAYS Tage. Gibt (Grenze, Median, Anzahl Preise) zurück; die Grenze ist None,
+    wenn die Regel nicht gilt (kein Preisverlauf oder weniger als PRICE_HISTORY_MIN_SAMPLES Preise).
+    """
+    if PRICE_HISTORY_INSTANCE is None:
+        if not hasattr(median_price_limit, "warning_logged"):
+            logging.warning("'max_percent_of_median' benötigt PRICE_HISTORY = True. Die Regel wird nicht angewendet.")
+            median_price_limit.warning_logged = True
+        return None, None, 0
+    median, samples = PRICE_HISTORY_INSTANCE.median_price(profile.name)
+    if samples < PRICE_HISTORY_MIN_SAMPLES:
+        return None, median, samples
+    return median * profile.max_percent_of_median / 100, median, samples
+
+
+def check_median_price(profile, price):
+    """Regel "max_percent_of_median" für ein Inserat (siehe median_price_limit). Ohne genug Verlauf gilt sie als erfüllt."""
+    limit, median, samples = median_price_limit(profile)
+    if limit is None:
+        if PRICE_HISTORY_INSTANCE is not None:
+            logging.info(f"      -> Median-Regel übersprungen: erst {samples} Preise im Verlauf (mindestens {PRICE_HISTORY_MIN_SAMPLES}).")
+        return True
+    if price > limit:
+        logging.info(f"      -> Median-Regel FEHLGESCHLAGEN: {price} CHF ist mehr als {profile.max_percent_of_median:g}% des Medians ({median} CHF).")
+        return False
+    logging.info(f"      -> Median-Regel OK: {price} CHF ≤ {limit:.0f} CHF ({profile.max_percent_of_median:g}% von {median} CHF).")
+    return True
+
+
+class ListingBatch:
+    """
+    Spaltenweise Sicht auf die Inserate einer Seite für die Batch-Filterung (siehe FILTER_BATCH). Preise und
+    "gesehen" werden einmal pro Inserat ermittelt, für alle abonnierenden Profile zusammen. passes() liefert pro
+    Profil die Filterergebnisse aller Inserate als einen Vergleich über das Preis-Array (mit NumPy vektorisiert,
+    sonst als Listen); der Grössenfilter läuft nur für Inserate mit passendem Preis, pro Typ und Inserat einmal.
+    """
+
+    def __init__(self, listings, seen_items):
+        self.listings = listings
+        self.prices = [parse_price_text(listing.price_text) for listing in listings]
+        urls = [listing.url for listing in listings]
+        self.seen = seen_items.contains_many(urls) if hasattr(seen_items, "contains_many") else [url in seen_items for url in urls]
+        self._texts = {}        # Index -> kleingeschriebener Titel + Beschreibung (nur für Grössenfilter)
+        self._size_results = {} # Typ -> {Index: Ergebnis des Grössenfilters}
+        if np is not None:
+            self._price_array = np.array([math.nan if price is None else price for price in self.prices], dtype=np.float64)
+            self._seen_array = np.array(self.seen, dtype=bool)
+
+    def __len__(self):
+        return len(self.listings)
+
+    def _size_results_for(self, size_filter, indexes):
+        """Ergebnisse des Grössenfilters für die Inserate 'indexes'; jedes wird pro Typ nur einmal geprüft."""
+        results = self._size_results.setdefault(size_filter.item_type, {})
+        missing = [index for index in indexes if index not in results]
+        if missing:
+            texts = self._texts
+            for index in missing:
+                if index not in texts:
+                    listing = self.listings[index]
+                    texts[index] = (listing.title + " " + listing.description).lower()
+            results.update(zip(missing, size_filter.matches_many([texts[index] for index in missing])))
+        return results
+
+    def passes(self, profile, indexes=None):
+        """
+        Für jedes Inserat, ob es die Filter des Profils besteht (wie evaluate_listing): Preis bekannt und höchstens
+        max_price, ggf. höchstens die Grenze der Median-Regel, und ggf. passende Grösse. "Gesehen" zählt hier nicht.
+        Mit 'indexes' werden nur diese Inserate geprüft (z.B. die neuen oder geänderten), alle anderen ergeben False.
+        """
+        limit = profile.max_price
+        if profile.max_percent_of_median is not None:
+            median_limit = median_price_limit(profile)[0]
+            if median_limit is not None:
+                limit = min(limit, median_limit)
+        if np is not None:
+            if indexes is None:
+                mask = self._price_array <= limit # NaN (kein Preis) ergibt False
+            else:
+                indexes = np.asarray(indexes, dtype=np.intp)
+                mask = np.zeros(len(self.listings), dtype=bool)
+                mask[indexes] = self._price_array[indexes] <= limit
+            candidates = np.flatnonzero(mask).tolist()
+        else:
+            mask = [False] * len(self.prices)
+            for index in (range(len(self.prices)) if indexes is None else indexes):
+                price = self.prices[index]
+                mask[index] = price is not None and price <= limit
+            candidates = [index for index, passes in enumerate(mask) if passes]
+        if profile.size_filter is not None and candidates:
+            results = self._size_results_for(profile.size_filter, candidates)
+            if np is not None:
+                mask[candidates] = [results[index] for index in candidates]
+            else:
+                for index in candidates:
+                    mask[index] = results[index]
+        return mask
+
+    def matches(self, profiles):
+        """Liefert (Listing, Profil) für jedes noch nicht gesehene Inserat, das die Filter des Profils besteht."""
+        for profile in profiles:
+            mask = self.passes(profile)
+            if np is not None:
+                indexes = np.flatnonzero(mask & ~self._seen_array)
+            else:
+                indexes = [index for index, passes in enumerate(mask) if passes and not self.seen[index]]
+            for index in indexes:
+                yield self.listings[index], profile
+
+
+# Zustand eines Inserats beim letzten Prüfen: Fingerabdruck (Preis-Text, Hash von Titel+Beschreibung), Preis, Zeitpunkt
+CachedListing = namedtuple("CachedListing", ["fingerprint", "price", "last_seen"])
+
+
+def listing_fingerprint(listing, profile):
+    """
+    Fingerabdruck eines Inserats für ein Profil: ändert sich, sobald Preis, Titel oder Beschreibung sich ändern.
+    Bei Profilen mit "max_percent_of_median" gehört die aktuelle Grenze der Median-Regel dazu, damit ein deswegen
+    abgelehntes Inserat wieder geprüft wird, sobald sich der Median verschiebt.
+    """
+    median_limit = median_price_limit(profile)[0] if profile.max_percent_of_median is not None else None
+    return listing.price_text, hash((listing.title, listing.description)), median_limit
+
+
+class ListingChangeCache:
+    """
+    Merkt sich pro (Profil, Inserat) den zuletzt geprüften Zustand, damit unveränderte Inserate keine Filter
+    mehr durchlaufen und Preissenkungen erkannt werden. Begrenzt auf 'max_entries' (LRU) und 'ttl' Sekunden
+    seit dem letzten Auftauchen. Ein geändertes Profil (neue Konfiguration) beginnt mit leerem Zustand.
+    """
+
+    def __init__(self, max_entries=LISTING_CACHE_MAX_ENTRIES, ttl=LISTING_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict() # (Profil-Quelle, Inserate-ID) -> CachedListing, ältester Zugriff zuerst
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(profile, url):
+        return profile.source, listing_id_from_url(url)
+
+    def get(self, profile, url):
+        """Gibt den gespeicherten Zustand zurück (oder None) und markiert das Inserat als gerade gesehen."""
+        key = self._key(profile, url)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = monotonic()
+        if now - entry.last_seen > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries[key] = entry._replace(last_seen=now)
+        self._entries.move_to_end(key)
+        return entry
+
+    def peek(self, profile, url):
+        """Wie get(), aber ohne das Inserat als gesehen zu markieren (abgelaufene Einträge zählen als fehlend)."""
+        entry = self._entries.get(self._key(profile, url))
+        return entry if entry is not None and monotonic() - entry.last_seen <= self.ttl else None
+
+    def put(self, profile, url, fingerprint, price):
+        key = self._key(profile, url)
+        now = monotonic()
+        self._entries[key] = CachedListing(fingerprint, price, now)
+        self._entries.move_to_end(key)
+        # Älteste Einträge zuerst: abgelaufene und alles über der Höchstzahl entfernen
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if len(self._entries) <= self.max_entries and now - oldest.last_seen <= self.ttl:
+                break
+            self._entries.popitem(last=False)
+
+
+LISTING_CACHE = ListingChangeCache()
+
+
+class PriceHistoryStore:
+    """
+    Preisverlauf in SQLite (WAL-Modus). Jede Beobachtung wird als Zeile (ts, term, profile, listing_id, price, type)
+    angehängt, aber nur, wenn sich der Preis des Inserats für das Profil seit der letzten Beobachtung geändert hat
+    (ein Neustart zählt bekannte Inserate also nicht doppelt). Gleichzeitig wird pro Profil und Tag ein Histogramm
+    mit logarithmischen Preisklassen (Breite PRICE_HISTORY_RESOLUTION) hochgezählt. Median und Quantile lesen nur
+    diese Histogramme: höchstens Tage x Preisklassen Zeilen, unabhängig von der Anzahl Beobachtungen.
+    """
+
+    def __init__(self, db_filename=PRICE_HISTORY_DB_FILE, resolution=PRICE_HISTORY_RESOLUTION):
+        self.db_filename = db_filename
+        self._log_step = math.log1p(resolution)
+        self._connection = sqlite3.connect(db_filename, timeout=30) # Mehrere Instanzen (Sharding) teilen sich den Verlauf
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS price_observations (ts REAL NOT NULL, term TEXT NOT NULL, profile TEXT NOT NULL, "
+                                 "listing_id INTEGER NOT NULL, price INTEGER NOT NULL, type TEXT NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS price_observations_ts ON price_observations (ts)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS latest_prices (profile TEXT NOT NULL, listing_id INTEGER NOT NULL, "
+                                 "price INTEGER NOT NULL, PRIMARY KEY (profile, listing_id)) WITHOUT ROWID")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS daily_price_buckets (profile TEXT NOT NULL, day INTEGER NOT NULL, "
+                                 "bucket INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (profile, day, bucket)) WITHOUT ROWID")
+        self._connection.commit()
+        self._medians = {}       # (Profil, Tage, heutiger Tag) -> (Median, Anzahl); verworfen, sobald das Profil neue Preise bekommt
+        self._pruned_day = None  # Tag der letzten Löschung alter Beobachtungen
+
+    def price_bucket(self, price):
+        """Preisklasse eines Preises: 0 für Preise unter 1 CHF, sonst logarithmisch (gleiche relative Breite)."""
+        return 0 if price < 1 else 1 + round(math.log(price) / self._log_step)
+
+    def bucket_price(self, bucket):
+        """Repräsentativer Preis einer Preisklasse (Umkehrung von price_bucket)."""
+        return 0 if bucket == 0 else round(math.exp((bucket - 1) * self._log_step))
+
+    def record(self, term, profile_name, item_type, listing_id, price, ts=None):
+        """Speichert einen beobachteten Preis. Gibt False zurück, wenn er dem zuletzt gespeicherten Preis entspricht."""
+        signed_id = _to_signed_id(listing_id)
+        row = self._connection.execute("SELECT price FROM latest_prices WHERE profile = ? AND listing_id = ?",
+                                       (profile_name, signed_id)).fetchone()
+        if row is not None and row[0] == price:
+            return False
+        ts = time() if ts is None else ts
+        self._connection.execute("INSERT OR REPLACE INTO latest_prices (profile, listing_id, price) VALUES (?, ?, ?)",
+                                 (profile_name, signed_id, price))
+        self._connection.execute("INSERT INTO price_observations (ts, term, profile, listing_id, price, type) VALUES (?, ?, ?, ?, ?, ?)",
+                                 (ts, term, profile_name, signed_id, price, item_type))
+        self._connection.execute("INSERT INTO daily_price_buckets (profile, day, bucket, count) VALUES (?, ?, ?, 1) "
+                                 "ON CONFLICT (profile, day, bucket) DO UPDATE SET count = count + 1",
+                                 (profile_name, int(ts // 86400), self.price_bucket(price)))
+        for key in [key for key in self._medians if key[0] == profile_name]:
+            del self._medians[key]
+        return True
+
+    def quantiles(self, profile_name, fractions, days=PRICE_HISTORY_WINDOW_DAYS, now=None):
+        """
+        Preis-Quantile (z.B. 0.5 = Median) eines Profils über die letzten 'days' Tage (inkl. heute).
+        Gibt ([Preis pro Anteil], Anzahl Beobachtungen) zurück; ohne Beobachtungen sind die Preise None.
+        """
+        today = int((time() if now is None else now) // 86400)
+        rows = self._connection.execute(
+            "SELECT bucket, SUM(count) FROM daily_price_buckets WHERE profile = ? AND day > ? GROUP BY bucket ORDER BY bucket",
+            (profile_name, today - days),
+        ).fetchall()
+        total = sum(count for _, count in rows)
+        prices = []
+        for fraction in fractions:
+            rank, cumulative, price = fraction * total, 0, None
+            for bucket, count in rows:
+                cumulative += count
+                if cumulative >= rank:
+                    price = self.bucket_price(bucket)
+                    break
+            prices.append(price if total else None)
+        return prices, total
+
+    def median_price(self, profile_name, days=PRICE_HISTORY_WINDOW_DAYS, now=None):
+        """Medianpreis eines Profils über die letzten 'days' Tage. Gibt (Median oder None, Anzahl Beobachtungen) zurück."""
+        key = (profile_name, days, int((time() if now is None else now) // 86400))
+        cached = self._medians.get(key)
+        if cached is None:
+            (median,), total = self.quantiles(profile_name, (0.5,), days, now)
+            cached = self._medians[key] = (median, total)
+        return cached
+
+    def prune(self, retention_days=PRICE_HISTORY_RETENTION_DAYS):
+        """Löscht (höchstens einmal pro Tag) Beobachtungen, die älter als retention_days sind. Gibt die Anzahl zurück."""
+        today = int(time() // 86400)
+        if retention_days is None or self._pruned_day == today:
+            return 0
+        self._pruned_day = today
+        deleted = self._connection.execute("DELETE FROM price_observations WHERE ts < ?", (time() - retention_days * 86400,)).rowcount
+        self._connection.commit()
+        return deleted
+
+    def flush(self):
+        """Schreibt alle neuen Beobachtungen dauerhaft (eine Transaktion pro Durchlauf)."""
+        self._connection.commit()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+
+PRICE_HISTORY_INSTANCE = None # Wird in main() geöffnet, wenn PRICE_HISTORY aktiv ist
+
+
+def record_price_observation(search_term, profile, url, price):
+    """Speichert den Preis eines neuen oder geänderten Inserats im Preisverlauf (falls aktiv und ein Preis bekannt ist)."""
+    if PRICE_HISTORY_INSTANCE is None or price is None:
+        return
+    if PRICE_HISTORY_INSTANCE.record(search_term, profile.name, profile.type, listing_id_from_url(url), price):
+        METRICS.count("price_observations")
+
+
+def cross_post_key(platform_name, title, price):
+    """Schlüssel, unter dem ein Inserat (normalisierter Titel und Preis) pro Plattform als Fundstelle gemerkt wird."""
+    digest = hashlib.blake2b(f"{normalize_query(title)}|{price}".encode('utf-8'), digest_size=16).hexdigest()
+    return f"{platform_name}:{digest}"
+
+
+def claim_cross_post(listing, price, seen_items):
+    """
+    Erkennt Inserate, die auf mehreren Plattformen angeboten werden (gleicher normalisierter Titel und Preis).
+    Merkt die Fundstelle beim Speicher gesehener Inserate, aber getrennt von ihnen (mit SQLite oder Redis gilt sie
+    damit auch nach Neustarts und für andere Instanzen), und gibt False zurück, wenn das Inserat schon auf einer
+    anderen Plattform gefunden wurde.
+    """
+    if not CROSS_POST_DEDUP or len(PLATFORMS) < 2 or price is None:
+        return True
+    platform = platform_for_url(listing.url)
+    seen_items.add_cross_post(cross_post_key(platform.name, listing.title, price))
+    other_keys = [cross_post_key(name, listing.title, price) for name in PLATFORMS if name != platform.name]
+    return not seen_items.has_cross_post(other_keys)
+
+
+def process_listings(search_term, profile, page, seen_items_set, batch=None):
+    """
+    Filtert die extrahierten Inserate einer Seite für EIN Profil und sendet Benachrichtigungen.
+    Mit 'batch' (ListingBatch über page.listings) kommen Filterergebnisse, Preise und "gesehen" aus der Batch-Auswertung.
+    Gibt True zurück, wenn neue passende Inserate gefunden wurden, sonst False.
+    """
+    item_name = profile.name
+    item_type = profile.type
+    max_price = profile.max_price
+    target_sizes = profile.target_sizes
+    priority = profile.priority
+
+    if not page.node_count:
+        return False # Keine Inserate -> keine neuen Funde
+
+    # --- Inserate einzeln verarbeiten ---
+    new_items_found_count = 0
+    processed_urls_in_this_run = set() # Verhindert doppelte Verarbeitung innerhalb desselben Laufs
+    seen_lookup_seconds = filter_seconds = 0.0 # Summiert pro Seite, einmal pro Aufruf erfasst
+    unchanged_count = 0
+    candidates = [] # (Index, Listing, bekannt, Cache-Eintrag, Fingerabdruck) der neuen oder geänderten Inserate
+
+    for index, listing in enumerate(page.listings):
+        item_url = listing.url
+        item_title = listing.title
+
+        # --- Prüfen, ob schon bekannt oder doppelt in diesem Lauf ---
+        started = perf_counter()
+        is_seen = batch.seen[index] if batch is not None else item_url in seen_items_set
+        seen_lookup_seconds += perf_counter() - started
+        if is_seen and not LISTING_CHANGE_DETECTION:
+            logging.debug(f"      Inserat '{item_title}' ({item_url}) ist bereits bekannt. Überspringe.")
+            continue
+        if item_url in processed_urls_in_this_run:
+            logging.debug(f"      Inserat '{item_title}' ({item_url}) wurde in diesem Durchlauf bereits verarbeitet. Überspringe Duplikat.")
+            continue
+
+        # --- Unveränderte Inserate überspringen (Preis, Titel und Beschreibung wie beim letzten Mal) ---
+        cached = None
+        if LISTING_CHANGE_DETECTION:
+            fingerprint = listing_fingerprint(listing, profile)
+            cached = LISTING_CACHE.get(profile, item_url)
+            if cached is not None and cached.fingerprint == fingerprint:
+                unchanged_count += 1
+                continue
+            if is_seen and cached is None:
+                # Bereits gemeldet, seit dem Start aber noch nicht im Cache: nur den Stand merken
+                price = parse_price_text(listing.price_text)
+                LISTING_CACHE.put(profile, item_url, fingerprint, price)
+                record_price_observation(search_term, profile, item_url, price)
+                continue
+        processed_urls_in_this_run.add(item_url) # Markieren als in diesem Lauf gesehen
+        candidates.append((index, listing, is_seen, cached, fingerprint if LISTING_CHANGE_DETECTION else None))
+
+    # Batch-Filter nur für die neuen oder geänderten Inserate auswerten (nicht für die ganze Seite)
+    if batch is not None and candidates:
+        started = perf_counter()
+        batch_passes = batch.passes(profile, [candidate[0] for candidate in candidates])
+        filter_seconds += perf_counter() - started
+
+    for index, listing, is_seen, cached, fingerprint in candidates:
+        item_url = listing.url
+        item_title = listing.title
+
+        # === Neues oder geändertes, potenzielles Inserat gefunden! ===
+        if is_seen:
+            logging.info(f"    >> Bekanntes Inserat hat sich geändert: '{item_title}'")
+        else:
+            logging.info(f"    >> Neues potenzielles Inserat gefunden: '{item_title}'")
+        logging.info(f"       URL: {item_url}")
+
+        # --- Kriterien prüfen ---
+        METRICS.count("new_listings")
+        started = perf_counter()
+        if batch is not None:
+            passes_filters, price = bool(batch_passes[index]), batch.prices[index]
+            logging.info(f"      Preis: {price if price is not None else 'N/A'} CHF (Max: {max_price} CHF), "
+                         f"Filter {'OK' if passes_filters else 'FEHLGESCHLAGEN'} (Batch-Auswertung).")
+        else:
+            passes_filters, price = evaluate_listing(listing, profile)
+        filter_seconds += perf_counter() - started
+        record_price_observation(search_term, profile, item_url, price)
+
+        previous_price = cached.price if cached is not None else None
+        price_dropped = previous_price is not None and price is not None and price < previous_price
+        if LISTING_CHANGE_DETECTION:
+            LISTING_CACHE.put(profile, item_url, fingerprint, price)
+        if is_seen and not (passes_filters and price_dropped):
+            logging.info(f"    -- Keine Preissenkung unter das Maximum für bereits gemeldetes Inserat '{item_title}'.")
+            continue
+
+        # --- Ergebnis verarbeiten ---
+        if passes_filters:
+            # Vor dem Melden im (ggf. geteilten) Speicher beanspruchen: meldet jedes Inserat nur einmal
+            claimed = seen_items_set.claim_price_drop(item_url, price) if is_seen else seen_items_set.claim(item_url)
+            if not claimed:
+                logging.info(f"    -- Inserat '{item_title}' wurde bereits gemeldet (anderes Profil oder andere Instanz).")
+                continue
+            if not is_seen and not claim_cross_post(listing, price, seen_items_set):
+                METRICS.count("cross_posts")
+                logging.info(f"    -- Inserat '{item_title}' wurde bereits auf einer anderen Plattform gefunden (gleicher Titel und Preis).")
+                continue
+            new_items_found_count += 1
+            METRICS.count("price_drops" if price_dropped else "hits")
+            headline = f"📉 PREISSENKUNG von {previous_price} CHF!" if price_dropped else "✅ TREFFER!"
+            console_message = (
+                f"\n{headline} (Für Item: '{item_name}' / Suchbegriff: '{search_term}')\n"
+                f"   Titel: {item_title}\n"
+                f"   Preis: {price if price is not None else 'N/A'} CHF (Max: {max_price} CHF)\n"
+                f"   URL: {item_url}"
+            )
+            if item_type in ["shoes", "clothing"] and target_sizes:
+                console_message += f"\n   (Grössenfilter aktiv: {', '.join(map(str,target_sizes))})"
+
+            # Farbige Ausgabe in der Konsole
+            print("\033[92m" + "="*70 + "\033[0m") # Grüner Trenner
+            print(console_message)
+            print("\033[92m" + "="*70 + "\033[0m") # Grüner Trenner
+
+            # Benachrichtigung senden (als gesehen markiert wurde es schon beim Beanspruchen)
+            notification_title = f"📉 Preissenkung {previous_price} → {price} CHF: {item_title}" if price_dropped else item_title
+            send_telegram_notification(notification_title, item_url, price, item_name, priority)
+        else:
+            logging.info(f"    -- Inserat '{item_title}' passt nicht zu allen Kriterien für '{item_name}'.")
+
+    if unchanged_count:
+        METRICS.count("unchanged_listings", unchanged_count)
+        logging.info(f"    {unchanged_count} unveränderte(s) Inserat(e) ohne erneute Prüfung übersprungen.")
+    METRICS.observe("seen_lookup", seen_lookup_seconds)
+    METRICS.observe("filter", filter_seconds)
+
+    # --- Abschluss für diesen Suchbegriff ---
+    if new_items_found_count > 0:
+         logging.info(f"---> {new_items_found_count} neue(s) passende(s) Inserat(e) für Suchbegriff '{search_term}' gefunden und verarbeitet.")
+         return True # Signalisiert, dass etwas Neues gefunden wurde
+    else:
          logging.info(f"---> Keine *neuen* passenden Inserate für Suchbegriff '{search_term}' gefunden.")
          return False
 
 
 # ==============================================================================
-# 8. HAUPT-SCHLEIFE (Main Loop)
+# 10. ADAPTIVE ABFRAGEPLANUNG (Intervall pro Suchbegriff)
+# ==============================================================================
+
+class QueryScheduleState:
+    """Planungszustand eines Suchbegriffs: nächster Termin, aktuelles Intervall und beobachtete Rate neuer Inserate."""
+
+    __slots__ = ("next_due", "interval", "desired_interval", "rate", "last_fetch", "last_urls")
+
+    def __init__(self, now):
+        self.next_due = now          # Neue Suchbegriffe sind sofort fällig
+        self.interval = CHECK_INTERVAL
+        self.desired_interval = CHECK_INTERVAL # Intervall aus Rate und Priorität, vor dem Anfrage-Budget
+        self.rate = TARGET_NEW_PER_POLL / CHECK_INTERVAL # Geglättete Anzahl neuer Inserate pro Sekunde, startet beim Vorwert
+        self.last_fetch = None       # Zeitpunkt des letzten erfolgreichen Abrufs
+        self.last_urls = None        # Inserate-URLs des letzten Abrufs (um neue zu erkennen)
+
+
+class PollScheduler:
+    """
+    Prioritätswarteschlange (Heap) der nächsten Fälligkeiten pro Suchanfrage.
+    Das Intervall jeder Suchanfrage passt sich der beobachteten Rate neuer Inserate und der Profil-Priorität an,
+    begrenzt durch MIN_POLL_INTERVAL und MAX_POLL_INTERVAL. Zusammen senden alle Suchanfragen höchstens so viele
+    Anfragen wie der feste Takt (eine pro Suchanfrage und CHECK_INTERVAL); darüber werden alle Intervalle gestreckt.
+    """
+
+    def __init__(self):
+        self._states = {} # normalisierte Suchanfrage -> QueryScheduleState
+        self._heap = []   # (Fälligkeit, Suchanfrage); veraltete Einträge werden beim Herausnehmen verworfen
+
+    def _push(self, query, state):
+        heapq.heappush(self._heap, (state.next_due, query))
+
+    def select_due(self, plan, now=None):
+        """Gibt die fälligen Einträge des Plans zurück. Unbekannte Suchanfragen sind sofort fällig."""
+        now = time() if now is None else now
+        planned_queries = {planned_search.query for planned_search in plan}
+
+        # Zustände von Suchbegriffen entfernen, die nicht mehr konfiguriert sind
+        for query in [query for query in self._states if query not in planned_queries]:
+            del self._states[query]
+        for planned_search in plan:
+            if planned_search.query not in self._states:
+                state = QueryScheduleState(now)
+                self._states[planned_search.query] = state
+                self._push(planned_search.query, state)
+
+        due_queries = set()
+        while self._heap and self._heap[0][0] <= now:
+            next_due, query = heapq.heappop(self._heap)
+            state = self._states.get(query)
+            if state is None or state.next_due != next_due:
+                continue # Veralteter Eintrag
+            due_queries.add(query)
+            # Vorläufig neu einplanen; bei Erfolg setzt observe() den endgültigen Termin
+            state.next_due = now + state.interval
+            self._push(query, state)
+
+        due_plan = [planned_search for planned_search in plan if planned_search.query in due_queries]
+        logging.info(f"Scheduler: {len(due_plan)} von {len(plan)} Suchanfrage(n) fällig.")
+        return due_plan
+
+    def observe(self, planned_search, listing_urls, now=None, complete=True):
+        """
+        Aktualisiert Rate und Intervall nach einem erfolgreichen Abruf.
+        'listing_urls' sind die Inserate-URLs der Seite, oder None wenn die Seite unverändert war (304).
+        Mit 'complete' = False wurde die Seite nicht zu Ende gelesen: die übrigen Inserate des letzten Abrufs bleiben gemerkt.
+        """
+        now = time() if now is None else now
+        state = self._states.get(planned_search.query)
+        if state is None:
+            return
+
+        if listing_urls is None: # Unverändert -> keine neuen Inserate
+            new_count = 0 if state.last_urls is not None else None
+        else:
+            listing_urls = set(listing_urls)
+            new_count = len(listing_urls - state.last_urls) if state.last_urls is not None else None
+            state.last_urls = listing_urls if complete or state.last_urls is None else state.last_urls | listing_urls
+
+        if new_count is not None and state.last_fetch is not None and now > state.last_fetch:
+            observed_rate = new_count / (now - state.last_fetch)
+            state.rate = RATE_SMOOTHING * observed_rate + (1 - RATE_SMOOTHING) * state.rate
+        state.last_fetch = now
+
+        interval = TARGET_NEW_PER_POLL / state.rate if state.rate > 0 else MAX_POLL_INTERVAL
+        interval *= PRIORITY_INTERVAL_FACTORS.get(self._best_priority(planned_search), 1.0)
+        state.desired_interval = min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, interval))
+        state.interval = min(MAX_POLL_INTERVAL, state.desired_interval * self._budget_factor())
+        state.next_due = now + state.interval
+        self._push(planned_search.query, state)
+        logging.debug(f"    Scheduler: '{planned_search.query}' {new_count if new_count is not None else '?'} neue Inserate, nächster Abruf in {state.interval:.0f}s.")
+
+    def defer(self, planned_search, seconds, now=None):
+        """Plant eine nicht gesendete Suchanfrage (Host pausiert) neu ein, sobald der Host wieder Anfragen annimmt."""
+        now = time() if now is None else now
+        state = self._states.get(planned_search.query)
+        if state is None:
+            return
+        state.next_due = now + seconds
+        self._push(planned_search.query, state)
+
+    def _budget_factor(self):
+        """
+        Faktor (>= 1) auf alle Intervalle, damit die Summe der Abruf-Raten (1 / Intervall) das Budget von einer
+        Anfrage pro Suchanfrage und CHECK_INTERVAL nicht übersteigt. Andere Suchanfragen übernehmen ihn beim nächsten Abruf.
+        """
+        requested = sum(1.0 / state.desired_interval for state in self._states.values())
+        budget = len(self._states) / CHECK_INTERVAL
+        return max(1.0, requested / budget) if budget > 0 else 1.0
+
+    @staticmethod
+    def _best_priority(planned_search):
+        """Höchste (kleinste) Priorität aller abonnierenden Profile."""
+        return min((profile.priority for _, profile in planned_search.subscribers), default=3)
+
+    def seconds_until_next_due(self, now=None):
+        """Sekunden bis zur nächsten fälligen Suchanfrage (0, wenn schon etwas fällig ist)."""
+        now = time() if now is None else now
+        while self._heap:
+            next_due, query = self._heap[0]
+            state = self._states.get(query)
+            if state is None or state.next_due != next_due:
+                heapq.heappop(self._heap) # Veralteter Eintrag
+                continue
+            return max(0.0, next_due - now)
+        return float(CHECK_INTERVAL)
+
+
+# ==============================================================================
+# 11. SUCHDURCHLAUF (sequentiell oder parallel)
+# ==============================================================================
+
+_EVENT_LOOP = None # Dauerhafte Event-Loop, damit die aiohttp-Session (und ihre Verbindungen) über Durchläufe bestehen bleibt
+
+
+def run_async(coro):
+    """Führt eine Coroutine auf der dauerhaften Event-Loop aus und gibt ihr Ergebnis zurück."""
+    global _EVENT_LOOP
+    if _EVENT_LOOP is None or _EVENT_LOOP.is_closed():
+        _EVENT_LOOP = asyncio.new_event_loop()
+    return _EVENT_LOOP.run_until_complete(coro)
+
+
+def close_event_loop():
+    """Schliesst die aiohttp-Session und die dauerhafte Event-Loop (beim Beenden des Skripts)."""
+    global _EVENT_LOOP
+    if _EVENT_LOOP is not None and not _EVENT_LOOP.is_closed():
+        _EVENT_LOOP.run_until_complete(HTTP_CLIENT.close_async())
+        _EVENT_LOOP.close()
+    _EVENT_LOOP = None
+
+
+# Eine geplante Suchanfrage: EIN Abruf für eine normalisierte Suchanfrage auf einer Plattform, verteilt an alle Abonnenten.
+# 'subscribers' ist eine Liste von (Suchbegriff, SearchProfile), 'profile_index' das Profil des ersten Abonnenten.
+# 'query' ist der normalisierte Suchbegriff, auf weiteren Plattformen mit vorangestelltem "Plattform:".
+PlannedSearch = namedtuple("PlannedSearch", ["query", "search_term", "subscribers", "profile_index", "platform"])
+
+
+def normalize_query(search_term):
+    """Normalisiert einen Suchbegriff für die Deduplizierung (Gross-/Kleinschreibung, mehrfache Leerzeichen)."""
+    return " ".join(search_term.split()).casefold()
+
+
+def plan_cycle(profiles):
+    """
+    Plant einen Suchdurchlauf: Identische (normalisierte) Suchbegriffe aus allen Profilen werden pro Plattform zu
+    EINEM Abruf zusammengefasst, dessen Inserate danach an jedes abonnierende Profil verteilt werden.
+    Gibt die Liste der PlannedSearch in der Reihenfolge des ersten Auftretens zurück.
+    """
+    planned = {} # normalisierte Suchanfrage -> PlannedSearch
+    subscribed_profiles = {} # normalisierte Suchanfrage -> Indizes der bereits abonnierten Profile
+    subscription_count = 0
+    for index, profile in enumerate(profiles):
+        for platform_name in profile.platforms:
+            platform = PLATFORMS.get(platform_name)
+            if platform is None:
+                continue # Plattform wurde seit dem Laden des Profils entfernt
+            for search_term in profile.search_terms:
+                subscription_count += 1
+                query = normalize_query(search_term)
+                if platform_name != DEFAULT_PLATFORM:
+                    query = f"{platform_name}:{query}" # Standard-Plattform ohne Präfix (Zustand bleibt gültig)
+                if query not in planned:
+                    planned[query] = PlannedSearch(query, search_term, [], index, platform)
+                    subscribed_profiles[query] = set()
+                if index in subscribed_profiles[query]:
+                    continue # Gleicher Begriff zweimal im selben Profil
+                subscribed_profiles[query].add(index)
+                planned[query].subscribers.append((search_term, profile))
+
+    saved_requests = subscription_count - len(planned)
+    platform_count = len({planned_search.platform.name for planned_search in planned.values()})
+    logging.info(f"Planer: {subscription_count} Suchbegriff(e) in {len(planned)} Abruf(e) zusammengefasst ({saved_requests} Anfrage(n) gespart)"
+                 + (f", {platform_count} Plattformen." if platform_count > 1 else "."))
+    return list(planned.values())
+
+
+def stable_hash(text):
+    """64-bit Hash, der (anders als hash()) in allen Prozessen und über Neustarts gleich bleibt."""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class ShardRing:
+    """
+    Konsistentes Hashing der Suchanfragen auf Instanzen: jede Instanz besitzt 'virtual_nodes' Punkte auf einem
+    Hash-Ring, eine Suchanfrage gehört der Instanz des nächsten Punkts. Ändert sich die Anzahl Instanzen,
+    wechselt nur etwa 1/N der Suchanfragen die Instanz (Zustand wie Abfrageintervalle bleibt grösstenteils erhalten).
+    """
+
+    def __init__(self, shard_count, virtual_nodes=SHARD_VIRTUAL_NODES):
+        self.shard_count = shard_count
+        points = sorted((stable_hash(f"shard-{shard}-{node}"), shard) for shard in range(shard_count) for node in range(virtual_nodes))
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, query):
+        """Index der Instanz (0-basiert), die die (normalisierte) Suchanfrage abruft."""
+        position = bisect_left(self._hashes, stable_hash(query))
+        return self._shards[position % len(self._shards)]
+
+
+SHARD_RINGS = {} # Anzahl Instanzen -> ShardRing (einmal aufgebaut)
+
+
+def select_shard(plan, shard_index=None, shard_count=None):
+    """Behält nur die Suchanfragen, die dieser Instanz gehören (ohne Sharding unverändert)."""
+    shard_index = SHARD_INDEX if shard_index is None else shard_index
+    shard_count = SHARD_COUNT if shard_count is None else shard_count
+    if shard_count <= 1:
+        return plan
+    ring = SHARD_RINGS.get(shard_count)
+    if ring is None:
+        ring = SHARD_RINGS[shard_count] = ShardRing(shard_count)
+    selected = [planned_search for planned_search in plan if ring.shard_for(planned_search.query) == shard_index]
+    logging.info(f"Shard {shard_index + 1}/{shard_count}: {len(selected)} von {len(plan)} Abruf(en) gehören dieser Instanz.")
+    return selected
+
+
+def shard_filename(filename):
+    """Hängt bei mehreren Instanzen die Shard-Nummer an einen Dateinamen an (für Dateien, die nicht geteilt werden)."""
+    if SHARD_COUNT <= 1:
+        return filename
+    root, extension = os.path.splitext(filename)
+    return f"{root}.shard{SHARD_INDEX + 1}of{SHARD_COUNT}{extension}"
+
+
+def subscribers_cache_key(planned_search):
+    """Schlüssel für ETag/Last-Modified: ändert sich, sobald sich die abonnierenden Profile ändern."""
+    return tuple(sorted({profile.name for _, profile in planned_search.subscribers}))
+
+
+def forget_search_validators(planned_search):
+    """
+    Verwirft ETag/Last-Modified aller Seiten einer Suchanfrage, deren Inserate nicht vollständig verarbeitet wurden.
+    Die Validatoren werden schon beim Empfang gespeichert; ohne dies würde der nächste Abruf mit 304 beantwortet
+    und die nicht verarbeiteten Inserate gingen verloren, bis sich die Seite wieder ändert.
+    """
+    filters = subscribers_filters(planned_search)
+    subscribers_key = subscribers_cache_key(planned_search)
+    for page_number in range(1, max_pages_for(planned_search) + 1):
+        search_url = build_search_url(planned_search.search_term, page_number, filters, planned_search.platform)
+        HTTP_CLIENT.forget_validators((search_url, subscribers_key))
+
+
+def subscribers_filters(planned_search):
+    """URL-Filter für einen gemeinsamen Abruf (siehe build_search_filters) auf der Plattform der Suchanfrage."""
+    return planned_search.platform.search_filters([profile for _, profile in planned_search.subscribers])
+
+
+def fan_out_page(planned_search, page, seen_items, profiles_with_new):
+    """
+    Verteilt die Inserate einer abgerufenen Seite an alle abonnierenden Profile (jeweils mit eigenem
+    max_price, Typ-Filter und Priorität). Gibt True zurück, wenn für mindestens ein Profil etwas Neues gefunden wurde.
+    """
+    found_new = False
+    batch = None
+    if FILTER_BATCH and page.listings:
+        with METRICS.timer("filter"): # Preise, Text und "gesehen" einmal für alle Abonnenten
+            batch = ListingBatch(page.listings, seen_items)
+    for search_term, profile in planned_search.subscribers:
+        if len(planned_search.subscribers) > 1:
+            logging.info(f"---> Verteile Ergebnisse für '{search_term}' an Profil '{profile.name}' (Typ: {profile.type}, MaxPreis: {profile.max_price})")
+        try:
+            with METRICS.labels(profile=profile.name):
+                found_new_for_profile = process_listings(search_term, profile, page, seen_items, batch)
+            if found_new_for_profile:
+                found_new = True
+                if profile.name not in profiles_with_new:
+                    profiles_with_new.append(profile.name)
+                # Speichere nach jedem Fund, um Datenverlust zu minimieren (Schnappschuss: einmal pro Durchlauf)
+                if not saves_per_cycle(seen_items):
+                    save_seen_items(seen_items, SEEN_ITEMS_FILE, SEEN_ITEMS_SNAPSHOT_FILE)
+        except Exception as e:
+            # Fängt unerwartete Fehler innerhalb der Verarbeitung eines Suchbegriffs ab
+            logging.error(f"!! Unerwarteter Fehler bei Verarbeitung von '{search_term}' für '{profile.name}': {e}", exc_info=True)
+            logging.error("   -> Fahre mit nächstem Suchbegriff/Profil fort.")
+            forget_search_validators(planned_search) # Nächster Abruf lädt die Seite wieder vollständig
+    return found_new
+
+
+def log_planned_search(planned_search):
+    """Loggt den Beginn der Verarbeitung einer geplanten Suche (wie bisher pro Suchbegriff)."""
+    search_term, profile = planned_search.subscribers[0]
+    logging.info(f"---> Suche nach '{search_term}' (für Item: '{profile.name}', Typ: {profile.type}, MaxPreis: {profile.max_price}, Größen: {profile.target_sizes or 'N/A'})")
+    if len(planned_search.subscribers) > 1:
+        logging.info(f"    (Gemeinsamer Abruf für {len(planned_search.subscribers)} Abonnenten)")
+
+
+_LAST_CYCLE_LISTING_IDS = {} # normalisierte Suchanfrage -> Inserate-IDs aller Seiten des letzten Abrufs
+
+
+def max_pages_for(planned_search):
+    """Höchste Seitenzahl aller abonnierenden Profile."""
+    return max(profile.max_pages for _, profile in planned_search.subscribers)
+
+
+def should_fetch_next_page(planned_search, page, page_number, seen_items):
+    """
+    Entscheidet, ob nach 'page' (Seite 'page_number') noch eine weitere Seite geladen werden soll.
+    Die Ergebnisse sind nach Datum sortiert (neueste zuerst): Ist schon das letzte Inserat der Seite bekannt
+    (im Speicher gesehener Inserate oder im letzten Abruf dieser Suchanfrage enthalten), liegt alles Weitere
+    vor dem letzten Durchlauf und es gibt dort nichts Neues mehr. Hervorgehobene Inserate oben auf der Seite
+    beeinflussen die Entscheidung so nicht. Ohne Sortier-Parameter in der URL (siehe results_newest_first) ist die
+    Reihenfolge nicht gesichert: dann werden alle Seiten bis 'max_pages' geladen.
+    """
+    if page_number >= max_pages_for(planned_search) or not page.listings:
+        return False
+    if not results_newest_first(subscribers_filters(planned_search)):
+        return True
+    last_url = page.listings[-1].url
+    if last_url in seen_items:
+        return False
+    previous_ids = _LAST_CYCLE_LISTING_IDS.get(planned_search.query)
+    if previous_ids is not None and listing_id_from_url(last_url) in previous_ids:
+        return False
+    return True
+
+
+def merge_result_pages(planned_search, pages):
+    """
+    Fasst die geladenen Seiten zu einem PageExtraction zusammen und merkt sich ihre Inserate für den nächsten Durchlauf.
+    Wurde eine Seite nicht zu Ende gelesen, bleiben die Inserate des letzten Abrufs zusätzlich gemerkt (sie stehen
+    weiter unten noch auf der Seite).
+    """
+    filters = subscribers_filters(planned_search)
+    for page in pages:
+        record_price_drops([profile for _, profile in planned_search.subscribers], page, filters)
+    complete = all(page.complete for page in pages)
+    if max_pages_for(planned_search) > 1 or streaming_enabled():
+        listing_ids = {listing_id_from_url(listing.url) for page in pages for listing in page.listings}
+        if not complete:
+            listing_ids |= _LAST_CYCLE_LISTING_IDS.get(planned_search.query, set())
+        _LAST_CYCLE_LISTING_IDS[planned_search.query] = listing_ids
+    if len(pages) == 1:
+        return pages[0]
+    logging.info(f"    {len(pages)} Ergebnisseiten für '{planned_search.search_term}' geladen.")
+    return PageExtraction(sum(page.node_count for page in pages), [listing for page in pages for listing in page.listings],
+                          pages[0].no_results, complete)
+
+
+def fetch_following_pages(planned_search, first_page, seen_items):
+    """Lädt (blockierend) weitere Ergebnisseiten, solange should_fetch_next_page() es verlangt. Gibt die zusammengefasste Extraktion zurück."""
+    pages = [first_page]
+    while should_fetch_next_page(planned_search, pages[-1], len(pages), seen_items):
+        sleep(INTER_REQUEST_DELAY)
+        html_text = fetch_search_page(planned_search.search_term, cache_key=subscribers_cache_key(planned_search),
+                                      page_number=len(pages) + 1, filters=subscribers_filters(planned_search),
+                                      platform=planned_search.platform)
+        if html_text is None or html_text is DEFERRED:
+            forget_search_validators(planned_search) # Sonst käme Seite 1 als 304 und diese Seite würde nie geladen
+            break
+        if html_text is NOT_MODIFIED:
+            break
+        pages.append(extract_search_page(html_text, planned_search.platform))
+    return merge_result_pages(planned_search, pages)
+
+
+async def fetch_following_pages_async(planned_search, first_page, seen_items, limiter, pool):
+    """Asynchrone Variante von fetch_following_pages() (Ratenlimit statt fester Pausen)."""
+    pages = [first_page]
+    while should_fetch_next_page(planned_search, pages[-1], len(pages), seen_items):
+        html_text = await fetch_search_page_async(planned_search.search_term, limiter, pool,
+                                                  cache_key=subscribers_cache_key(planned_search), page_number=len(pages) + 1,
+                                                  filters=subscribers_filters(planned_search), platform=planned_search.platform)
+        if html_text is None or html_text is DEFERRED:
+            forget_search_validators(planned_search) # Sonst käme Seite 1 als 304 und diese Seite würde nie geladen
+            break
+        if html_text is NOT_MODIFIED:
+            break
+        pages.append(await extract_search_page_async(html_text, planned_search.platform))
+    return merge_result_pages(planned_search, pages)
+
+
+class StreamedSearchPage:
+    """
+    Verarbeitet die gestreamte erste Ergebnisseite einer Suchanfrage: Inserate werden nach jedem gelesenen Stück
+    sofort an die abonnierenden Profile verteilt. feed() meldet, wann nicht mehr weitergelesen werden muss
+    (Ende der Ergebnisliste oder, bei Sortierung "neueste zuerst", STREAM_STOP_AFTER_KNOWN bekannte, unveränderte Inserate in Folge).
+    """
+
+    def __init__(self, planned_search, seen_items, profiles_with_new, encoding):
+        self.planned_search = planned_search
+        self.seen_items = seen_items
+        self.profiles_with_new = profiles_with_new
+        self.parser = StreamingListingParser(planned_search.platform.dom_extractor("lxml"), encoding=encoding)
+        self.found_new = False
+        self.stopped_early = False
+        self._known_in_a_row = 0
+        self._stop_early = results_newest_first(subscribers_filters(planned_search)) # Nur bei gesicherter Sortierung
+        self._previous_ids = _LAST_CYCLE_LISTING_IDS.get(planned_search.query, ())
+        self._parse_seconds = 0.0
+
+    def _is_known(self, listing):
+        """Bekannt und (mit LISTING_CHANGE_DETECTION) für alle Abonnenten unverändert seit dem letzten Prüfen."""
+        if listing.url not in self.seen_items and listing_id_from_url(listing.url) not in self._previous_ids:
+            return False
+        if not LISTING_CHANGE_DETECTION:
+            return True
+        for _, profile in self.planned_search.subscribers:
+            cached = LISTING_CACHE.peek(profile, listing.url)
+            if cached is None or cached.fingerprint != listing_fingerprint(listing, profile):
+                return False
+        return True
+
+    def feed(self, chunk):
+        """Verarbeitet ein Stück der Antwort. Gibt False zurück, sobald nicht mehr weitergelesen werden muss."""
+        started = perf_counter()
+        listings = self.parser.feed(chunk)
+        self._parse_seconds += perf_counter() - started
+        if listings:
+            for listing in listings:
+                self._known_in_a_row = self._known_in_a_row + 1 if self._is_known(listing) else 0
+            if fan_out_page(self.planned_search, PageExtraction(len(listings), listings, False), self.seen_items, self.profiles_with_new):
+                self.found_new = True
+        if self.parser.finished:
+            return False
+        if self._stop_early and self._known_in_a_row >= STREAM_STOP_AFTER_KNOWN:
+            self.stopped_early = True
+            return False
+        return True
+
+    def close(self):
+        """Beendet das Parsen und gibt alle gelesenen Inserate als PageExtraction zurück."""
+        started = perf_counter()
+        page = self.parser.close()
+        METRICS.observe("parse", self._parse_seconds + perf_counter() - started)
+        if self.stopped_early:
+            METRICS.count("stream_stopped_early")
+            logging.info(f"    Lesen nach {page.node_count} Inseraten beendet: {STREAM_STOP_AFTER_KNOWN} bekannte Inserate in Folge.")
+            page = page._replace(complete=False)
+        return log_page_extraction(page)
+
+
+def stream_search_page(planned_search, seen_items, profiles_with_new):
+    """
+    Streaming-Variante von fetch_search_page() + extract_search_page() + fan_out_page() für die erste Seite.
+    Gibt (PageExtraction, NOT_MODIFIED, DEFERRED oder None bei Fehlern, True wenn etwas Neues gemeldet wurde) zurück.
+    """
+    search_term = planned_search.search_term
+    search_url = build_search_url(search_term, filters=subscribers_filters(planned_search), platform=planned_search.platform)
+    logging.info(f"  URL: {search_url}")
+
+    streamed_page = None
+    try:
+        response = HTTP_CLIENT.open_stream(search_url, cache_key=(search_url, subscribers_cache_key(planned_search)))
+        if response is NOT_MODIFIED:
+            return NOT_MODIFIED, False
+        streamed_page = StreamedSearchPage(planned_search, seen_items, profiles_with_new, HttpClient.stream_encoding(response.headers))
+        chunks = HTTP_CLIENT.iter_chunks(response)
+        try:
+            for chunk in chunks:
+                if not streamed_page.feed(chunk):
+                    break
+        finally:
+            chunks.close() # Schliesst die Verbindung, falls nicht zu Ende gelesen
+        return streamed_page.close(), streamed_page.found_new
+    except CircuitOpenError as e:
+        log_deferred_search(search_term, e)
+        return DEFERRED, False
+    except requests.exceptions.Timeout:
+         logging.error(f"    Timeout ({REQUEST_TIMEOUT}s) beim Laden der Seite für '{search_term}'.")
+    except requests.exceptions.HTTPError as e:
+         logging.error(f"    HTTP Fehler {e.response.status_code} beim Laden der Seite für '{search_term}'.")
+    except requests.exceptions.RequestException as e:
+        logging.error(f"    Netzwerkfehler beim Laden der Seite für '{search_term}': {e}")
+    except Exception as e:
+        logging.error(f"    Unerwarteter Fehler beim Seitenabruf für '{search_term}': {e}", exc_info=True)
+    forget_search_validators(planned_search) # Validatoren wurden schon beim Öffnen gespeichert
+    return None, streamed_page is not None and streamed_page.found_new
+
+
+async def stream_search_page_async(planned_search, seen_items, profiles_with_new, limiter, pool):
+    """Asynchrone Variante von stream_search_page() unter Beachtung des Host-Ratenlimits und des Host-Budgets im Pool."""
+    search_term = planned_search.search_term
+    search_url = build_search_url(search_term, filters=subscribers_filters(planned_search), platform=planned_search.platform)
+    try:
+        HTTP_CLIENT.check_breaker(search_url) # Zurückgestellte Anfragen sollen nicht auf das Ratenlimit warten
+    except CircuitOpenError as e:
+        log_deferred_search(search_term, e)
+        return DEFERRED, False
+    host = urlsplit(search_url).hostname
+    await limiter.acquire(host)
+
+    streamed_page = None
+    async with pool.slot(host): # Begrenzt die gleichzeitig laufenden Anfragen (pro Host und insgesamt)
+        logging.info(f"  URL: {search_url}")
+        try:
+            response = await HTTP_CLIENT.open_stream_async(search_url, cache_key=(search_url, subscribers_cache_key(planned_search)))
+            if response is NOT_MODIFIED:
+                return NOT_MODIFIED, False
+            log_planned_search(planned_search)
+            streamed_page = StreamedSearchPage(planned_search, seen_items, profiles_with_new, HttpClient.stream_encoding(response.headers))
+            chunks = HTTP_CLIENT.iter_chunks_async(response)
+            try:
+                async for chunk in chunks:
+                    if not streamed_page.feed(chunk):
+                        break
+            finally:
+                await chunks.aclose() # Schliesst die Verbindung, falls nicht zu Ende gelesen
+            return streamed_page.close(), streamed_page.found_new
+        except CircuitOpenError as e:
+            log_deferred_search(search_term, e)
+            return DEFERRED, False
+        except asyncio.TimeoutError:
+            logging.error(f"    Timeout ({REQUEST_TIMEOUT}s) beim Laden der Seite für '{search_term}'.")
+        except aiohttp.ClientResponseError as e:
+            logging.error(f"    HTTP Fehler {e.status} beim Laden der Seite für '{search_term}'.")
+        except aiohttp.ClientError as e:
+            logging.error(f"    Netzwerkfehler beim Laden der Seite für '{search_term}': {e}")
+        except Exception as e:
+            logging.error(f"    Unerwarteter Fehler beim Seitenabruf für '{search_term}': {e}", exc_info=True)
+    forget_search_validators(planned_search) # Validatoren wurden schon beim Öffnen gespeichert
+    return None, streamed_page is not None and streamed_page.found_new
+
+
+def fan_out_following_pages(planned_search, first_page, page, seen_items, profiles_with_new):
+    """Nach einer gestreamten ersten Seite (schon verteilt): verteilt nur die Inserate der Folgeseiten."""
+    remaining = page.listings[len(first_page.listings):]
+    if not remaining:
+        return False
+    return fan_out_page(planned_search, PageExtraction(len(remaining), remaining, False), seen_items, profiles_with_new)
+
+
+def run_cycle(profiles, seen_items, scheduler=None):
+    """
+    Führt einen Suchdurchlauf im konfigurierten FETCH_MODE aus. Gibt True zurück, wenn etwas Neues gefunden wurde.
+    Mit 'scheduler' werden nur die fälligen Suchanfragen abgerufen und ihre Intervalle danach angepasst.
+    """
+    plan = plan_cycle(profiles)
+    for query in [query for query in _LAST_CYCLE_LISTING_IDS if query not in {planned_search.query for planned_search in plan}]:
+        del _LAST_CYCLE_LISTING_IDS[query] # Suchbegriff nicht mehr konfiguriert
+    plan = select_shard(plan)
+    if scheduler is not None:
+        plan = scheduler.select_due(plan)
+    profiles_with_new = []
+
+    if FETCH_MODE == "async" and aiohttp is None and not hasattr(run_cycle, "warning_logged"):
+        logging.warning("FETCH_MODE 'async' benötigt das Paket 'aiohttp' (pip install aiohttp). Verwende sequentiellen Modus.")
+        run_cycle.warning_logged = True
+
+    if PARSE_WORKERS > 0 and not (FETCH_MODE == "async" and aiohttp is not None) and not hasattr(get_parse_pool, "warning_logged"):
+        logging.warning("PARSE_WORKERS wird nur im Async-Modus genutzt. Parse im Hauptprozess.")
+        get_parse_pool.warning_logged = True
+
+    if FETCH_MODE == "async" and aiohttp is not None:
+        found_new_in_cycle = run_async(run_cycle_async(plan, seen_items, profiles_with_new, scheduler))
+    else:
+        found_new_in_cycle = run_cycle_sync(plan, seen_items, profiles_with_new, scheduler)
+
+    for item_name in profiles_with_new:
+        logging.info(f"-> Neue(s) Inserat(e) für Profil '{item_name}' in diesem Durchlauf gefunden.")
+    return found_new_in_cycle
+
+
+def run_cycle_sync(plan, seen_items, profiles_with_new, scheduler=None):
+    """Klassischer Suchdurchlauf: ein Abruf nach dem anderen, mit festen Pausen dazwischen."""
+    found_new_in_cycle = False
+    previous_profile_index = None
+
+    for planned_search in plan:
+        # Kleine Pause nach Abarbeitung aller Suchbegriffe eines Items/Profils
+        if previous_profile_index is not None and planned_search.profile_index != previous_profile_index:
+            sleep(INTER_ITEM_DELAY)
+        previous_profile_index = planned_search.profile_index
+
+        with METRICS.labels(term=planned_search.query): # Suchbegriff als Label für alle Messungen dieses Abrufs
+            try:
+                log_planned_search(planned_search)
+                if streaming_enabled(): # Erste Seite wird schon beim Lesen verteilt
+                    first_page, found_new = stream_search_page(planned_search, seen_items, profiles_with_new)
+                else:
+                    html_text = fetch_search_page(planned_search.search_term, cache_key=subscribers_cache_key(planned_search),
+                                                  filters=subscribers_filters(planned_search), platform=planned_search.platform)
+                    first_page = html_text if html_text is None or html_text is NOT_MODIFIED or html_text is DEFERRED else extract_search_page(html_text, planned_search.platform)
+                    found_new = None # Noch nicht verteilt
+                if found_new:
+                    found_new_in_cycle = True
+
+                if first_page is DEFERRED:
+                    if scheduler is not None: scheduler.defer(planned_search, HTTP_CLIENT.seconds_until_retry(planned_search.platform.base_url))
+                    continue # Keine Anfrage gesendet, also auch keine Pause
+                if first_page is NOT_MODIFIED:
+                    logging.info(f"    Seite für '{planned_search.search_term}' unverändert (304). Überspringe Parsing.")
+                    if scheduler is not None: scheduler.observe(planned_search, None)
+                elif first_page is not None:
+                    page = fetch_following_pages(planned_search, first_page, seen_items)
+                    if scheduler is not None: scheduler.observe(planned_search, [listing.url for listing in page.listings], complete=page.complete)
+                    if found_new is not None:
+                        found_new = fan_out_following_pages(planned_search, first_page, page, seen_items, profiles_with_new)
+                    else:
+                        found_new = fan_out_page(planned_search, page, seen_items, profiles_with_new)
+                    if found_new:
+                        found_new_in_cycle = True # Markieren für den gesamten Zyklus
+
+                # Kurze Pause zwischen den einzelnen Suchanfragen
+                sleep(INTER_REQUEST_DELAY)
+
+            except Exception as e:
+                 # Fängt unerwartete Fehler innerhalb der Verarbeitung eines Suchbegriffs ab
+                 logging.error(f"!! Unerwarteter Fehler bei Verarbeitung von '{planned_search.search_term}': {e}", exc_info=True)
+                 logging.error("   -> Fahre mit nächstem Suchbegriff/Profil fort.")
+                 forget_search_validators(planned_search) # Nächster Abruf lädt die Seite wieder vollständig
+                 sleep(ERROR_DELAY) # Längere Pause nach einem Fehler
+
+    return found_new_in_cycle
+
+
+_PARSE_POOL = None # Prozess-Pool der Parser-Worker (nur bei PARSE_WORKERS > 0)
+
+
+def parse_page_in_worker(html_text, backend, base_url=None):
+    """
+    Läuft im Worker-Prozess: parst eine Seite und gibt sie als kompakte Tupel zurück (günstig zu übertragen),
+    zusammen mit dem genutzten Extraktionsweg und seiner Dauer (die Metriken führt der Hauptprozess).
+    'base_url' ist die Basis-URL der Plattform (der Worker kennt Änderungen an BASE_URL im Hauptprozess nicht).
+    """
+    extractor = get_page_extractor(backend, base_url)
+    if isinstance(extractor, EmbeddedJsonExtractor):
+        page, path, seconds = extractor.extract_timed(html_text)
+    else:
+        page, path, seconds = extractor.extract(html_text), None, None
+    return page.node_count, [tuple(listing) for listing in page.listings], page.no_results, path, seconds
+
+
+def get_parse_pool():
+    """Gibt den Prozess-Pool der Parser-Worker zurück (wird beim ersten Aufruf gestartet), oder None bei PARSE_WORKERS = 0."""
+    global _PARSE_POOL
+    if PARSE_WORKERS <= 0:
+        return None
+    if _PARSE_POOL is None:
+        # 'spawn' statt 'fork': der Hauptprozess hat Threads (Telegram) und offene SQLite-Verbindungen
+        _PARSE_POOL = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        logging.info(f"{PARSE_WORKERS} Parser-Worker-Prozess(e) gestartet.")
+    return _PARSE_POOL
+
+
+def close_parse_pool():
+    """Beendet die Parser-Worker (beim Beenden des Skripts)."""
+    global _PARSE_POOL
+    if _PARSE_POOL is not None:
+        _PARSE_POOL.shutdown(wait=True, cancel_futures=True)
+    _PARSE_POOL = None
+
+
+async def extract_search_page_async(html_text, platform=None):
+    """Wie extract_search_page(), aber bei PARSE_WORKERS > 0 in einem Worker-Prozess, damit die Event-Loop frei bleibt."""
+    pool = get_parse_pool()
+    if pool is None:
+        return extract_search_page(html_text, platform)
+    base_url = (platform or PLATFORMS[DEFAULT_PLATFORM]).base_url
+    with METRICS.timer("parse"): # Parsen und Extraktion im Worker, inkl. Übertragung
+        node_count, listing_tuples, no_results, path, seconds = await asyncio.get_running_loop().run_in_executor(
+            pool, parse_page_in_worker, html_text, EXTRACTOR_BACKEND, base_url)
+    if path is not None:
+        record_extraction_path(path, seconds)
+    return log_page_extraction(PageExtraction(node_count, [Listing._make(values) for values in listing_tuples], no_results))
+
+
+class HostRateLimiter:
+    """
+    Token-Bucket pro Host: Jeder Host bekommt 'rate' Tokens pro Sekunde, maximal 'burst' auf Vorrat.
+    Jede Anfrage verbraucht ein Token. Ersetzt im Async-Modus die festen Pausen zwischen den Anfragen.
+    'policies' (Host -> (rate, burst)) setzt für einzelne Hosts ein eigenes Limit (siehe Platform.rate_limit_policy).
+    """
+
+    def __init__(self, rate, burst, policies=None):
+        self.rate = rate
+        self.burst = burst
+        self.policies = dict(policies or {})
+        self._buckets = {} # host -> (verfügbare Tokens, Zeitpunkt der letzten Aktualisierung)
+        self._locks = {}   # host -> asyncio.Lock, damit Wartende der Reihe nach bedient werden
+
+    async def acquire(self, host):
+        """Wartet, bis für den Host ein Token verfügbar ist, und verbraucht es."""
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        rate, burst = self.policies.get(host, (self.rate, self.burst))
+        async with lock:
+            tokens, updated = self._buckets.get(host, (burst, monotonic()))
+            while True:
+                now = monotonic()
+                tokens = min(burst, tokens + (now - updated) * rate)
+                updated = now
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, updated)
+                    return
+                await asyncio.sleep((1 - tokens) / rate)
+
+
+FETCH_POOL_STATS = {} # Host -> [Anfragen, höchste Anzahl gleichzeitiger Anfragen], über alle Durchläufe im Async-Modus
+
+
+class FetchPool:
+    """
+    Gemeinsamer Abruf-Pool aller Plattformen im Async-Modus: jede Anfrage belegt zuerst einen Platz im Budget ihres
+    Hosts und erst danach einen im gemeinsamen Pool. Ein langsamer oder gedrosselter Host belegt so höchstens sein
+    eigenes Budget, die übrigen Plätze bleiben für die anderen Hosts frei.
+    """
+
+    def __init__(self, total, budgets, default_budget):
+        self.total = total
+        self._pool = asyncio.Semaphore(total)
+        self._budgets = budgets # Host -> Budget, unbekannte Hosts bekommen 'default_budget'
+        self._default_budget = default_budget
+        self._host_semaphores = {}
+        self._in_flight = {}
+
+    @asynccontextmanager
+    async def slot(self, host):
+        """Belegt für die Dauer der Anfrage einen Platz im Budget des Hosts und im gemeinsamen Pool."""
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = self._host_semaphores[host] = asyncio.Semaphore(self._budgets.get(host, self._default_budget))
+        async with host_semaphore:
+            async with self._pool:
+                in_flight = self._in_flight[host] = self._in_flight.get(host, 0) + 1
+                stats = FETCH_POOL_STATS.setdefault(host, [0, 0])
+                stats[0] += 1
+                stats[1] = max(stats[1], in_flight)
+                try:
+                    yield
+                finally:
+                    self._in_flight[host] -= 1
+
+
+async def fetch_search_page_async(search_term, limiter, pool, cache_key=None, page_number=1, filters=(), platform=None):
+    """
+    Lädt eine Suchergebnisseite asynchron unter Beachtung des Host-Ratenlimits und des Host-Budgets im FetchPool.
+    Gibt HTML-Text, NOT_MODIFIED (304), DEFERRED (Host pausiert) oder None bei Fehlern zurück.
+    """
+    search_url = build_search_url(search_term, page_number, filters, platform)
+    try:
+        HTTP_CLIENT.check_breaker(search_url) # Zurückgestellte Anfragen sollen nicht auf das Ratenlimit warten
+    except CircuitOpenError as e:
+        log_deferred_search(search_term, e)
+        return DEFERRED
+    host = urlsplit(search_url).hostname
+    await limiter.acquire(host)
+
+    async with pool.slot(host): # Begrenzt die gleichzeitig laufenden Anfragen (pro Host und insgesamt)
+        logging.info(f"  URL: {search_url}")
+        try:
+            html_text = await HTTP_CLIENT.get_async(search_url, cache_key=(search_url, cache_key))
+            logging.debug(f"    Seite für '{search_term}' erfolgreich geladen.")
+            if RECORD_DIR and html_text is not NOT_MODIFIED:
+                record_search_page(search_url, html_text)
+            return html_text
+        except CircuitOpenError as e:
+            log_deferred_search(search_term, e)
+            return DEFERRED
+        except asyncio.TimeoutError:
+            logging.error(f"    Timeout ({REQUEST_TIMEOUT}s) beim Laden der Seite für '{search_term}'.")
+        except aiohttp.ClientResponseError as e:
+            logging.error(f"    HTTP Fehler {e.status} beim Laden der Seite für '{search_term}'.")
+        except aiohttp.ClientError as e:
+            logging.error(f"    Netzwerkfehler beim Laden der Seite für '{search_term}': {e}")
+        except Exception as e:
+            logging.error(f"    Unerwarteter Fehler beim Seitenabruf für '{search_term}': {e}", exc_info=True)
+    return None
+
+
+async def run_cycle_async(plan, seen_items, profiles_with_new, scheduler=None):
+    """
+    Paralleler Suchdurchlauf: Alle geplanten Abrufe aller Plattformen laufen gleichzeitig, begrenzt durch Budget und
+    Ratenlimit des jeweiligen Hosts und den gemeinsamen Pool (siehe FetchPool). Das Parsen läuft pro Abruf (bei
+    PARSE_WORKERS > 0 in Worker-Prozessen); Filter, gesehene Inserate und Benachrichtigungen bleiben im Hauptprozess,
+    sobald die jeweilige Seite fertig ist.
+    """
+    platforms = {planned_search.platform.name: planned_search.platform for planned_search in plan}.values()
+    policies = {platform.host: platform.rate_limit_policy() for platform in platforms}
+    budgets = host_budgets(platforms)
+    limiter = HostRateLimiter(HOST_RATE_LIMIT, HOST_BURST, policies)
+    pool = FetchPool(fetch_pool_size(budgets), budgets, MAX_CONCURRENT_REQUESTS)
+    if len(budgets) > 1:
+        host_limits = ", ".join(f"{host}: max. {budget}, {policies[host][0]:.2f}/s" for host, budget in budgets.items())
+        logging.info(f"Starte {len(plan)} Suchanfragen parallel auf {len(budgets)} Hosts (max. {pool.total} gleichzeitig; {host_limits}).")
+    else:
+        logging.info(f"Starte {len(plan)} Suchanfragen parallel (max. {pool.total} gleichzeitig, "
+                     f"{next(iter(policies.values()), (HOST_RATE_LIMIT,))[0]:.2f} Anfragen/s pro Host).")
+    found_new_in_cycle = False
+
+    async def fetch_and_parse(planned_search):
+        """
+        Lädt und parst alle Seiten einer Suchanfrage. Gibt (PageExtraction, NOT_MODIFIED oder None, gefunden) zurück;
+        'gefunden' ist None, wenn die Inserate noch verteilt werden müssen, sonst wurden sie beim Streamen schon verteilt.
+        """
+        if streaming_enabled():
+            first_page, found_new = await stream_search_page_async(planned_search, seen_items, profiles_with_new, limiter, pool)
+            if first_page is None or first_page is NOT_MODIFIED or first_page is DEFERRED:
+                return first_page, found_new
+            try:
+                page = await fetch_following_pages_async(planned_search, first_page, seen_items, limiter, pool)
+                return page, fan_out_following_pages(planned_search, first_page, page, seen_items, profiles_with_new) or found_new
+            except Exception as e:
+                logging.error(f"!! Unerwarteter Fehler bei Verarbeitung von '{planned_search.search_term}': {e}", exc_info=True)
+                logging.error("   -> Fahre mit nächstem Suchbegriff/Profil fort.")
+                forget_search_validators(planned_search)
+                return None, found_new
+
+        html_text = await fetch_search_page_async(planned_search.search_term, limiter, pool,
+                                                  cache_key=subscribers_cache_key(planned_search),
+                                                  filters=subscribers_filters(planned_search), platform=planned_search.platform)
+        if html_text is None or html_text is NOT_MODIFIED or html_text is DEFERRED:
+            return html_text, None
+        try:
+            first_page = await extract_search_page_async(html_text, planned_search.platform)
+            return await fetch_following_pages_async(planned_search, first_page, seen_items, limiter, pool), None
+        except Exception as e:
+            logging.error(f"!! Unerwarteter Fehler bei Verarbeitung von '{planned_search.search_term}': {e}", exc_info=True)
+            logging.error("   -> Fahre mit nächstem Suchbegriff/Profil fort.")
+            forget_search_validators(planned_search)
+            return None, None
+
+    async def fetch_job(planned_search):
+        with METRICS.labels(term=planned_search.query): # Jeder Task hat seinen eigenen Kontext
+            return (planned_search, *await fetch_and_parse(planned_search))
+
+    # Seiten in der Reihenfolge verarbeiten, in der sie fertig geparst sind (gestreamte Seiten sind schon verteilt)
+    for next_done in asyncio.as_completed([fetch_job(planned_search) for planned_search in plan]):
+        planned_search, page, found_new = await next_done
+        if found_new:
+            found_new_in_cycle = True
+        if page is None:
+            continue
+        if page is DEFERRED:
+            if scheduler is not None: scheduler.defer(planned_search, HTTP_CLIENT.seconds_until_retry(planned_search.platform.base_url))
+            continue
+        if page is NOT_MODIFIED:
+            logging.info(f"    Seite für '{planned_search.search_term}' unverändert (304). Überspringe Parsing.")
+            if scheduler is not None: scheduler.observe(planned_search, None)
+            continue
+        if scheduler is not None: scheduler.observe(planned_search, [listing.url for listing in page.listings], complete=page.complete)
+        if found_new is not None:
+            continue
+        log_planned_search(planned_search)
+        with METRICS.labels(term=planned_search.query):
+            if fan_out_page(planned_search, page, seen_items, profiles_with_new):
+                found_new_in_cycle = True
+
+    return found_new_in_cycle
+
+
+# ==============================================================================
+# 12. HAUPT-SCHLEIFE (Main Loop)
 # ==============================================================================
 
-def main():
-    """Hauptfunktion: Lädt Konfig, startet die Endlos-Schleife zur Überwachung."""
+def wait_for_next_cycle(seconds, config_watcher):
+    """
+    Wartet bis zum nächsten Durchlauf und prüft dabei alle CONFIG_POLL_INTERVAL Sekunden die Konfigurationsdatei.
+    Wurde eine geänderte Konfiguration übernommen, startet der nächste Durchlauf sofort.
+    """
+    deadline = monotonic() + seconds
+    while True:
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return
+        sleep(min(remaining, CONFIG_POLL_INTERVAL))
+        if config_watcher.poll():
+            return
+
+
+def main(once=False):
+    """
+    Hauptfunktion: Lädt Konfig, startet die Endlos-Schleife zur Überwachung. Mit 'once' (--once, für systemd-Timer
+    oder Cronjobs) genau ein Durchlauf über alle Suchanfragen, danach wird gespeichert und beendet.
+    Gibt den Exit-Code zurück (0 = ok, 1 = keine Konfiguration oder kritischer Fehler).
+    """
     run_start_time = time()
+    exit_code = 0
     logging.info(f"--- ==== gebrauchtplatformen.ch Monitor v1.0 gestartet ==== ---") # Beispiel-Version
 
-    # 1. Lade Konfiguration
-    monitoring_config = load_json_file(CONFIG_FILE, [])
-    if not monitoring_config:
-        logging.critical(f"FEHLER: Konfiguration '{CONFIG_FILE}' konnte nicht geladen werden oder ist leer. Bitte erstellen/prüfen Sie die Datei.")
+    # 1. Lade und kompiliere Konfiguration (wird zwischen den Durchläufen bei Änderungen neu geladen)
+    config_watcher = ConfigWatcher(CONFIG_FILE)
+    if not config_watcher.load():
         logging.critical("Skript wird beendet.")
-        return # Beendet das Skript, wenn keine Konfig da ist
-
-    if not isinstance(monitoring_config, list):
-         logging.critical(f"FEHLER: Der Inhalt von '{CONFIG_FILE}' muss eine Liste von Such-Objekten sein. Aktueller Typ: {type(monitoring_config)}")
-         logging.critical("Skript wird beendet.")
-         return
+        return 1 # Beendet das Skript, wenn keine Konfig da ist
 
-    logging.info(f"{len(monitoring_config)} Suchprofile aus '{CONFIG_FILE}' geladen.")
+    logging.info(f"{len(config_watcher.profiles)} Suchprofile aus '{CONFIG_FILE}' geladen.")
+    if len(PLATFORMS) > 1:
+        logging.info(f"{len(PLATFORMS)} Plattformen konfiguriert: " + ", ".join(f"{name} ({platform.host})" for name, platform in PLATFORMS.items()))
+    if SHARD_COUNT > 1:
+        logging.info(f"Instanz {SHARD_INDEX + 1} von {SHARD_COUNT}: ruft nur die ihr zugeordneten Suchanfragen ab.")
+    if RECORD_DIR:
+        logging.info(f"Geladene Suchseiten werden in '{RECORD_DIR}' aufgezeichnet (für gebrauchtplatformen_benchmarks.py --benchmark-replay).")
+    if METRICS_ENABLED and METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
 
     # 2. Lade bereits gesehene Items
-    seen_items = load_seen_items(SEEN_ITEMS_FILE)
+    seen_items = open_seen_items()
+    evict_expired_seen_items(seen_items)
+    global PRICE_HISTORY_INSTANCE
+    if PRICE_HISTORY:
+        PRICE_HISTORY_INSTANCE = PriceHistoryStore(PRICE_HISTORY_DB_FILE)
+        PRICE_HISTORY_INSTANCE.prune()
+        logging.info(f"Preisverlauf wird in '{PRICE_HISTORY_DB_FILE}' gespeichert (Median über {PRICE_HISTORY_WINDOW_DAYS} Tage).")
 
     # 3. Telegram Status & Startnachricht
+    global TELEGRAM_DISPATCHER_INSTANCE
     if TELEGRAM_ENABLED:
         logging.info("Telegram Benachrichtigungen sind AKTIVIERT.")
+        if TELEGRAM_DISPATCHER:
+            outbox_filename = shard_filename(TELEGRAM_OUTBOX_FILE) # Jede Instanz versendet ihre eigene Warteschlange
+            TELEGRAM_DISPATCHER_INSTANCE = TelegramDispatcher(TELEGRAM_BOT_TOKENS, TelegramOutbox(outbox_filename))
+            TELEGRAM_DISPATCHER_INSTANCE.start()
+            logging.info(f"Telegram Nachrichten werden im Hintergrund gesendet (Warteschlange: '{outbox_filename}').")
         try:
-             # Sende Startnachricht (optional, aber hilfreich)
-             send_telegram_notification(
-                 "gebrauchtplatformen Monitor Gestartet",
-                 f"Überwachung für {len(monitoring_config)} Suchprofil(e) aktiv.",
-                 None, # Kein Preis für Systemnachricht
-                 "System-Status"
-             )
+             # Sende Startnachricht (optional, aber hilfreich), bei mehreren Instanzen nur von der ersten
+             # und nicht bei jedem Start mit --once
+             if SHARD_INDEX == 0 and not once:
+                 send_telegram_notification(
+                     "gebrauchtplatformen Monitor Gestartet",
+                     f"Überwachung für {len(config_watcher.profiles)} Suchprofil(e) aktiv.",
+                     None, # Kein Preis für Systemnachricht
+                     "System-Status"
+                 )
         except Exception as e:
              logging.error(f"Fehler beim Senden der Telegram Startnachricht: {e}")
     else:
         logging.warning("Telegram Benachrichtigungen sind DEAKTIVIERT (TELEGRAM_BOT_TOKEN oder TELEGRAM_CHAT_ID ist nicht gesetzt).")
 
     # --- Start der periodischen Überwachung ---
-    logging.info(f"Beginne periodische Überwachung alle {CHECK_INTERVAL} Sekunden. Drücke STRG+C zum Beenden.")
+    # Mit --once gibt der Timer das Intervall vor: jeder Lauf fragt alle Suchbegriffe ab (kein adaptiver Plan)
+    scheduler = PollScheduler() if ADAPTIVE_SCHEDULING and not once else None
+    if once:
+        logging.info("Einmaliger Durchlauf (--once).")
+    elif scheduler is not None:
+        logging.info(f"Beginne adaptive Überwachung (Intervall pro Suchbegriff {MIN_POLL_INTERVAL}-{MAX_POLL_INTERVAL} Sekunden). Drücke STRG+C zum Beenden.")
+    else:
+        logging.info(f"Beginne periodische Überwachung alle {CHECK_INTERVAL} Sekunden. Drücke STRG+C zum Beenden.")
     cycle_count = 0
     try:
         while True:
             cycle_count += 1
             logging.info(f"--- === Beginn Suchdurchlauf #{cycle_count} === ---")
             start_cycle_time = time()
-            found_new_in_cycle = False
             initial_seen_count = len(seen_items)
 
-            # Iteriere durch jedes konfigurierte Suchprofil (Item)
-            for item_config in monitoring_config:
-                item_name = item_config.get("name", f"Unbenanntes Profil #{monitoring_config.index(item_config)+1}")
-                search_terms = item_config.get("search_terms", [])
-
-                if not search_terms or not isinstance(search_terms, list):
-                    logging.warning(f"Überspringe Profil '{item_name}': Enthält keine gültige Liste von 'search_terms'.")
-                    continue
-                if not all(isinstance(term, str) and term.strip() for term in search_terms):
-                    logging.warning(f"Überspringe Profil '{item_name}': 'search_terms' enthält ungültige oder leere Einträge.")
-                    continue
-
-                logging.debug(f"Verarbeite Profil: '{item_name}' mit {len(search_terms)} Suchbegriff(en)...")
-
-                # Iteriere durch die Suchbegriffe für dieses Profil
-                item_found_new = False # Flag, ob für DIESES Item etwas Neues gefunden wurde
-                for search_term in search_terms:
-                    try:
-                        # Führe die Suche und Filterung für diesen Begriff aus
-                        if check_single_search_term(search_term.strip(), item_config, seen_items):
-                            item_found_new = True # Markieren, dass etwas gefunden wurde
-                            found_new_in_cycle = True # Markieren für den gesamten Zyklus
-                            # Speichere nach jedem Fund, um Datenverlust zu minimieren
-                            save_seen_items(seen_items, SEEN_ITEMS_FILE)
-
-                        # Kurze Pause zwischen den einzelnen Suchanfragen
-                        sleep(INTER_REQUEST_DELAY)
-
-                    except Exception as e:
-                         # Fängt unerwartete Fehler innerhalb der Verarbeitung eines Suchbegriffs ab
-                         logging.error(f"!! Unerwarteter Fehler bei Verarbeitung von '{search_term}' für '{item_name}': {e}", exc_info=True)
-                         logging.error("   -> Fahre mit nächstem Suchbegriff/Profil fort.")
-                         sleep(ERROR_DELAY) # Längere Pause nach einem Fehler
-
-                if item_found_new:
-                    logging.info(f"-> Neue(s) Inserat(e) für Profil '{item_name}' in diesem Durchlauf gefunden.")
-
-                # Kleine Pause nach Abarbeitung aller Suchbegriffe eines Items/Profils
-                sleep(INTER_ITEM_DELAY)
+            # Führe alle Suchanfragen dieses Durchlaufs aus (sequentiell oder parallel)
+            found_new_in_cycle = run_cycle(config_watcher.profiles, seen_items, scheduler)
 
             # --- Abschluss des gesamten Suchdurchlaufs ---
             cycle_duration = time() - start_cycle_time
@@ -635,9 +4585,30 @@ def main():
                 # Sende eine "Nichts gefunden"-Nachricht nur an die Konsole/Logs, nicht an Telegram
                 # Die Telegram-Nachrichten werden nur bei tatsächlichen Funden gesendet
 
+            if newly_added_count and saves_per_cycle(seen_items):
+                save_seen_items(seen_items, SEEN_ITEMS_FILE, SEEN_ITEMS_SNAPSHOT_FILE)
+            evict_expired_seen_items(seen_items)
+            if PRICE_HISTORY_INSTANCE is not None:
+                PRICE_HISTORY_INSTANCE.flush()
+                PRICE_HISTORY_INSTANCE.prune()
             logging.info(f"Gesamtzahl überwachter (gesehener) Inserate: {len(seen_items)}")
-            logging.info(f"Warte {CHECK_INTERVAL} Sekunden bis zum nächsten Durchlauf...")
-            sleep(CHECK_INTERVAL)
+            if LISTING_CHANGE_DETECTION:
+                logging.info(f"Inserate im Änderungs-Cache: {len(LISTING_CACHE)} (max. {LISTING_CACHE_MAX_ENTRIES})")
+            logging.info(HTTP_CLIENT.stats_summary())
+            logging.info(price_filter_stats_summary())
+            if METRICS_ENABLED:
+                logging.info(METRICS.stats_summary())
+            if TELEGRAM_DISPATCHER_INSTANCE is not None:
+                logging.info(TELEGRAM_DISPATCHER_INSTANCE.stats_summary())
+            if once:
+                break
+            if scheduler is not None:
+                wait_seconds = max(1.0, scheduler.seconds_until_next_due())
+                logging.info(f"Warte {wait_seconds:.0f} Sekunden bis zur nächsten fälligen Suchanfrage...")
+                wait_for_next_cycle(wait_seconds, config_watcher)
+            else:
+                logging.info(f"Warte {CHECK_INTERVAL} Sekunden bis zum nächsten Durchlauf...")
+                wait_for_next_cycle(CHECK_INTERVAL, config_watcher)
 
     except KeyboardInterrupt:
         print() # Neue Zeile nach ^C
@@ -645,6 +4616,7 @@ def main():
     except Exception as e:
         # Fängt unerwartete Fehler auf der obersten Ebene der Schleife ab
         logging.critical(f"💥 Kritischer Fehler in der Hauptschleife: {e}", exc_info=True)
+        exit_code = 1
         if TELEGRAM_ENABLED:
              try:
                  send_telegram_notification("gebrauchtplatformen Monitor KRITISCHER FEHLER", f"Fehler: {e}\nSkript wird möglicherweise beendet.", None, "System-Alarm")
@@ -655,20 +4627,69 @@ def main():
         logging.info("--- Skript wird beendet. Führe abschliessende Aktionen durch... ---")
         try:
              # Stelle sicher, dass der letzte Stand der gesehenen Items gespeichert wird
-             logging.info(f"Speichere {len(seen_items)} gesehene Items in '{SEEN_ITEMS_FILE}'...")
-             save_seen_items(seen_items, SEEN_ITEMS_FILE)
+             if isinstance(seen_items, (SqliteSeenStore, RedisSeenStore)):
+                 seen_items_filename = seen_items.db_filename
+             else:
+                 seen_items_filename = SEEN_ITEMS_SNAPSHOT_FILE if SEEN_ITEMS_SNAPSHOT else SEEN_ITEMS_FILE
+             logging.info(f"Speichere {len(seen_items)} gesehene Items in '{seen_items_filename}'...")
+             save_seen_items(seen_items, SEEN_ITEMS_FILE, SEEN_ITEMS_SNAPSHOT_FILE)
+             if isinstance(seen_items, (SqliteSeenStore, RedisSeenStore)):
+                 seen_items.close()
              logging.info("Speichern erfolgreich.")
         except Exception as e:
-             logging.error(f"Fehler beim finalen Speichern von '{SEEN_ITEMS_FILE}': {e}")
+             logging.error(f"Fehler beim finalen Speichern der gesehenen Items: {e}")
+        if PRICE_HISTORY_INSTANCE is not None:
+            try:
+                PRICE_HISTORY_INSTANCE.close()
+            except sqlite3.Error as e:
+                logging.error(f"Fehler beim Speichern des Preisverlaufs: {e}")
+
+        # Wartende Telegram Nachrichten noch senden (Rest bleibt in der Outbox)
+        if TELEGRAM_DISPATCHER_INSTANCE is not None:
+             TELEGRAM_DISPATCHER_INSTANCE.stop()
+             logging.info(TELEGRAM_DISPATCHER_INSTANCE.stats_summary())
+
+        # HTTP-Verbindungen und Parser-Worker sauber schliessen
+        try:
+             close_event_loop()
+             HTTP_CLIENT.close()
+             close_parse_pool()
+        except Exception as e:
+             logging.error(f"Fehler beim Schliessen der HTTP-Verbindungen: {e}")
 
         run_end_time = time()
         total_runtime = run_end_time - run_start_time
         logging.info(f"--- ==== gebrauchtplatformen.ch Monitor beendet nach {total_runtime:.2f} Sekunden ==== ---")
+    return exit_code
 
 
 # ==============================================================================
-# 9. SKRIPT STARTPUNKT
+# 13. SKRIPT STARTPUNKT
 # ==============================================================================
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="gebrauchtplatformen.ch Monitor")
+    parser.add_argument("--once", action="store_true",
+                        help="Führt genau einen Suchdurchlauf aus und beendet danach (für systemd-Timer oder Cronjobs; "
+                             "am schnellsten als 'python -m gebrauchtplatformen_monitor --once', das den Bytecode-Cache nutzt).")
+    parser.add_argument("--record", metavar="VERZEICHNIS",
+                        help="Speichert alle geladenen Suchseiten im Verzeichnis (für --benchmark-replay in gebrauchtplatformen_benchmarks.py).")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Stellt die Metriken pro Stufe unter http://127.0.0.1:PORT/metrics bereit (Prometheus-Format).")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Diese Instanz ist Nummer I von N (z.B. 2/3) und ruft nur ihren Anteil der Suchanfragen ab.")
+    args = parser.parse_args()
+
+    if args.record:
+        RECORD_DIR = args.record
+    if args.metrics_port:
+        METRICS_PORT = args.metrics_port
+    if args.shard:
+        try:
+            shard_number, SHARD_COUNT = (int(part) for part in args.shard.split("/"))
+        except ValueError:
+            parser.error("--shard erwartet I/N, z.B. 2/3")
+        if not 1 <= shard_number <= SHARD_COUNT:
+            parser.error("--shard: I muss zwischen 1 und N liegen")
+        SHARD_INDEX = shard_number - 1
+    raise SystemExit(main(once=args.once))